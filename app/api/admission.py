@@ -0,0 +1,144 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+
+from fastapi import HTTPException
+
+from app.core.db import API_DB_POOL_SIZE
+from app.core.metrics import (
+    api_admission_in_flight,
+    api_admission_queue_depth,
+    api_admission_wait_seconds,
+    api_admission_rejected_total,
+)
+
+logger = logging.getLogger(__name__)
+
+# How long a request may wait for a slot before it is shed.
+API_ADMISSION_TIMEOUT_SECONDS = float(
+    os.getenv("API_ADMISSION_TIMEOUT_SECONDS", "0.5")
+)
+# Retry-After sent with 503s.
+API_ADMISSION_RETRY_AFTER = int(os.getenv("API_ADMISSION_RETRY_AFTER", "1"))
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+class AdmissionLimiter:
+    """
+    At most `limit` requests of a route group run at once; up to
+    `queue_size` more wait FIFO for `timeout` seconds. Anything beyond is
+    rejected with 503 + Retry-After instead of queueing for a pool
+    connection (and then inside Postgres).
+    """
+
+    def __init__(self, name, limit, queue_size, timeout=API_ADMISSION_TIMEOUT_SECONDS):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters = deque()
+
+    def _reject(self, reason):
+        api_admission_rejected_total.labels(self.name, reason).inc()
+        logger.warning("[ADMISSION] %s: shed request (%s)", self.name, reason)
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, retry later",
+            headers={"Retry-After": str(API_ADMISSION_RETRY_AFTER)},
+        )
+
+    def _set_gauges(self):
+        api_admission_in_flight.labels(self.name).set(self.in_flight)
+        api_admission_queue_depth.labels(self.name).set(len(self._waiters))
+
+    async def acquire(self):
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            api_admission_wait_seconds.labels(self.name).observe(0)
+            self._set_gauges()
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._set_gauges()
+        started = time.monotonic()
+
+        try:
+            await asyncio.wait_for(waiter, timeout=self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            # The slot may have been handed over just as we gave up.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._set_gauges()
+
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            self._reject("timeout")
+        finally:
+            api_admission_wait_seconds.labels(self.name).observe(
+                time.monotonic() - started
+            )
+
+    def release(self):
+        # Hand the slot straight to the oldest waiter, so in_flight never
+        # dips and lets a newcomer jump the queue.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._set_gauges()
+                return
+
+        self.in_flight -= 1
+        self._set_gauges()
+
+
+def admit(limiter):
+    """Route dependency holding a slot of `limiter` until the response is sent."""
+
+    async def dependency():
+        await limiter.acquire()
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    return dependency
+
+
+# Default limits split the base pool between route groups, so a burst on
+# one group cannot take every connection and routes never push the pool
+# into overflow; overflow stays available for /health and the stream
+# broadcaster. Long-held exports and ETL run/statistics routes get a
+# quarter each, market-data reads the rest.
+_EXPORT_DEFAULT = max(1, API_DB_POOL_SIZE // 4)
+_RUNS_DEFAULT = max(1, API_DB_POOL_SIZE // 4)
+_DATA_DEFAULT = max(1, API_DB_POOL_SIZE - _EXPORT_DEFAULT - _RUNS_DEFAULT)
+
+data_limiter = AdmissionLimiter(
+    "data",
+    limit=_env_int("API_ADMISSION_DATA_LIMIT", _DATA_DEFAULT),
+    queue_size=_env_int("API_ADMISSION_DATA_QUEUE", 2 * _DATA_DEFAULT),
+)
+export_limiter = AdmissionLimiter(
+    "export",
+    limit=_env_int("API_ADMISSION_EXPORT_LIMIT", _EXPORT_DEFAULT),
+    # Exports run for seconds to minutes; waiting in line rarely pays off.
+    queue_size=_env_int("API_ADMISSION_EXPORT_QUEUE", 0),
+)
+runs_limiter = AdmissionLimiter(
+    "runs",
+    limit=_env_int("API_ADMISSION_RUNS_LIMIT", _RUNS_DEFAULT),
+    queue_size=_env_int("API_ADMISSION_RUNS_QUEUE", 2 * _RUNS_DEFAULT),
+)
@@ -0,0 +1,191 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from app.schemas.tables import data_generation
+from app.core.metrics import (
+    api_cache_lookups_total,
+    api_cache_hit_ratio,
+    api_cache_entries,
+)
+
+# 0 disables caching.
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "1024"))
+# How long a read of data_generation is reused. Within it, cache hits and
+# 304s need no database round-trip at all; 0 reads it on every request.
+API_GENERATION_TTL_SECONDS = float(os.getenv("API_GENERATION_TTL_SECONDS", "1"))
+# Cache-Control max-age for cached routes; clients revalidate with the ETag
+# once it expires.
+API_HTTP_MAX_AGE = int(os.getenv("API_HTTP_MAX_AGE", "0"))
+
+
+def _normalize(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.isoformat()
+    return value
+
+
+def cache_key(route, **params):
+    """Route plus its query parameters, order-independent, unset ones dropped."""
+    return (
+        route,
+        tuple(
+            sorted(
+                (name, _normalize(value))
+                for name, value in params.items()
+                if value is not None
+            )
+        ),
+    )
+
+
+async def current_generation(conn):
+    generation = (await conn.execute(
+        select(data_generation.c.generation)
+        .where(data_generation.c.id == 1)
+    )).scalar()
+    return generation or 0
+
+
+class GenerationReader:
+    """data_generation, re-read at most once per `ttl` seconds."""
+
+    def __init__(self, ttl=API_GENERATION_TTL_SECONDS):
+        self.ttl = ttl
+        self._value = None
+        self._read_at = 0.0
+
+    async def get(self, engine):
+        now = time.monotonic()
+        if self._value is not None and now - self._read_at < self.ttl:
+            return self._value
+
+        async with engine.connect() as conn:
+            self._value = await current_generation(conn)
+        self._read_at = now
+        return self._value
+
+    def clear(self):
+        self._value = None
+        self._read_at = 0.0
+
+
+def make_etag(key, generation):
+    """
+    Weak validator for the payload of `key` at `generation`. Weak because
+    the body also carries per-request fields (`request_id`,
+    `api_latency_ms`), so two 200s for the same tag are equivalent but not
+    byte-identical.
+    """
+    digest = hashlib.blake2b(
+        repr((generation, key)).encode(),
+        digest_size=16,
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2).
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque
+        for tag in if_none_match.split(",")
+    )
+
+
+def validator_headers(etag):
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={API_HTTP_MAX_AGE}, must-revalidate",
+    }
+
+
+class ResponseCache:
+    """
+    LRU cache of response payloads, valid for a single data generation.
+    Seeing a newer generation drops every entry at once, so an ETL run
+    invalidates all routes without tracking which rows each one read.
+    """
+
+    def __init__(self, max_entries=API_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.generation = None
+        self._entries = OrderedDict()
+        self._lookups = {}
+
+    def _record(self, route, hit):
+        hits, total = self._lookups.get(route, (0, 0))
+        hits, total = hits + hit, total + 1
+        self._lookups[route] = (hits, total)
+
+        api_cache_lookups_total.labels(route, "hit" if hit else "miss").inc()
+        api_cache_hit_ratio.labels(route).set(hits / total)
+
+    def get(self, key, generation):
+        if generation != self.generation:
+            self._entries.clear()
+            self.generation = generation
+            api_cache_entries.set(0)
+
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+
+        self._record(key[0], value is not None)
+        return value
+
+    def put(self, key, generation, value):
+        # A newer generation was seen while this response was computed;
+        # it is already stale.
+        if generation != self.generation or self.max_entries <= 0:
+            return
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        api_cache_entries.set(len(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+        self.generation = None
+        self._lookups.clear()
+        api_cache_entries.set(0)
+
+
+response_cache = ResponseCache()
+generation_reader = GenerationReader()
+
+
+async def cached_payload(request, engine, key, compute):
+    """
+    (payload, etag) for a cached route, computing the payload with
+    `compute(conn)` on a miss. payload is None when the client's
+    If-None-Match already matches: the caller answers 304 without
+    querying or serializing anything.
+    """
+    generation = await generation_reader.get(engine)
+    etag = make_etag(key, generation)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return None, etag
+
+    payload = response_cache.get(key, generation)
+    if payload is None:
+        async with engine.connect() as conn:
+            payload = await compute(conn)
+        response_cache.put(key, generation, payload)
+
+    return payload, etag
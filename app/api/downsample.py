@@ -0,0 +1,44 @@
+import numpy as np
+
+
+def lttb(x, y, n):
+    """
+    Largest-Triangle-Three-Buckets: indices of at most `n` points of the
+    series (x, y) that preserve its visual shape. x must be ascending.
+
+    The first and last points are always kept. The remaining points are
+    split into n - 2 buckets; each bucket keeps the point forming the
+    largest triangle with the previously kept point and the mean of the
+    next bucket. The per-bucket work is vectorized, so cost is O(len(x))
+    with n Python-level steps.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    size = len(x)
+
+    if n >= size:
+        return np.arange(size)
+    if n < 3:
+        return np.array([0, size - 1][:max(n, 0)])
+
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    selected = np.empty(n, dtype=int)
+    selected[0] = 0
+    selected[-1] = size - 1
+    a = 0
+
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else size
+
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+
+    return selected
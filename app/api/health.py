@@ -0,0 +1,101 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from app.schemas.tables import etl_checkpoints
+
+logger = logging.getLogger(__name__)
+
+# How often the background task re-checks the DB for /readyz and /health.
+HEALTH_REFRESH_SECONDS = float(os.getenv("HEALTH_REFRESH_SECONDS", "5"))
+
+
+class HealthSnapshot:
+    """
+    DB connectivity and ETL checkpoint state, refreshed at most once per
+    interval no matter how often probes hit the API.
+    """
+
+    def __init__(self, interval=HEALTH_REFRESH_SECONDS):
+        self.interval = interval
+        self.state = None
+        self._checked_at = None  # monotonic
+        self._lock = asyncio.Lock()
+
+    def age(self):
+        if self._checked_at is None:
+            return None
+        return time.monotonic() - self._checked_at
+
+    def is_stale(self):
+        # Two missed refreshes: the background task is not running (or is
+        # stuck), so callers refresh inline instead.
+        age = self.age()
+        return age is None or age > 2 * self.interval
+
+    async def refresh(self, engine):
+        etl_states = self.state["etl"] if self.state else []
+
+        try:
+            # One connection: reading the checkpoints proves connectivity.
+            async with engine.connect() as conn:
+                rows = (await conn.execute(
+                    select(etl_checkpoints)
+                )).mappings().all()
+
+            db_connected = True
+            etl_states = [
+                {
+                    "source": row["source"],
+                    "status": row["status"],
+                    "last_success_run_id": row["last_success_run_id"],
+                    "last_processed_at": row["last_processed_at"],
+                    "last_failure_at": row["last_failure_at"],
+                    "last_failure_error": row["last_failure_error"],
+                }
+                for row in rows
+            ]
+        except Exception:
+            logger.exception("[HEALTH] DB check failed")
+            db_connected = False
+
+        degraded = not db_connected or any(
+            s["status"] == "failed" for s in etl_states
+        )
+
+        self.state = {
+            "status": "degraded" if degraded else "ok",
+            "db": {"connected": db_connected},
+            "etl": etl_states,
+            "checked_at": datetime.now(timezone.utc),
+        }
+        self._checked_at = time.monotonic()
+        return self.state
+
+    async def get(self, engine):
+        if not self.is_stale():
+            return self.state
+
+        async with self._lock:
+            # Another request may have refreshed while we waited.
+            if self.is_stale():
+                await self.refresh(engine)
+            return self.state
+
+    async def run(self, engine):
+        """Background refresher, started from the app lifespan."""
+        while True:
+            async with self._lock:
+                await self.refresh(engine)
+            await asyncio.sleep(self.interval)
+
+    def clear(self):
+        self.state = None
+        self._checked_at = None
+
+
+health_snapshot = HealthSnapshot()
@@ -6,11 +6,40 @@ import os
 
 import uuid
 import time
-from fastapi import FastAPI, APIRouter, Depends, Query,Response
+import json
+import base64
+import csv
+import io
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from fastapi import FastAPI, APIRouter, Depends, Query, Request, Response, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from sqlalchemy import text, select, func, and_
-from app.core.db import get_engine
-from app.schemas.tables import etl_checkpoints, etl_runs, assets, asset_market_data
+from sqlalchemy import select, func, and_, or_
+from app.core.db import get_async_engine, dispose_async_engine
+from app.api.cache import (
+    cache_key,
+    cached_payload,
+    validator_headers,
+)
+from app.api.health import health_snapshot
+from app.api.admission import admit, data_limiter, export_limiter, runs_limiter
+from app.api.downsample import lttb
+from app.api.stream import price_broadcaster, event_stream
+from app.api.responses import FastJSONResponse, row_dicts
+from app.schemas.models import DataBatchRequest
+from app.schemas.tables import (
+    etl_runs,
+    etl_source_stats,
+    assets,
+    asset_market_data,
+    asset_latest_market_data,
+    asset_consensus_prices,
+    transform_failure_summaries,
+    CANDLE_TABLES,
+)
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from decimal import Decimal
 
@@ -27,6 +56,22 @@ SOURCE_EXPECTATIONS = {
     },
 }
 
+# /compare-runs thresholds, overridable per request.
+COMPARE_DURATION_FACTOR = float(os.getenv("COMPARE_DURATION_FACTOR", "2.0"))
+COMPARE_RECORDS_FACTOR = float(os.getenv("COMPARE_RECORDS_FACTOR", "0.5"))
+COMPARE_ZSCORE = float(os.getenv("COMPARE_ZSCORE", "3.0"))
+# Successful runs before the EWMA variance is trusted for z-scores.
+COMPARE_MIN_RUNS = int(os.getenv("COMPARE_MIN_RUNS", "5"))
+
+# Rows fetched from the server-side cursor per /data/export chunk.
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+
+# /data/history reads raw points up to HISTORY_RAW_MAX_DAYS, then hourly
+# candles up to HISTORY_HOURLY_MAX_DAYS, then daily candles.
+HISTORY_DEFAULT_DAYS = int(os.getenv("HISTORY_DEFAULT_DAYS", "30"))
+HISTORY_RAW_MAX_DAYS = int(os.getenv("HISTORY_RAW_MAX_DAYS", "7"))
+HISTORY_HOURLY_MAX_DAYS = int(os.getenv("HISTORY_HOURLY_MAX_DAYS", "180"))
+
 router = APIRouter()
 
 @router.get("/")
@@ -36,127 +81,160 @@ def hello():
         "message": "Welcome to Kasparro ETL pipeline API"
     }
 
-@router.get("/health")
-def health(engine = Depends(get_engine)):
-    start = time.time()
-    request_id = str(uuid.uuid4())
+@router.get("/livez")
+def livez():
+    """Liveness: the process is serving requests. Never touches the DB."""
+    return {"status": "alive"}
 
-    db_connected = True
-    try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-    except Exception:
-        db_connected = False
-
-    etl_states = []
-    overall_status = "ok"
-
-    with engine.connect() as conn:
-        rows = conn.execute(
-            select(etl_checkpoints)
-        ).mappings().all()
-
-        for row in rows:
-            state = {
-                "source": row["source"],
-                "status": row["status"],
-                "last_success_run_id": row["last_success_run_id"],
-                "last_processed_at": row["last_processed_at"],
-                "last_failure_at": row["last_failure_at"],
-                "last_failure_error": row["last_failure_error"],
-            }
 
-            if row["status"] == "failed":
-                overall_status = "degraded"
+@router.get("/readyz")
+async def readyz(response: Response, engine = Depends(get_async_engine)):
+    """Readiness from the background health snapshot."""
+    snapshot = await health_snapshot.get(engine)
+    ready = snapshot["db"]["connected"]
+
+    if not ready:
+        response.status_code = 503
+
+    return {
+        "status": "ready" if ready else "not_ready",
+        "db": snapshot["db"],
+        "checked_at": snapshot["checked_at"],
+    }
 
-            etl_states.append(state)
 
+@router.get("/health")
+async def health(engine = Depends(get_async_engine)):
+    start = time.time()
+    request_id = str(uuid.uuid4())
+
+    snapshot = await health_snapshot.get(engine)
     latency_ms = int((time.time() - start) * 1000)
 
     return {
-        "status": overall_status if db_connected else "degraded",
-        "db": {"connected": db_connected},
-        "etl": etl_states,
+        **snapshot,
         "request_id": request_id,
         "api_latency_ms": latency_ms,
     }
 
 
+def _not_modified(etag):
+    return Response(status_code=304, headers=validator_headers(etag))
 
 
-
-@router.get("/stats")
-def stats(engine = Depends(get_engine)):
+@router.get(
+    "/stats",
+    response_class=FastJSONResponse,
+    dependencies=[Depends(admit(runs_limiter))],
+)
+async def stats(request: Request, engine = Depends(get_async_engine)):
     start = time.time()
     request_id = str(uuid.uuid4())
 
-    result = []
-
-    with engine.connect() as conn:
-        sources = conn.execute(
-            select(etl_runs.c.source).distinct()
-        ).scalars().all()
-
-        for source in sources:
-            last_run = conn.execute(
-                select(etl_runs)
-                .where(etl_runs.c.source == source)
-                .order_by(etl_runs.c.started_at.desc())
-                .limit(1)
-            ).mappings().first()
-
-            success_count = conn.execute(
-                select(func.count())
-                .where(
-                    etl_runs.c.source == source,
-                    etl_runs.c.status == "success",
-                )
-            ).scalar()
+    async def compute(conn):
+        return {"sources": await _source_stats(conn)}
 
-            failure_count = conn.execute(
-                select(func.count())
-                .where(
-                    etl_runs.c.source == source,
-                    etl_runs.c.status == "failed",
-                )
-            ).scalar()
+    payload, etag = await cached_payload(
+        request, engine, cache_key("/stats"), compute
+    )
+    if payload is None:
+        return _not_modified(etag)
 
-            result.append(
-                {
-                    "source": source,
-                    "last_run": dict(last_run) if last_run else None,
-                    "success_count": success_count,
-                    "failure_count": failure_count,
-                }
+    latency_ms = int((time.time() - start) * 1000)
+
+    return FastJSONResponse(
+        {
+            **payload,
+            "request_id": request_id,
+            "api_latency_ms": latency_ms,
+        },
+        headers=validator_headers(etag),
+    )
+
+
+async def _source_stats(conn):
+    """Counters and last run per source, from etl_source_stats in one query."""
+    s = etl_source_stats
+
+    rows = (await conn.execute(
+        select(
+            s.c.source.label("stats_source"),
+            s.c.success_count,
+            s.c.failure_count,
+            *etl_runs.c,
+        )
+        .select_from(
+            s.outerjoin(etl_runs, etl_runs.c.run_id == s.c.last_run_id)
+        )
+        .order_by(s.c.source)
+    )).mappings().all()
+
+    return [
+        {
+            "source": row["stats_source"],
+            "last_run": (
+                {str(c.name): row[c.name] for c in etl_runs.c}
+                if row["run_id"] is not None
+                else None
+            ),
+            "success_count": row["success_count"],
+            "failure_count": row["failure_count"],
+        }
+        for row in rows
+    ]
+
+
+def _latest_from_snapshot(*, symbols, sources, from_ts):
+    """Latest row per (asset_id, source) from the maintained snapshot table."""
+    latest = asset_latest_market_data
+
+    stmt = (
+        select(
+            assets.c.symbol,
+            assets.c.name,
+            latest.c.source,
+            latest.c.price_usd,
+            latest.c.market_cap_usd,
+            latest.c.volume_24h_usd,
+            latest.c.last_updated,
+        )
+        .select_from(
+            latest.join(
+                assets,
+                assets.c.asset_id == latest.c.asset_id,
             )
+        )
+    )
 
-    latency_ms = int((time.time() - start) * 1000)
+    if symbols:
+        stmt = stmt.where(assets.c.symbol.in_(symbols))
 
-    return {
-        "sources": result,
-        "request_id": request_id,
-        "api_latency_ms": latency_ms,
-    }
+    if sources:
+        stmt = stmt.where(latest.c.source.in_(sources))
 
+    if from_ts:
+        stmt = stmt.where(latest.c.last_updated >= from_ts)
 
+    return stmt, latest
 
-@router.get("/data")
-def get_data(
-    engine = Depends(get_engine),
-    limit: int = Query(50, ge=1, le=500),
-    offset: int = Query(0, ge=0),
-    symbol: Optional[str] = None,
-    source: Optional[str] = None,
-    from_ts: Optional[str] = None,
-    to_ts: Optional[str] = None,
-):
-    start = time.time()
-    request_id = str(uuid.uuid4())
 
+def _latest_from_history(*, symbols, sources, from_ts, to_ts):
+    """
+    Latest row per (asset_id, source) within a time window, aggregated over
+    asset_market_data. Only needed when to_ts can exclude the snapshot row.
+    """
     filters = []
 
-    if source:
-        filters.append(asset_market_data.c.source == source)
+    # Inside the aggregate, so only the requested assets are grouped.
+    if symbols:
+        filters.append(
+            asset_market_data.c.asset_id.in_(
+                select(assets.c.asset_id).where(assets.c.symbol.in_(symbols))
+            )
+        )
+
+    if sources:
+        filters.append(asset_market_data.c.source.in_(sources))
 
     if from_ts:
         filters.append(asset_market_data.c.last_updated >= from_ts)
@@ -208,45 +286,580 @@ def get_data(
         )
     )
 
-    if symbol:
-        stmt = stmt.where(assets.c.symbol == symbol)
+    return stmt, asset_market_data
+
+
+def _latest(*, symbols, sources, from_ts, to_ts):
+    if to_ts:
+        return _latest_from_history(
+            symbols=symbols, sources=sources, from_ts=from_ts, to_ts=to_ts
+        )
+    return _latest_from_snapshot(
+        symbols=symbols, sources=sources, from_ts=from_ts
+    )
+
+
+def encode_cursor(row):
+    """Opaque cursor for the /data sort key (last_updated, symbol, source)."""
+    raw = json.dumps(
+        [row["last_updated"].isoformat(), row["symbol"], row["source"]]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_updated, symbol, source = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+        return datetime.fromisoformat(last_updated), symbol, source
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+
+def _after_cursor(market, cursor):
+    """Rows strictly after the cursor in (last_updated DESC, symbol, source) order."""
+    last_updated, symbol, source = decode_cursor(cursor)
+
+    # The redundant `<=` bound is what lets the planner seek the
+    # last_updated index; the OR alone would not be sargable.
+    return and_(
+        market.c.last_updated <= last_updated,
+        or_(
+            market.c.last_updated < last_updated,
+            assets.c.symbol > symbol,
+            and_(assets.c.symbol == symbol, market.c.source > source),
+        ),
+    )
+
+
+@router.get(
+    "/data",
+    response_class=FastJSONResponse,
+    dependencies=[Depends(admit(data_limiter))],
+)
+async def get_data(
+    request: Request,
+    engine = Depends(get_async_engine),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    symbol: Optional[str] = None,
+    source: Optional[str] = None,
+    from_ts: Optional[datetime] = None,
+    to_ts: Optional[datetime] = None,
+):
+    start = time.time()
+    request_id = str(uuid.uuid4())
+
+    if cursor and offset:
+        raise HTTPException(
+            status_code=400,
+            detail="cursor and offset cannot be combined",
+        )
+
+    stmt, market = _latest(
+        symbols=[symbol] if symbol else None,
+        sources=[source] if source else None,
+        from_ts=from_ts,
+        to_ts=to_ts,
+    )
+
+    # Keyset pagination: seek past the previous page's last sort key instead
+    # of discarding `offset` rows. Pages stay stable while the ETL writes.
+    if cursor:
+        stmt = stmt.where(_after_cursor(market, cursor))
 
     stmt = (
         stmt
         .order_by(
-            asset_market_data.c.last_updated.desc(),
+            market.c.last_updated.desc(),
             assets.c.symbol.asc(),
-            asset_market_data.c.source.asc(),
+            market.c.source.asc(),
         )
         .limit(limit)
         .offset(offset)
     )
 
-    with engine.connect() as conn:
-        rows = conn.execute(stmt).mappings().all()
+    key = cache_key(
+        "/data",
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        symbol=symbol,
+        source=source,
+        from_ts=from_ts,
+        to_ts=to_ts,
+    )
 
-    return {
-        "data": list(rows),
-        "pagination": {
-            "limit": limit,
-            "offset": offset,
-            "count": len(rows),
+    async def compute(conn):
+        rows = row_dicts(await conn.execute(stmt))
+        return {
+            "data": rows,
+            "pagination": {
+                "limit": limit,
+                "offset": offset,
+                "count": len(rows),
+                "next_cursor": (
+                    encode_cursor(rows[-1]) if len(rows) == limit else None
+                ),
+            },
+        }
+
+    payload, etag = await cached_payload(request, engine, key, compute)
+    if payload is None:
+        return _not_modified(etag)
+
+    return FastJSONResponse(
+        {
+            **payload,
+            "request_id": request_id,
+            "api_latency_ms": int((time.time() - start) * 1000),
         },
+        headers=validator_headers(etag),
+    )
+
+
+@router.post(
+    "/data/batch",
+    response_class=FastJSONResponse,
+    dependencies=[Depends(admit(data_limiter))],
+)
+async def get_data_batch(
+    body: DataBatchRequest,
+    engine = Depends(get_async_engine),
+):
+    """
+    Latest rows for a watchlist of symbols in one query, grouped per symbol.
+    Symbols without data are listed under `missing`.
+    """
+    start = time.time()
+    request_id = str(uuid.uuid4())
+    symbols = list(dict.fromkeys(body.symbols))
+
+    stmt, market = _latest(
+        symbols=symbols,
+        sources=body.sources,
+        from_ts=body.from_ts,
+        to_ts=body.to_ts,
+    )
+    stmt = stmt.order_by(assets.c.symbol.asc(), market.c.source.asc())
+
+    async with engine.connect() as conn:
+        rows = row_dicts(await conn.execute(stmt))
+
+    grouped = {s: [] for s in symbols}
+    for row in rows:
+        grouped[row["symbol"]].append(row)
+
+    return FastJSONResponse({
+        "data": grouped,
+        "missing": [s for s, r in grouped.items() if not r],
+        "count": len(rows),
         "request_id": request_id,
         "api_latency_ms": int((time.time() - start) * 1000),
-    }
+    })
+
+
+EXPORT_COLUMNS = (
+    "symbol",
+    "name",
+    "source",
+    "price_usd",
+    "market_cap_usd",
+    "volume_24h_usd",
+    "last_updated",
+)
+
+
+def _export_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encode_ndjson(rows):
+    return "".join(
+        json.dumps({c: _export_value(row[c]) for c in EXPORT_COLUMNS}) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _encode_csv(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(
+            "" if row[c] is None else _export_value(row[c])
+            for c in EXPORT_COLUMNS
+        )
+    return buf.getvalue().encode()
+
+
+@router.get(
+    "/data/export",
+    dependencies=[Depends(admit(export_limiter))],
+)
+async def export_data(
+    engine = Depends(get_async_engine),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    symbol: Optional[str] = None,
+    source: Optional[str] = None,
+    from_ts: Optional[datetime] = None,
+    to_ts: Optional[datetime] = None,
+):
+    """
+    Full market data history for a filter set, streamed in chunks of
+    EXPORT_CHUNK_ROWS through a server-side cursor.
+    """
+    stmt = (
+        select(
+            assets.c.symbol,
+            assets.c.name,
+            asset_market_data.c.source,
+            asset_market_data.c.price_usd,
+            asset_market_data.c.market_cap_usd,
+            asset_market_data.c.volume_24h_usd,
+            asset_market_data.c.last_updated,
+        )
+        .select_from(
+            asset_market_data.join(
+                assets,
+                assets.c.asset_id == asset_market_data.c.asset_id,
+            )
+        )
+    )
+
+    if symbol:
+        stmt = stmt.where(assets.c.symbol == symbol)
+
+    if source:
+        stmt = stmt.where(asset_market_data.c.source == source)
+
+    if from_ts:
+        stmt = stmt.where(asset_market_data.c.last_updated >= from_ts)
+
+    if to_ts:
+        stmt = stmt.where(asset_market_data.c.last_updated <= to_ts)
+
+    stmt = stmt.order_by(
+        asset_market_data.c.last_updated.asc(),
+        assets.c.symbol.asc(),
+        asset_market_data.c.source.asc(),
+    )
+
+    encode = _encode_csv if format == "csv" else _encode_ndjson
+
+    async def chunks():
+        if format == "csv":
+            yield (",".join(EXPORT_COLUMNS) + "\r\n").encode()
+
+        async with engine.connect() as conn:
+            result = await conn.stream(
+                stmt.execution_options(yield_per=EXPORT_CHUNK_ROWS)
+            )
+            async for rows in result.mappings().partitions():
+                yield encode(rows)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        chunks(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename=market_data.{format}",
+        },
+    )
+
+
+@router.get("/stream/prices")
+async def stream_prices(
+    request: Request,
+    engine = Depends(get_async_engine),
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols"),
+):
+    """
+    Server-sent events: one `prices` event per batch of latest prices that
+    changed since the previous batch. Rows are read once per ETL
+    notification by a shared broadcaster, not per client.
+    """
+    wanted = (
+        {s.strip() for s in symbols.split(",") if s.strip()}
+        if symbols else None
+    )
+    queue = price_broadcaster.subscribe(engine)
+
+    async def events():
+        try:
+            async for chunk in event_stream(request, queue, symbols=wanted):
+                yield chunk
+        finally:
+            price_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.get(
+    "/data/candles",
+    response_class=FastJSONResponse,
+    dependencies=[Depends(admit(data_limiter))],
+)
+async def get_candles(
+    symbol: str,
+    engine = Depends(get_async_engine),
+    interval: str = Query("1h", pattern="^(1h|1d)$"),
+    source: Optional[str] = None,
+    from_ts: Optional[datetime] = None,
+    to_ts: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+):
+    """OHLC candles from the rollup tables; never reads point data."""
+    start = time.time()
+    request_id = str(uuid.uuid4())
+    candles = CANDLE_TABLES[interval]
+
+    stmt = (
+        select(
+            assets.c.symbol,
+            candles.c.source,
+            candles.c.bucket_start,
+            candles.c.open_usd,
+            candles.c.high_usd,
+            candles.c.low_usd,
+            candles.c.close_usd,
+            candles.c.volume_24h_usd,
+            candles.c.points,
+        )
+        .select_from(
+            candles.join(assets, assets.c.asset_id == candles.c.asset_id)
+        )
+        .where(assets.c.symbol == symbol)
+    )
+
+    if source:
+        stmt = stmt.where(candles.c.source == source)
+
+    if from_ts:
+        stmt = stmt.where(candles.c.bucket_start >= from_ts)
+
+    if to_ts:
+        stmt = stmt.where(candles.c.bucket_start <= to_ts)
+
+    stmt = stmt.order_by(
+        candles.c.bucket_start.asc(),
+        candles.c.source.asc(),
+    ).limit(limit)
+
+    async with engine.connect() as conn:
+        rows = row_dicts(await conn.execute(stmt))
+
+    return FastJSONResponse({
+        "symbol": symbol,
+        "interval": interval,
+        "data": rows,
+        "count": len(rows),
+        "request_id": request_id,
+        "api_latency_ms": int((time.time() - start) * 1000),
+    })
+
+
+def _as_utc(ts):
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
 
 
-@router.get("/runs")
-def list_runs(
+def _history_query(asset_filter, *, interval, source, from_ts, to_ts):
+    """(source, timestamp, price) rows of the tier that covers the range."""
+    if interval == "raw":
+        t = asset_market_data
+        ts, price = t.c.last_updated, t.c.price_usd
+    else:
+        t = CANDLE_TABLES[interval]
+        ts, price = t.c.last_at, t.c.close_usd
+
+    stmt = (
+        select(t.c.source, ts.label("timestamp"), price.label("price_usd"))
+        .select_from(t.join(assets, assets.c.asset_id == t.c.asset_id))
+        .where(asset_filter, ts >= from_ts, ts <= to_ts, price.isnot(None))
+        .order_by(t.c.source, ts)
+    )
+
+    if source:
+        stmt = stmt.where(t.c.source == source)
+
+    return stmt
+
+
+@router.get(
+    "/data/history",
+    response_class=FastJSONResponse,
+    dependencies=[Depends(admit(data_limiter))],
+)
+async def get_history(
+    symbol: str,
+    engine = Depends(get_async_engine),
+    source: Optional[str] = None,
+    from_ts: Optional[datetime] = None,
+    to_ts: Optional[datetime] = None,
+    points: int = Query(500, ge=3, le=5000),
+):
+    """
+    Price series per source, downsampled server-side with LTTB to at most
+    `points` points. Long ranges read the candle rollups instead of raw
+    points, so the rows scanned stay bounded as the range grows.
+    """
+    start = time.time()
+    request_id = str(uuid.uuid4())
+
+    # Naive bounds are taken as UTC so the span can be computed.
+    to_ts = _as_utc(to_ts or datetime.now(timezone.utc))
+    from_ts = _as_utc(from_ts or to_ts - timedelta(days=HISTORY_DEFAULT_DAYS))
+
+    if from_ts > to_ts:
+        raise HTTPException(status_code=400, detail="from_ts is after to_ts")
+
+    span = to_ts - from_ts
+    if span <= timedelta(days=HISTORY_RAW_MAX_DAYS):
+        interval = "raw"
+    elif span <= timedelta(days=HISTORY_HOURLY_MAX_DAYS):
+        interval = "1h"
+    else:
+        interval = "1d"
+
+    stmt = _history_query(
+        assets.c.symbol == symbol,
+        interval=interval,
+        source=source,
+        from_ts=from_ts,
+        to_ts=to_ts,
+    )
+
+    async with engine.connect() as conn:
+        rows = (await conn.execute(stmt)).all()
+
+    series = []
+    for src, group in groupby(rows, key=lambda r: r.source):
+        group = list(group)
+        x = [r.timestamp.timestamp() for r in group]
+        y = [float(r.price_usd) for r in group]
+
+        series.append(
+            {
+                "source": src,
+                "raw_points": len(group),
+                "points": [
+                    {
+                        "timestamp": group[i].timestamp,
+                        "price_usd": y[i],
+                    }
+                    for i in lttb(x, y, points)
+                ],
+            }
+        )
+
+    return FastJSONResponse({
+        "symbol": symbol,
+        "resolution": interval,
+        "from_ts": from_ts,
+        "to_ts": to_ts,
+        "series": series,
+        "request_id": request_id,
+        "api_latency_ms": int((time.time() - start) * 1000),
+    })
+
+
+@router.get(
+    "/prices/consensus",
+    response_class=FastJSONResponse,
+    dependencies=[Depends(admit(data_limiter))],
+)
+async def get_consensus(
+    request: Request,
+    engine = Depends(get_async_engine),
+    symbol: Optional[str] = None,
+    min_sources: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Cross-source consensus per asset, precomputed by the transform into
+    asset_consensus_prices; requests only read it.
+    """
+    start = time.time()
+    request_id = str(uuid.uuid4())
+    c = asset_consensus_prices
+
+    stmt = (
+        select(
+            assets.c.symbol,
+            assets.c.name,
+            c.c.median_price_usd,
+            c.c.mean_price_usd,
+            c.c.min_price_usd,
+            c.c.max_price_usd,
+            c.c.spread_pct,
+            c.c.source_count,
+            c.c.sources,
+            c.c.freshest_at,
+        )
+        .select_from(c.join(assets, assets.c.asset_id == c.c.asset_id))
+        .where(c.c.source_count >= min_sources)
+        .order_by(assets.c.symbol.asc())
+        .limit(limit)
+        .offset(offset)
+    )
+
+    if symbol:
+        stmt = stmt.where(assets.c.symbol == symbol)
+
+    async def compute(conn):
+        rows = row_dicts(await conn.execute(stmt))
+        return {"prices": rows, "count": len(rows)}
+
+    key = cache_key(
+        "/prices/consensus",
+        symbol=symbol,
+        min_sources=min_sources,
+        limit=limit,
+        offset=offset,
+    )
+    payload, etag = await cached_payload(request, engine, key, compute)
+    if payload is None:
+        return _not_modified(etag)
+
+    return FastJSONResponse(
+        {
+            **payload,
+            "request_id": request_id,
+            "api_latency_ms": int((time.time() - start) * 1000),
+        },
+        headers=validator_headers(etag),
+    )
+
+
+@router.get(
+    "/runs",
+    response_class=FastJSONResponse,
+    dependencies=[Depends(admit(runs_limiter))],
+)
+async def list_runs(
+    request: Request,
     limit: int = Query(10, ge=1, le=100),
-    engine=Depends(get_engine),
+    engine=Depends(get_async_engine),
 ):
     start = time.time()
     request_id = str(uuid.uuid4())
 
-    with engine.connect() as conn:
-        rows = conn.execute(
+    async def compute(conn):
+        rows = row_dicts(await conn.execute(
             select(
                 etl_runs.c.run_id,
                 etl_runs.c.source,
@@ -258,110 +871,235 @@ def list_runs(
             )
             .order_by(etl_runs.c.started_at.desc())
             .limit(limit)
-        ).mappings().all()
+        ))
+        return {"runs": rows}
 
-    return {
-        "runs": list(rows),
-        "request_id": request_id,
-        "api_latency_ms": int((time.time() - start) * 1000),
-    }
+    payload, etag = await cached_payload(
+        request, engine, cache_key("/runs", limit=limit), compute
+    )
+    if payload is None:
+        return _not_modified(etag)
+
+    return FastJSONResponse(
+        {
+            **payload,
+            "request_id": request_id,
+            "api_latency_ms": int((time.time() - start) * 1000),
+        },
+        headers=validator_headers(etag),
+    )
 
 
 
-@router.get("/compare-runs")
-def compare_runs(engine=Depends(get_engine)):
+@router.get(
+    "/transform-failures",
+    response_class=FastJSONResponse,
+    dependencies=[Depends(admit(runs_limiter))],
+)
+async def list_transform_failures(
+    run_id: Optional[uuid.UUID] = None,
+    limit: int = Query(20, ge=1, le=100),
+    engine=Depends(get_async_engine),
+):
     start = time.time()
     request_id = str(uuid.uuid4())
-    anomalies = []
+    s = transform_failure_summaries
 
-    with engine.connect() as conn:
-        sources = conn.execute(
-            select(etl_runs.c.source).distinct()
-        ).scalars().all()
+    async with engine.connect() as conn:
+        if run_id:
+            rows = row_dicts(await conn.execute(
+                select(
+                    s.c.fingerprint,
+                    s.c.source,
+                    s.c.raw_table,
+                    s.c.error_type,
+                    s.c.normalized_error,
+                    s.c.failure_count,
+                    s.c.sampled_count,
+                    s.c.first_failed_at,
+                    s.c.last_failed_at,
+                )
+                .where(s.c.run_id == run_id)
+                .order_by(s.c.failure_count.desc())
+                .limit(limit)
+            ))
+
+            result = {"run_id": run_id, "fingerprints": rows}
+        else:
+            rows = row_dicts(await conn.execute(
+                select(
+                    s.c.run_id,
+                    func.sum(s.c.failure_count).label("failure_count"),
+                    func.count().label("fingerprint_count"),
+                    func.max(s.c.last_failed_at).label("last_failed_at"),
+                )
+                .group_by(s.c.run_id)
+                .order_by(func.max(s.c.last_failed_at).desc())
+                .limit(limit)
+            ))
 
-        for source in sources:
-            expectations = SOURCE_EXPECTATIONS.get(
-                source,
-                {"expects_records": True},
-            )
+            result = {"runs": rows}
+
+    return FastJSONResponse({
+        **result,
+        "request_id": request_id,
+        "api_latency_ms": int((time.time() - start) * 1000),
+    })
+
+
+@router.get(
+    "/compare-runs",
+    response_class=FastJSONResponse,
+    dependencies=[Depends(admit(runs_limiter))],
+)
+async def compare_runs(
+    request: Request,
+    engine=Depends(get_async_engine),
+    duration_factor: float = Query(COMPARE_DURATION_FACTOR, gt=1),
+    records_factor: float = Query(COMPARE_RECORDS_FACTOR, gt=0, lt=1),
+    zscore: float = Query(COMPARE_ZSCORE, gt=0),
+):
+    start = time.time()
+    request_id = str(uuid.uuid4())
+    key = cache_key(
+        "/compare-runs",
+        duration_factor=duration_factor,
+        records_factor=records_factor,
+        zscore=zscore,
+    )
 
-            recent_run = conn.execute(
-                select(etl_runs)
-                .where(etl_runs.c.source == source)
-                .order_by(etl_runs.c.started_at.desc())
-                .limit(1)
-            ).mappings().first()
+    async def compute(conn):
+        anomalies = await _detect_anomalies(
+            conn,
+            duration_factor=duration_factor,
+            records_factor=records_factor,
+            zscore=zscore,
+        )
+        return {"anomalies": anomalies}
 
-            if not recent_run:
-                continue
+    payload, etag = await cached_payload(request, engine, key, compute)
+    if payload is None:
+        return _not_modified(etag)
 
-            baseline = conn.execute(
-                select(
-                    func.avg(etl_runs.c.duration_ms).label("avg_duration"),
-                    func.avg(etl_runs.c.records_processed).label("avg_records"),
-                )
-                .where(
-                    etl_runs.c.source == source,
-                    etl_runs.c.status == "success",
-                )
-            ).mappings().first()
+    return FastJSONResponse(
+        {
+            **payload,
+            "request_id": request_id,
+            "api_latency_ms": int((time.time() - start) * 1000),
+        },
+        headers=validator_headers(etag),
+    )
 
-            if not baseline:
-                continue
 
-            avg_duration = float(baseline["avg_duration"])
-            avg_records = float(baseline["avg_records"] or 0)
+def _zscore(z, baseline_runs):
+    """The run's stored z-score, once the EWMA had enough runs to settle."""
+    if z is None or (baseline_runs or 0) < COMPARE_MIN_RUNS:
+        return None
+    return z
 
-            if recent_run["status"] == "failed":
-                anomalies.append(
-                    {
-                        "source": source,
-                        "run_id": recent_run["run_id"],
-                        "type": "run_failed",
-                        "message": "Latest run failed",
-                    }
+
+async def _detect_anomalies(conn, *, duration_factor, records_factor, zscore):
+    """
+    Latest run per source against the baselines its source had before the
+    run (stored on etl_runs by mark_success).
+    """
+    s = etl_source_stats
+    anomalies = []
+
+    rows = (await conn.execute(
+        select(
+            s.c.source,
+            etl_runs.c.run_id,
+            etl_runs.c.status,
+            etl_runs.c.duration_ms,
+            etl_runs.c.records_processed,
+            etl_runs.c.duration_zscore,
+            etl_runs.c.records_zscore,
+            etl_runs.c.baseline_duration_ms,
+            etl_runs.c.baseline_records,
+            etl_runs.c.baseline_runs,
+        )
+        .select_from(s.join(etl_runs, etl_runs.c.run_id == s.c.last_run_id))
+        .order_by(s.c.source)
+    )).mappings().all()
+
+    for row in rows:
+        source = row["source"]
+        expectations = SOURCE_EXPECTATIONS.get(
+            source,
+            {"expects_records": True},
+        )
+
+        if row["status"] == "failed":
+            anomalies.append(
+                {
+                    "source": source,
+                    "run_id": row["run_id"],
+                    "type": "run_failed",
+                    "message": "Latest run failed",
+                }
+            )
+
+        duration = row["duration_ms"]
+        avg_duration = row["baseline_duration_ms"]
+
+        if duration is not None and avg_duration:
+            z = _zscore(row["duration_zscore"], row["baseline_runs"])
+
+            if duration > duration_factor * avg_duration:
+                message = (
+                    f"Run duration exceeded {duration_factor:g}x recent average"
                 )
+            elif z is not None and z > zscore:
+                message = f"Run duration {z:.1f} standard deviations above EWMA"
+            else:
+                message = None
 
-            if (
-                avg_duration is not None
-                and recent_run["duration_ms"] is not None
-                and recent_run["duration_ms"] > 2 * avg_duration
-            ):
+            if message:
                 anomalies.append(
                     {
                         "source": source,
-                        "run_id": recent_run["run_id"],
+                        "run_id": row["run_id"],
                         "type": "duration_spike",
                         "baseline": int(avg_duration),
-                        "current": recent_run["duration_ms"],
-                        "message": "Run duration exceeded 2x historical average",
+                        "current": duration,
+                        "zscore": z,
+                        "message": message,
                     }
                 )
 
-            if (
-                expectations["expects_records"]
-                and avg_records is not None
-                and avg_records > 0
-                and recent_run["records_processed"] is not None
-                and float(recent_run["records_processed"]) < (0.5 * avg_records)
+        records = row["records_processed"]
+        avg_records = row["baseline_records"]
 
-            ):
+        if expectations["expects_records"] and records is not None and avg_records:
+            z = _zscore(row["records_zscore"], row["baseline_runs"])
+
+            if records < records_factor * avg_records:
+                message = (
+                    f"Records processed dropped below "
+                    f"{records_factor:.0%} of recent average"
+                )
+            elif z is not None and z < -zscore:
+                message = (
+                    f"Records processed {-z:.1f} standard deviations below EWMA"
+                )
+            else:
+                message = None
+
+            if message:
                 anomalies.append(
                     {
                         "source": source,
-                        "run_id": recent_run["run_id"],
+                        "run_id": row["run_id"],
                         "type": "record_drop",
                         "baseline": int(avg_records),
-                        "current": recent_run["records_processed"],
-                        "message": "Records processed dropped below 50% of baseline",
+                        "current": records,
+                        "zscore": z,
+                        "message": message,
                     }
                 )
 
-    return {
-        "anomalies": anomalies,
-        "request_id": request_id,
-        "api_latency_ms": int((time.time() - start) * 1000),
-    }
+    return anomalies
 
 #to be implemented
 @router.get("/metrics")
@@ -372,5 +1110,16 @@ def metrics():
     )
 
 
-app = FastAPI(title="Kasparro Backend")
+@asynccontextmanager
+async def lifespan(app):
+    refresher = asyncio.create_task(health_snapshot.run(get_async_engine()))
+    yield
+    refresher.cancel()
+    with suppress(asyncio.CancelledError):
+        await refresher
+    await price_broadcaster.stop()
+    await dispose_async_engine()
+
+
+app = FastAPI(title="Kasparro Backend", lifespan=lifespan)
 app.include_router(router)
\ No newline at end of file
@@ -0,0 +1,56 @@
+import os
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy.engine import RowMapping
+
+# How NUMERIC columns reach clients: "float" (JSON numbers, as
+# jsonable_encoder produced) or "string" (the exact database value).
+API_DECIMAL_MODE = os.getenv("API_DECIMAL_MODE", "float")
+
+
+def row_dicts(result):
+    """
+    Plain dicts from a Result. Much cheaper than RowMapping access, and
+    the keys are plain str, which orjson requires.
+    """
+    keys = [str(k) for k in result.keys()]
+    return [dict(zip(keys, row)) for row in result]
+
+
+def _encoder(decimal_mode):
+    if decimal_mode == "float":
+        encode_decimal = float
+    elif decimal_mode == "string":
+        encode_decimal = str
+    else:
+        raise ValueError(f"unknown API_DECIMAL_MODE: {decimal_mode}")
+
+    def default(obj):
+        if isinstance(obj, Decimal):
+            return encode_decimal(obj)
+        if isinstance(obj, RowMapping):
+            # Keys are quoted_name (a str subclass), which orjson rejects.
+            return {str(k): v for k, v in obj.items()}
+        raise TypeError(f"not JSON serializable: {type(obj).__name__}")
+
+    return default
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Serializes rows, Decimals, datetimes and UUIDs directly with orjson.
+    Routes return it themselves: a returned Response skips FastAPI's
+    jsonable_encoder pass over every value.
+    """
+
+    _default = staticmethod(_encoder(API_DECIMAL_MODE))
+
+    def render(self, content):
+        return orjson.dumps(content, default=self._default)
+
+
+def dumps(content):
+    """orjson bytes with the same type handling as FastJSONResponse."""
+    return orjson.dumps(content, default=FastJSONResponse._default)
@@ -0,0 +1,210 @@
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
+from sqlalchemy import select, func
+
+from app.core.events import PRICES_CHANNEL
+from app.schemas.tables import assets, asset_latest_market_data
+from app.api.responses import row_dicts, dumps
+
+logger = logging.getLogger(__name__)
+
+# Re-check for changes this often even without a notification (missed
+# NOTIFYs while reconnecting, or databases without LISTEN).
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "30"))
+# Comment line sent to idle clients so proxies keep the connection open.
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+# Undelivered batches kept per client; a slow client loses the oldest.
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "16"))
+# Rows per SSE event.
+STREAM_BATCH_ROWS = int(os.getenv("STREAM_BATCH_ROWS", "1000"))
+
+
+# high_water before the first refresh: nothing read yet.
+_UNSET = object()
+
+
+class PriceBroadcaster:
+    """
+    One per API process. Waits for PRICES_CHANNEL notifications, reads the
+    rows of asset_latest_market_data changed since the last batch once,
+    and fans the batch out to every subscriber's queue. Database load does
+    not depend on how many clients are connected.
+
+    Changes are tracked by the data_generation each write stamps on its
+    rows. Generations are handed out under a row lock held until commit,
+    so they become visible in increasing order; wall-clock updated_at is
+    assigned before commit and would skip rows of writers that commit
+    out of order.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._task = None
+        self._wakeup = None
+        self.high_water = _UNSET
+
+    def subscribe(self, engine):
+        # A task from another event loop (test clients, reloads) is dead.
+        if (
+            self._task is None
+            or self._task.done()
+            or self._task.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._task = asyncio.create_task(self.run(engine))
+
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, batch):
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(batch)
+
+    async def changes(self, conn):
+        """Rows written since the high-water generation, oldest first."""
+        latest = asset_latest_market_data
+
+        if self.high_water is _UNSET:
+            # First refresh: start from now, don't replay history. None
+            # (nothing written yet) makes the next refresh emit everything.
+            self.high_water = (await conn.execute(
+                select(func.max(latest.c.generation))
+            )).scalar()
+            return []
+
+        stmt = (
+            select(
+                assets.c.symbol,
+                latest.c.source,
+                latest.c.price_usd,
+                latest.c.last_updated,
+                latest.c.generation,
+            )
+            .select_from(latest.join(assets, assets.c.asset_id == latest.c.asset_id))
+            .order_by(latest.c.generation, assets.c.symbol, latest.c.source)
+        )
+        if self.high_water is not None:
+            stmt = stmt.where(latest.c.generation > self.high_water)
+
+        rows = row_dicts(await conn.execute(stmt))
+
+        if rows:
+            self.high_water = rows[-1]["generation"]
+        return rows
+
+    async def refresh(self, engine):
+        async with engine.connect() as conn:
+            rows = await self.changes(conn)
+
+        for i in range(0, len(rows), STREAM_BATCH_ROWS):
+            chunk = rows[i:i + STREAM_BATCH_ROWS]
+            self.publish(
+                {
+                    "id": str(chunk[-1]["generation"]),
+                    "rows": [
+                        {
+                            "symbol": r["symbol"],
+                            "source": r["source"],
+                            "price_usd": r["price_usd"],
+                            "last_updated": r["last_updated"],
+                        }
+                        for r in chunk
+                    ],
+                }
+            )
+
+    def _on_notify(self, *args):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @asynccontextmanager
+    async def _listening(self, engine):
+        """
+        Hold one connection in LISTEN on PRICES_CHANNEL. Databases without
+        LISTEN (tests on SQLite) are polled only.
+        """
+        if engine.dialect.name != "postgresql":
+            yield
+            return
+
+        async with engine.connect() as conn:
+            driver = (await conn.get_raw_connection()).driver_connection
+            await driver.add_listener(PRICES_CHANNEL, self._on_notify)
+            try:
+                yield
+            finally:
+                # The connection goes back to the pool; it must not keep
+                # listening (and calling us) for its next user.
+                with suppress(Exception):
+                    await driver.remove_listener(PRICES_CHANNEL, self._on_notify)
+
+    async def _wait(self):
+        # Several NOTIFYs during one refresh collapse into one read.
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                self._wakeup.wait(),
+                timeout=STREAM_POLL_SECONDS,
+            )
+        self._wakeup.clear()
+
+    async def run(self, engine):
+        self._wakeup = asyncio.Event()
+
+        while True:
+            try:
+                async with self._listening(engine):
+                    while True:
+                        await self.refresh(engine)
+                        await self._wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[STREAM] refresh failed")
+                await self._wait()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+def format_event(batch):
+    return (
+        f"event: prices\nid: {batch['id']}\n".encode()
+        + b"data: " + dumps(batch["rows"]) + b"\n\n"
+    )
+
+
+async def event_stream(request, queue, *, symbols=None):
+    yield b": connected\n\n"
+
+    while not await request.is_disconnected():
+        try:
+            batch = await asyncio.wait_for(
+                queue.get(),
+                timeout=STREAM_HEARTBEAT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            yield b": keepalive\n\n"
+            continue
+
+        if symbols:
+            rows = [r for r in batch["rows"] if r["symbol"] in symbols]
+            if not rows:
+                continue
+            batch = {**batch, "rows": rows}
+
+        yield format_event(batch)
+
+
+price_broadcaster = PriceBroadcaster()
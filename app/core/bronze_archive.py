@@ -0,0 +1,251 @@
+import os
+import json
+import uuid
+from decimal import Decimal
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Raw rows older than the retention window live in zstd-compressed Parquet
+# segments under BRONZE_ARCHIVE_DIR, one directory per table and month:
+#
+#   <dir>/<raw_table>/month=YYYY-MM/<raw_table>-<start>-<id>.parquet
+#   <dir>/manifest.json
+#
+# Segments are immutable. manifest.json lists every segment with its
+# ingested_at bounds and row count and is replaced atomically.
+
+BRONZE_ARCHIVE_DIR = os.getenv("BRONZE_ARCHIVE_DIR", "data/archive")
+MANIFEST_NAME = "manifest.json"
+
+ARCHIVE_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("source_id", pa.string()),
+        ("payload", pa.string()),
+        ("payload_hash", pa.binary()),
+        ("ingested_at", pa.timestamp("us", tz="UTC")),
+        ("symbol", pa.string()),
+        ("name", pa.string()),
+        # NUMERIC is unbounded; keep the exact decimal text.
+        ("price_usd", pa.string()),
+        ("market_cap_usd", pa.string()),
+        ("volume_24h_usd", pa.string()),
+        ("source_updated_at", pa.timestamp("us", tz="UTC")),
+    ]
+)
+
+_DECIMAL_FIELDS = ("price_usd", "market_cap_usd", "volume_24h_usd")
+
+
+def as_utc(ts):
+    if ts is not None and ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def _ts(value):
+    return pa.scalar(as_utc(value), ARCHIVE_SCHEMA.field("ingested_at").type)
+
+
+# ---------------- MANIFEST ----------------
+
+def load_manifest(archive_dir=None):
+    path = os.path.join(archive_dir or BRONZE_ARCHIVE_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"segments": []}
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, archive_dir=None):
+    archive_dir = archive_dir or BRONZE_ARCHIVE_DIR
+    os.makedirs(archive_dir, exist_ok=True)
+
+    path = os.path.join(archive_dir, MANIFEST_NAME)
+    tmp = f"{path}.tmp"
+
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp, path)
+
+
+def segments_for(table_name, start=None, end=None, *, archive_dir=None):
+    """Manifest entries of `table_name` overlapping [start, end)."""
+    result = []
+
+    for seg in load_manifest(archive_dir)["segments"]:
+        if seg["table"] != table_name:
+            continue
+
+        seg_min = datetime.fromisoformat(seg["min_ingested_at"])
+        seg_max = datetime.fromisoformat(seg["max_ingested_at"])
+
+        if start is not None and seg_max < as_utc(start):
+            continue
+        if end is not None and seg_min >= as_utc(end):
+            continue
+
+        result.append(seg)
+
+    return result
+
+
+# ---------------- WRITE ----------------
+
+def write_segment(table_name, rows, *, archive_dir=None):
+    """
+    Write rows (raw table mappings) to a new segment. Returns its manifest
+    entry; the caller adds it to the manifest once the file is durable.
+    """
+    archive_dir = archive_dir or BRONZE_ARCHIVE_DIR
+
+    columns = {field.name: [] for field in ARCHIVE_SCHEMA}
+    for row in rows:
+        columns["id"].append(str(row["id"]))
+        columns["source_id"].append(row["source_id"])
+        columns["payload"].append(json.dumps(row["payload"], sort_keys=True))
+        columns["payload_hash"].append(bytes(row["payload_hash"]))
+        columns["ingested_at"].append(as_utc(row["ingested_at"]))
+        columns["symbol"].append(row["symbol"])
+        columns["name"].append(row["name"])
+        for field in _DECIMAL_FIELDS:
+            value = row[field]
+            columns[field].append(None if value is None else str(value))
+        columns["source_updated_at"].append(as_utc(row["source_updated_at"]))
+
+    table = pa.table(columns, schema=ARCHIVE_SCHEMA)
+
+    min_ts = min(columns["ingested_at"])
+    max_ts = max(columns["ingested_at"])
+
+    rel_path = os.path.join(
+        table_name,
+        f"month={min_ts:%Y-%m}",
+        f"{table_name}-{min_ts:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.parquet",
+    )
+    path = os.path.join(archive_dir, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    pq.write_table(table, path, compression="zstd")
+
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+    return {
+        "table": table_name,
+        "path": rel_path,
+        "rows": table.num_rows,
+        "bytes": os.path.getsize(path),
+        "min_ingested_at": min_ts.isoformat(),
+        "max_ingested_at": max_ts.isoformat(),
+        "archived_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+# ---------------- READ ----------------
+
+def _to_row(record):
+    row = dict(record)
+    row["id"] = uuid.UUID(row["id"])
+    row["payload"] = json.loads(row["payload"])
+    for field in _DECIMAL_FIELDS:
+        if row[field] is not None:
+            row[field] = Decimal(row[field])
+    return row
+
+
+@lru_cache(maxsize=4)
+def _read_segment(path):
+    # Segments are immutable, so a rebuild paging through one segment in
+    # many small batches only decodes it once.
+    return pq.read_table(path).sort_by(
+        [("ingested_at", "ascending"), ("id", "ascending")]
+    )
+
+
+def read_archived_range(
+    table_name,
+    start,
+    end,
+    *,
+    after=None,
+    limit=None,
+    archive_dir=None,
+):
+    """
+    Archived rows with start <= ingested_at < end in (ingested_at, id) order,
+    shaped like the loader's raw rows. `after` and `limit` work like in
+    app.transform.loader.load_raw_range.
+    """
+    archive_dir = archive_dir or BRONZE_ARCHIVE_DIR
+    rows = []
+
+    for seg in segments_for(table_name, start, end, archive_dir=archive_dir):
+        table = _read_segment(os.path.join(archive_dir, seg["path"]))
+        ts = table["ingested_at"]
+
+        mask = pc.and_(
+            pc.greater_equal(ts, _ts(start)),
+            pc.less(ts, _ts(end)),
+        )
+        if after:
+            mask = pc.and_(
+                mask,
+                pc.or_(
+                    pc.greater(ts, _ts(after[0])),
+                    pc.and_(
+                        pc.equal(ts, _ts(after[0])),
+                        pc.greater(table["id"], pa.scalar(str(after[1]))),
+                    ),
+                ),
+            )
+
+        # Segments are sorted, so the first `limit` matches are the ones
+        # this segment can contribute.
+        matched = table.filter(mask)
+        if limit:
+            matched = matched.slice(0, limit)
+
+        rows.extend(_to_row(record) for record in matched.to_pylist())
+
+    rows.sort(key=lambda r: (r["ingested_at"], str(r["id"])))
+    return rows[:limit] if limit else rows
+
+
+def count_archived_rows(table_name, start, end, *, archive_dir=None):
+    archive_dir = archive_dir or BRONZE_ARCHIVE_DIR
+    total = 0
+
+    for seg in segments_for(table_name, start, end, archive_dir=archive_dir):
+        column = pq.read_table(
+            os.path.join(archive_dir, seg["path"]),
+            columns=["ingested_at"],
+        )["ingested_at"]
+        total += pc.sum(
+            pc.and_(
+                pc.greater_equal(column, _ts(start)),
+                pc.less(column, _ts(end)),
+            ).cast(pa.int64())
+        ).as_py() or 0
+
+    return total
+
+
+def archived_bounds(table_name, *, archive_dir=None):
+    """(min, max) ingested_at over all archived segments, or (None, None)."""
+    segs = segments_for(table_name, archive_dir=archive_dir)
+    if not segs:
+        return None, None
+
+    return (
+        min(datetime.fromisoformat(s["min_ingested_at"]) for s in segs),
+        max(datetime.fromisoformat(s["max_ingested_at"]) for s in segs),
+    )
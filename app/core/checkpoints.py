@@ -1,7 +1,15 @@
+import os
+import math
 from datetime import datetime, timezone
 from sqlalchemy import select, insert, update
 from sqlalchemy.engine import Engine
-from app.schemas.tables import etl_checkpoints, etl_runs
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.schemas.tables import (
+    etl_checkpoints,
+    etl_runs,
+    etl_source_stats,
+    data_generation,
+)
 from app.core.metrics import (
     ingestion_runs_total,
     ingestion_records_processed,
@@ -9,6 +17,119 @@ from app.core.metrics import (
     ingestion_last_success_ts,
 )
 
+# Run baselines for /compare-runs: EWMA weight of the newest successful
+# run, and how many recent successful runs the window average covers.
+RUN_BASELINE_ALPHA = float(os.getenv("RUN_BASELINE_ALPHA", "0.2"))
+RUN_BASELINE_WINDOW = int(os.getenv("RUN_BASELINE_WINDOW", "20"))
+
+
+def ewma_update(mean, var, x, alpha):
+    """One step of an exponentially weighted mean and variance."""
+    if mean is None:
+        return float(x), 0.0
+
+    diff = x - mean
+    incr = alpha * diff
+    return mean + incr, (1 - alpha) * ((var or 0.0) + diff * incr)
+
+
+def update_baselines(
+    stats,
+    duration_ms,
+    records,
+    *,
+    alpha=RUN_BASELINE_ALPHA,
+    window=RUN_BASELINE_WINDOW,
+):
+    """
+    New etl_source_stats baseline columns after a successful run. O(1) in
+    the number of runs; the window keeps the last `window` (duration,
+    records) pairs.
+    """
+    stats = stats or {}
+
+    duration_ewma, duration_ewvar = ewma_update(
+        stats.get("duration_ewma"),
+        stats.get("duration_ewvar"),
+        duration_ms,
+        alpha,
+    )
+    records_ewma, records_ewvar = ewma_update(
+        stats.get("records_ewma"),
+        stats.get("records_ewvar"),
+        records,
+        alpha,
+    )
+
+    recent = [*(stats.get("recent_runs") or []), [duration_ms, records]]
+    recent = recent[-window:]
+
+    return {
+        "duration_ewma": duration_ewma,
+        "duration_ewvar": duration_ewvar,
+        "records_ewma": records_ewma,
+        "records_ewvar": records_ewvar,
+        "recent_runs": recent,
+        "window_duration_avg": sum(d for d, _ in recent) / len(recent),
+        "window_records_avg": sum(r for _, r in recent) / len(recent),
+    }
+
+
+def deviation(x, mean, var):
+    """(x - mean) in standard deviations; None while the spread is unknown."""
+    if mean is None or not var:
+        return None
+    return (x - mean) / math.sqrt(var)
+
+
+def run_baseline(stats, duration_ms, records):
+    """
+    etl_runs columns comparing a run with its source's baselines as they
+    were before the run. Folding the run in first would cap the z-score at
+    sqrt((1 - alpha) / alpha), 2.0 for the default alpha.
+    """
+    stats = stats or {}
+
+    return {
+        "duration_zscore": deviation(
+            duration_ms,
+            stats.get("duration_ewma"),
+            stats.get("duration_ewvar"),
+        ),
+        "records_zscore": deviation(
+            records,
+            stats.get("records_ewma"),
+            stats.get("records_ewvar"),
+        ),
+        "baseline_duration_ms": stats.get("window_duration_avg"),
+        "baseline_records": stats.get("window_records_avg"),
+        "baseline_runs": stats.get("success_count") or 0,
+    }
+
+
+def bump_data_generation(conn):
+    """
+    Invalidate API response caches. Called inside the transaction that
+    changes run state or Silver data, so readers never see the new
+    generation before the data it stands for. Returns the new generation.
+
+    The row stays locked until commit, so concurrent writers get their
+    generations in commit order.
+    """
+    stmt = pg_insert(data_generation).values(
+        id=1,
+        generation=1,
+        updated_at=datetime.now(timezone.utc),
+    )
+    return conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                "generation": data_generation.c.generation + 1,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        ).returning(data_generation.c.generation)
+    ).scalar_one()
 
 
 class CheckpointManager:
@@ -63,6 +184,25 @@ class CheckpointManager:
                 )
             )
 
+            stmt = pg_insert(etl_source_stats).values(
+                source=source,
+                last_run_id=run_id,
+                success_count=0,
+                failure_count=0,
+                updated_at=now,
+            )
+            conn.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["source"],
+                    set_={
+                        "last_run_id": stmt.excluded.last_run_id,
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                )
+            )
+
+            bump_data_generation(conn)
+
     def mark_success(
     self,
     source: str,
@@ -84,6 +224,12 @@ class CheckpointManager:
             duration_ms = int((now - started_at).total_seconds() * 1000)
             duration_sec = (now - started_at).total_seconds()
 
+            stats = conn.execute(
+                select(etl_source_stats)
+                .where(etl_source_stats.c.source == source)
+                .with_for_update()
+            ).mappings().first()
+
             conn.execute(
                 update(etl_runs)
                 .where(etl_runs.c.run_id == run_id)
@@ -92,6 +238,7 @@ class CheckpointManager:
                     duration_ms=duration_ms,
                     status="success",
                     records_processed=records_processed,
+                    **run_baseline(stats, duration_ms, records_processed),
                 )
             )
 
@@ -108,6 +255,18 @@ class CheckpointManager:
                 )
             )
 
+            conn.execute(
+                update(etl_source_stats)
+                .where(etl_source_stats.c.source == source)
+                .values(
+                    success_count=etl_source_stats.c.success_count + 1,
+                    updated_at=now,
+                    **update_baselines(stats, duration_ms, records_processed),
+                )
+            )
+
+            bump_data_generation(conn)
+
         ingestion_runs_total.labels(source, "success").inc()
         ingestion_records_processed.labels(source).inc(records_processed)
         ingestion_run_duration.labels(source).observe(duration_sec)
@@ -139,4 +298,15 @@ class CheckpointManager:
                 )
             )
 
+            conn.execute(
+                update(etl_source_stats)
+                .where(etl_source_stats.c.source == source)
+                .values(
+                    failure_count=etl_source_stats.c.failure_count + 1,
+                    updated_at=now,
+                )
+            )
+
+            bump_data_generation(conn)
+
         ingestion_runs_total.labels(source, "failed").inc()
@@ -1,14 +1,32 @@
 import os
 from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+# API connection pool. app.api.admission sizes its route limits from these.
+API_DB_POOL_SIZE = int(os.getenv("API_DB_POOL_SIZE", "10"))
+API_DB_MAX_OVERFLOW = int(os.getenv("API_DB_MAX_OVERFLOW", "10"))
 
 _engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+
+# Async drivers for the sync URLs used by the ETL and migrations.
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
 def build_db_url() -> str:
 
     url = os.getenv("DATABASE_URL")
     return url
 
+def build_async_db_url() -> str:
+    url = make_url(build_db_url())
+    return url.set(drivername=_ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(
+        hide_password=False
+    )
+
 def get_engine() -> Engine:
     url = build_db_url()
 
@@ -20,3 +38,22 @@ def get_engine() -> Engine:
             pool_pre_ping=True,
         )
     return _engine
+
+def get_async_engine() -> AsyncEngine:
+    """Engine for the API. Requests await the database instead of holding a
+    threadpool worker while psycopg2 blocks."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            build_async_db_url(),
+            pool_pre_ping=True,
+            pool_size=API_DB_POOL_SIZE,
+            max_overflow=API_DB_MAX_OVERFLOW,
+        )
+    return _async_engine
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
@@ -0,0 +1,24 @@
+import json
+from sqlalchemy import text
+
+# Postgres channel the transform notifies after writing new prices. The
+# payload is only a wake-up signal; listeners read the changed rows from
+# asset_latest_market_data (NOTIFY payloads are capped at 8000 bytes).
+PRICES_CHANNEL = "market_data_updates"
+
+
+def notify_prices_changed(conn, *, run_id=None):
+    """
+    Queue a notification on PRICES_CHANNEL. Postgres delivers it when the
+    surrounding transaction commits, and drops it if it rolls back.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+
+    conn.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": PRICES_CHANNEL,
+            "payload": json.dumps({"run_id": str(run_id) if run_id else None}),
+        },
+    )
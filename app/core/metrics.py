@@ -41,3 +41,47 @@ transform_run_duration = Histogram(
     "transform_run_duration_seconds",
     "Duration of transform phase"
 )
+
+
+api_cache_lookups_total = Counter(
+    "api_cache_lookups_total",
+    "API response cache lookups",
+    ["route", "result"],  # hit | miss
+)
+
+api_cache_hit_ratio = Gauge(
+    "api_cache_hit_ratio",
+    "API response cache hit ratio since process start",
+    ["route"],
+)
+
+api_cache_entries = Gauge(
+    "api_cache_entries",
+    "Entries held by the API response cache",
+)
+
+
+api_admission_in_flight = Gauge(
+    "api_admission_in_flight",
+    "Requests holding an admission slot",
+    ["route_group"],
+)
+
+api_admission_queue_depth = Gauge(
+    "api_admission_queue_depth",
+    "Requests waiting for an admission slot",
+    ["route_group"],
+)
+
+api_admission_wait_seconds = Histogram(
+    "api_admission_wait_seconds",
+    "Time spent waiting for an admission slot",
+    ["route_group"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+api_admission_rejected_total = Counter(
+    "api_admission_rejected_total",
+    "Requests shed with 503 by admission control",
+    ["route_group", "reason"],  # queue_full | timeout
+)
@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 from sqlalchemy import insert, select
 from app.core.checkpoints import CheckpointManager
 from app.schemas.tables import raw_coingecko
+from app.ingestion.hot_fields import extract_hot_fields
 from app.core.http import RateLimitedSession
 
 
@@ -18,10 +19,10 @@ cg_http = RateLimitedSession(
     max_retries=3,
 )
 
-def _hash_payload(payload: dict) -> str:
+def _hash_payload(payload: dict) -> bytes:
     return hashlib.sha256(
         json.dumps(payload, sort_keys=True).encode()
-    ).hexdigest()
+    ).digest()
 
 
 def ingest_coingecko(engine):
@@ -68,7 +69,8 @@ def ingest_coingecko(engine):
 
                 exists = conn.execute(
                     select(raw_coingecko.c.id).where(
-                        raw_coingecko.c.payload_hash == payload_hash
+                        raw_coingecko.c.source_id == item["id"],
+                        raw_coingecko.c.payload_hash == payload_hash,
                     )
                 ).first()
 
@@ -81,6 +83,7 @@ def ingest_coingecko(engine):
                         payload=item,
                         payload_hash=payload_hash,
                         ingested_at=datetime.now(timezone.utc),
+                        **extract_hot_fields("coingecko", item),
                     )
                 )
 
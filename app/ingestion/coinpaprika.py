@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from sqlalchemy import insert, select
 from app.core.checkpoints import CheckpointManager
 from app.schemas.tables import raw_coinpaprika
+from app.ingestion.hot_fields import extract_hot_fields
 from app.core.http import RateLimitedSession
 
 source = "coinpaprika_tickers"
@@ -15,10 +16,10 @@ cp_http = RateLimitedSession(
 )
 
 
-def _hash_payload(payload: dict) -> str:
+def _hash_payload(payload: dict) -> bytes:
     return hashlib.sha256(
         json.dumps(payload, sort_keys=True).encode()
-    ).hexdigest()
+    ).digest()
 
 
 def ingest_coinpaprika(engine):
@@ -63,7 +64,8 @@ def ingest_coinpaprika(engine):
 
                 exists = conn.execute(
                     select(raw_coinpaprika.c.id).where(
-                        raw_coinpaprika.c.payload_hash == payload_hash
+                        raw_coinpaprika.c.source_id == coin_id,
+                        raw_coinpaprika.c.payload_hash == payload_hash,
                     )
                 ).first()
 
@@ -76,6 +78,7 @@ def ingest_coinpaprika(engine):
                         payload=ticker,
                         payload_hash=payload_hash,
                         ingested_at=datetime.now(timezone.utc),
+                        **extract_hot_fields("coinpaprika", ticker),
                     )
                 )
 
@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 from sqlalchemy import insert, select
 from app.core.checkpoints import CheckpointManager
 from app.schemas.tables import raw_csv
+from app.ingestion.hot_fields import extract_hot_fields
 from app.core.http import RateLimitedSession
 
 source = "csv_market_data"
@@ -19,10 +20,10 @@ csv_http = RateLimitedSession(
 CSV_URL = "https://raw.githubusercontent.com/shuraih775/kasparro-backend-Mohammed-Shuraih-Shaikh/refs/heads/master/data/market_data.csv"
 
 
-def _hash_payload(payload: dict) -> str:
+def _hash_payload(payload: dict) -> bytes:
     return hashlib.sha256(
         json.dumps(payload, sort_keys=True).encode()
-    ).hexdigest()
+    ).digest()
 
 
 def ingest_csv(engine):
@@ -60,7 +61,8 @@ def ingest_csv(engine):
 
                 exists = conn.execute(
                     select(raw_csv.c.id).where(
-                        raw_csv.c.payload_hash == payload_hash
+                        raw_csv.c.source_id == row["Symbol"],
+                        raw_csv.c.payload_hash == payload_hash,
                     )
                 ).first()
 
@@ -73,6 +75,7 @@ def ingest_csv(engine):
                         payload=row,
                         payload_hash=payload_hash,
                         ingested_at=datetime.now(timezone.utc),
+                        **extract_hot_fields("csv", row),
                     )
                 )
 
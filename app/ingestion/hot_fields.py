@@ -0,0 +1,35 @@
+from decimal import Decimal, InvalidOperation
+from app.transform.transformer import PARSERS
+
+HOT_FIELDS = (
+    "symbol",
+    "name",
+    "price_usd",
+    "market_cap_usd",
+    "volume_24h_usd",
+    "source_updated_at",
+)
+
+_EMPTY = dict.fromkeys(HOT_FIELDS)
+
+
+def extract_hot_fields(source, payload):
+    """
+    Typed column values for a raw row, using the transform's own parser so
+    both read the same values. Ingestion never rejects data: if any field
+    is missing or malformed, every hot field is left NULL and the transform
+    reads the payload instead.
+    """
+    try:
+        parsed = PARSERS[source]({"payload": payload})
+
+        return {
+            "symbol": parsed["symbol"],
+            "name": parsed["name"],
+            "price_usd": Decimal(parsed["price_usd"]),
+            "market_cap_usd": Decimal(parsed["market_cap_usd"]),
+            "volume_24h_usd": Decimal(parsed["volume_24h_usd"]),
+            "source_updated_at": parsed["last_updated"],
+        }
+    except (KeyError, TypeError, ValueError, AttributeError, InvalidOperation):
+        return dict(_EMPTY)
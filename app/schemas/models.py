@@ -16,3 +16,15 @@ class AssetMarketData(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(extra="forbid")
+
+
+class DataBatchRequest(BaseModel):
+    """Body of POST /data/batch."""
+
+    symbols: list[str] = Field(min_length=1, max_length=200)
+    sources: list[str] | None = Field(default=None, min_length=1)
+
+    from_ts: datetime | None = None
+    to_ts: datetime | None = None
+
+    model_config = ConfigDict(extra="forbid")
@@ -7,15 +7,22 @@ from sqlalchemy import (
     TIMESTAMP,
     NUMERIC,
     Integer,
+    BigInteger,
+    Float,
+    LargeBinary,
     MetaData,
     ForeignKey,
     UniqueConstraint,
+    Index,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from datetime import datetime,timezone
 
 metadata = MetaData()
 
+# Binary JSON in Postgres: parsed once on write, no re-parse on read.
+RawPayload = JSON().with_variant(JSONB(), "postgresql")
+
 # ---------- RAW TABLES ----------
 
 def create_raw_table(name):
@@ -24,20 +31,39 @@ def create_raw_table(name):
         metadata,
         Column("id", UUID(as_uuid=True), primary_key=True, default=uuid.uuid4),
         Column("source_id", Text, nullable=False),
-        Column("payload", JSON, nullable=False),
-        Column("payload_hash", Text, nullable=False, index=True),
+        Column("payload", RawPayload, nullable=False),
+        # sha256 digest of the canonical payload JSON (32 bytes). Dedupe
+        # lookups go through the (source_id, payload_hash) unique index.
+        Column("payload_hash", LargeBinary(32), nullable=False),
         Column("ingested_at", TIMESTAMP(timezone=True), nullable=False),
+        # Hot fields extracted from payload at ingest time. All NULL when
+        # the payload could not be parsed; transforms then fall back to it.
+        Column("symbol", Text, index=True),
+        Column("name", Text),
+        Column("price_usd", NUMERIC),
+        Column("market_cap_usd", NUMERIC),
+        Column("volume_24h_usd", NUMERIC),
+        Column("source_updated_at", TIMESTAMP(timezone=True), index=True),
         UniqueConstraint(
             "source_id",
             "payload_hash",
             name=f"uq_{name}_source_payload",
         ),
+        # Rows arrive in ingested_at order, so a BRIN index stays tiny and
+        # still narrows the loader's ingested_at range scans.
+        Index(
+            f"ix_{name}_ingested_at_brin",
+            "ingested_at",
+            postgresql_using="brin",
+        ),
     )
 
 raw_coinpaprika = create_raw_table("raw_coinpaprika")
 raw_coingecko = create_raw_table("raw_coingecko")
 raw_csv = create_raw_table("raw_csv")
 
+RAW_TABLES = {t.name: t for t in (raw_coinpaprika, raw_coingecko, raw_csv)}
+
 # ---------- NORMALIZED TABLES ----------
 
 assets = Table(
@@ -64,6 +90,9 @@ asset_sources = Table(
     ),
 )
 
+# Range-partitioned by month on last_updated in Postgres (see
+# app.services.partition_maintenance), so the partition key is part of the
+# primary key.
 asset_market_data = Table(
     "asset_market_data",
     metadata,
@@ -73,7 +102,7 @@ asset_market_data = Table(
     Column("price_usd", NUMERIC),
     Column("market_cap_usd", NUMERIC),
     Column("volume_24h_usd", NUMERIC),
-    Column("last_updated", TIMESTAMP(timezone=True), nullable=False),
+    Column("last_updated", TIMESTAMP(timezone=True), primary_key=True),
     Column("created_at", TIMESTAMP(timezone=True), nullable=False),
     UniqueConstraint(
         "asset_id",
@@ -81,6 +110,69 @@ asset_market_data = Table(
         "last_updated",
         name="uq_asset_market_source_time",
     ),
+    postgresql_partition_by="RANGE (last_updated)",
+)
+
+# Latest observation per (asset_id, source), maintained by the transform
+# alongside asset_market_data so /data does not aggregate over history.
+asset_latest_market_data = Table(
+    "asset_latest_market_data",
+    metadata,
+    Column("asset_id", UUID(as_uuid=True), ForeignKey("assets.asset_id", ondelete="CASCADE"), primary_key=True),
+    Column("source", Text, primary_key=True),
+    Column("price_usd", NUMERIC),
+    Column("market_cap_usd", NUMERIC),
+    Column("volume_24h_usd", NUMERIC),
+    Column("last_updated", TIMESTAMP(timezone=True), nullable=False, index=True),
+    Column("updated_at", TIMESTAMP(timezone=True), nullable=False),
+    # data_generation of the write; increases in commit order (/stream/prices).
+    Column("generation", BigInteger, index=True),
+)
+
+# ---------- ROLLUP TABLES ----------
+
+# OHLC candles per (asset_id, source) and bucket, recomputed by the transform
+# for every bucket a run wrote points into (app.transform.candles).
+def create_candle_table(name):
+    return Table(
+        name,
+        metadata,
+        Column("asset_id", UUID(as_uuid=True), ForeignKey("assets.asset_id", ondelete="CASCADE"), primary_key=True),
+        Column("source", Text, primary_key=True),
+        Column("bucket_start", TIMESTAMP(timezone=True), primary_key=True),
+        Column("open_usd", NUMERIC, nullable=False),
+        Column("high_usd", NUMERIC, nullable=False),
+        Column("low_usd", NUMERIC, nullable=False),
+        Column("close_usd", NUMERIC, nullable=False),
+        # Sources report rolling 24h volume, not per-trade volume; this is
+        # the value at the bucket's last observation.
+        Column("volume_24h_usd", NUMERIC),
+        Column("points", Integer, nullable=False),
+        Column("first_at", TIMESTAMP(timezone=True), nullable=False),
+        Column("last_at", TIMESTAMP(timezone=True), nullable=False),
+        Column("updated_at", TIMESTAMP(timezone=True), nullable=False),
+    )
+
+asset_candles_1h = create_candle_table("asset_candles_1h")
+asset_candles_1d = create_candle_table("asset_candles_1d")
+
+CANDLE_TABLES = {"1h": asset_candles_1h, "1d": asset_candles_1d}
+
+# Cross-source consensus per asset over asset_latest_market_data,
+# recomputed for the assets a run touched (app.transform.consensus).
+asset_consensus_prices = Table(
+    "asset_consensus_prices",
+    metadata,
+    Column("asset_id", UUID(as_uuid=True), ForeignKey("assets.asset_id", ondelete="CASCADE"), primary_key=True),
+    Column("median_price_usd", NUMERIC, nullable=False),
+    Column("mean_price_usd", NUMERIC, nullable=False),
+    Column("min_price_usd", NUMERIC, nullable=False),
+    Column("max_price_usd", NUMERIC, nullable=False),
+    Column("spread_pct", NUMERIC, nullable=False),  # (max - min) / median * 100
+    Column("source_count", Integer, nullable=False),
+    Column("sources", JSON, nullable=False),
+    Column("freshest_at", TIMESTAMP(timezone=True), nullable=False),
+    Column("updated_at", TIMESTAMP(timezone=True), nullable=False),
 )
 
 # ---------- ETL STATE TABLES ----------
@@ -110,6 +202,50 @@ etl_runs = Table(
     Column("error_message", Text),
     Column("metadata", JSON),
     Column("triggered_by", Text),  # manual | cron | retry
+    # Set by mark_success from the source's baselines before this run.
+    Column("duration_zscore", Float),
+    Column("records_zscore", Float),
+    Column("baseline_duration_ms", Float),
+    Column("baseline_records", Float),
+    Column("baseline_runs", Integer),
+)
+
+# Latest run per source (/stats, /runs).
+Index(
+    "ix_etl_runs_source_started_at",
+    etl_runs.c.source,
+    etl_runs.c.started_at.desc(),
+)
+
+# Per-source run counters and last-run pointer, maintained by
+# CheckpointManager in the same transaction as etl_runs (/stats).
+etl_source_stats = Table(
+    "etl_source_stats",
+    metadata,
+    Column("source", Text, primary_key=True),
+    Column("last_run_id", UUID(as_uuid=True), ForeignKey("etl_runs.run_id")),
+    Column("success_count", Integer, nullable=False, default=0),
+    Column("failure_count", Integer, nullable=False, default=0),
+    # Baselines over successful runs (/compare-runs), see
+    # app.core.checkpoints.update_baselines.
+    Column("duration_ewma", Float),
+    Column("duration_ewvar", Float),
+    Column("records_ewma", Float),
+    Column("records_ewvar", Float),
+    Column("window_duration_avg", Float),
+    Column("window_records_avg", Float),
+    Column("recent_runs", JSON),  # [[duration_ms, records], ...] oldest first
+    Column("updated_at", TIMESTAMP(timezone=True), nullable=False),
+)
+
+# Single row (id = 1), bumped whenever a run changes what the API serves.
+# The API keys its response cache on this counter.
+data_generation = Table(
+    "data_generation",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("generation", BigInteger, nullable=False),
+    Column("updated_at", TIMESTAMP(timezone=True), nullable=False),
 )
 
 # ---------- SCHEMA DRIFT EVENTS ----------
@@ -143,5 +279,23 @@ transform_failures = Table(
     Column("error_type", Text, nullable=False),
     Column("error_message", Text, nullable=False),
     Column("payload", JSON),
+    Column("fingerprint", Text, index=True),
+)
+
+# One row per (transform run, failure fingerprint). transform_failures only
+# keeps the first few sampled payloads of each fingerprint.
+transform_failure_summaries = Table(
+    "transform_failure_summaries",
+    metadata,
+    Column("run_id", UUID(as_uuid=True), primary_key=True),
+    Column("fingerprint", Text, primary_key=True),
+    Column("source", Text, nullable=False),
+    Column("raw_table", Text, nullable=False),
+    Column("error_type", Text, nullable=False),
+    Column("normalized_error", Text, nullable=False),
+    Column("failure_count", Integer, nullable=False),
+    Column("sampled_count", Integer, nullable=False),
+    Column("first_failed_at", TIMESTAMP(timezone=True), nullable=False),
+    Column("last_failed_at", TIMESTAMP(timezone=True), nullable=False),
 )
 
@@ -0,0 +1,163 @@
+from app.core.logging import setup_logging
+import os
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+from sqlalchemy import select, delete, func
+
+from app.core.bronze_archive import (
+    BRONZE_ARCHIVE_DIR,
+    as_utc,
+    load_manifest,
+    save_manifest,
+    write_segment,
+)
+from app.schemas.tables import RAW_TABLES
+from app.services.partition_maintenance import month_start, add_months
+
+# Moves raw rows older than the retention window into Parquet segments
+# (app.core.bronze_archive) and deletes them from the hot tables. The
+# rebuild path reads archived rows back through load_raw_range.
+
+BRONZE_RETENTION_DAYS = int(os.getenv("BRONZE_RETENTION_DAYS", "90"))
+ARCHIVE_SEGMENT_ROWS = int(os.getenv("ARCHIVE_SEGMENT_ROWS", "100000"))
+
+
+def archive_window(engine, table, start, end, *, archive_dir, segment_rows):
+    """
+    Archive every row with start <= ingested_at < end. Segments and the
+    manifest are durable before the delete commits; if the delete fails the
+    rows exist in both places and readers de-duplicate them by id.
+    """
+    window = (table.c.ingested_at >= start, table.c.ingested_at < end)
+    entries = []
+
+    with engine.begin() as conn:
+        result = conn.execution_options(yield_per=segment_rows).execute(
+            select(table)
+            .where(*window)
+            .order_by(table.c.ingested_at.asc(), table.c.id.asc())
+        )
+
+        for chunk in result.mappings().partitions():
+            entries.append(
+                write_segment(table.name, chunk, archive_dir=archive_dir)
+            )
+
+        if not entries:
+            return 0
+
+        manifest = load_manifest(archive_dir)
+        manifest["segments"].extend(entries)
+        save_manifest(manifest, archive_dir)
+
+        conn.execute(delete(table).where(*window))
+
+    archived = sum(e["rows"] for e in entries)
+    logger.info(
+        "[ARCHIVE] %s [%s, %s): %d rows in %d segments (%d bytes)",
+        table.name,
+        start,
+        end,
+        archived,
+        len(entries),
+        sum(e["bytes"] for e in entries),
+    )
+    return archived
+
+
+def archive_table(
+    engine,
+    table,
+    *,
+    cutoff,
+    archive_dir=None,
+    segment_rows=ARCHIVE_SEGMENT_ROWS,
+):
+    """Archive a raw table up to `cutoff`, one month per transaction."""
+    cutoff = as_utc(cutoff)
+
+    with engine.connect() as conn:
+        oldest = conn.execute(
+            select(func.min(table.c.ingested_at)).where(
+                table.c.ingested_at < cutoff
+            )
+        ).scalar()
+
+    if oldest is None:
+        return 0
+
+    archived = 0
+    start = month_start(as_utc(oldest))
+
+    while start < cutoff:
+        end = min(add_months(start, 1), cutoff)
+        archived += archive_window(
+            engine,
+            table,
+            start,
+            end,
+            archive_dir=archive_dir,
+            segment_rows=segment_rows,
+        )
+        start = end
+
+    return archived
+
+
+def run_archive(
+    engine,
+    *,
+    retention_days=BRONZE_RETENTION_DAYS,
+    archive_dir=None,
+    now=None,
+):
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    logger.info("[ARCHIVE] Archiving raw rows ingested before %s", cutoff)
+
+    totals = {}
+    for name, table in RAW_TABLES.items():
+        totals[name] = archive_table(
+            engine,
+            table,
+            cutoff=cutoff,
+            archive_dir=archive_dir,
+        )
+
+    logger.info("[ARCHIVE] Completed: %s", totals)
+    return totals
+
+
+# ---------------- ENTRYPOINT ----------------
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.archive_service",
+        description="Move old raw_* rows into compressed Parquet segments.",
+    )
+    parser.add_argument(
+        "--retention-days",
+        type=int,
+        default=BRONZE_RETENTION_DAYS,
+        help="Keep rows ingested within this many days in the hot tables.",
+    )
+    parser.add_argument("--archive-dir", default=BRONZE_ARCHIVE_DIR)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    from app.core.db import get_engine
+    from app.core.db_waiter import wait_for_db
+
+    args = _parse_args()
+    engine = get_engine()
+    wait_for_db(engine)
+    run_archive(
+        engine,
+        retention_days=args.retention_days,
+        archive_dir=args.archive_dir,
+    )
@@ -1,4 +1,5 @@
 from app.core.logging import setup_logging
+import os
 import logging
 import time
 import uuid
@@ -6,12 +7,13 @@ import uuid
 setup_logging()
 logger = logging.getLogger(__name__)
 
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from app.ingestion.coingecko import ingest_coingecko
 from app.ingestion.coinpaprika import ingest_coinpaprika
 from app.ingestion.csv_source import ingest_csv
-from app.core.checkpoints import CheckpointManager
+from app.core.checkpoints import CheckpointManager, bump_data_generation
+from app.core.events import notify_prices_changed
 
 from app.transform.loader import (
     load_raw_coingecko,
@@ -23,6 +25,15 @@ from app.transform.transformer import (
     transform_coinpaprika,
     transform_csv,
 )
+from app.transform.parallel import transform_parallel
+from app.transform.context import TransformContext
+from app.services.partition_maintenance import ensure_partitions
+
+# 0 keeps the inline (single-process) transform.
+TRANSFORM_WORKERS = int(os.getenv("TRANSFORM_WORKERS", "0"))
+TRANSFORM_BATCH_SIZE = int(os.getenv("TRANSFORM_BATCH_SIZE", "500"))
+# Skip market rows whose values repeat the latest known ones.
+TRANSFORM_DELTA_MODE = os.getenv("TRANSFORM_DELTA_MODE", "0").lower() in ("1", "true", "yes")
 
 
 # ---------------- INGEST ----------------
@@ -54,7 +65,26 @@ def run_ingest(engine):
 
 # ---------------- ETL ----------------
 
-def run_etl(engine):
+def run_transform_parallel(conn, *, sources, ctx, workers, transform_stats):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name, loader, since in sources:
+            transform_stats[name] = transform_parallel(
+                conn,
+                source=name,
+                rows=loader(conn, since),
+                run_id=ctx.run_id,
+                pool=pool,
+                batch_size=TRANSFORM_BATCH_SIZE,
+                max_in_flight=2 * workers,
+                ctx=ctx,
+            )
+
+
+def run_etl(engine, transform_workers=None, delta_mode=None):
+    if transform_workers is None:
+        transform_workers = TRANSFORM_WORKERS
+    if delta_mode is None:
+        delta_mode = TRANSFORM_DELTA_MODE
 
     cp = CheckpointManager(engine)
 
@@ -86,34 +116,57 @@ def run_etl(engine):
         # -------- INGEST (BRONZE) --------
         run_ingest(engine)
 
+        if engine.dialect.name == "postgresql":
+            ensure_partitions(engine)
+
         logger.info('[ETL] Transformation Started')
         # -------- TRANSFORM (SILVER) --------
         run_id = uuid.uuid4()
+        ctx = TransformContext(run_id, delta=delta_mode)
 
         with engine.begin() as conn:
-            for row in load_raw_coinpaprika(conn,coinpaprika_since):
-                ok = transform_coinpaprika(conn, row=row, run_id=run_id)
-                if ok:
-                    transform_stats["coinpaprika"]["success"] += 1
-                else:
-                    transform_stats["coinpaprika"]["failed"] += 1
-
-            for row in load_raw_coingecko(conn,coingecko_since):
-                ok = transform_coingecko(conn, row=row, run_id=run_id)
-                if ok:
-                    transform_stats["coingecko"]["success"] += 1
-                else:
-                    transform_stats["coingecko"]["failed"] += 1
-
-            for row in load_raw_csv(conn,csv_since):
-                ok = transform_csv(conn, row=row, run_id=run_id)
-                if ok:
-                    transform_stats["csv"]["success"] += 1
-                else:
-                    transform_stats["csv"]["failed"] += 1
-
-
-        logger.info('[ETL] Transformation Completed')
+            if transform_workers > 0:
+                run_transform_parallel(
+                    conn,
+                    sources=(
+                        ("coinpaprika", load_raw_coinpaprika, coinpaprika_since),
+                        ("coingecko", load_raw_coingecko, coingecko_since),
+                        ("csv", load_raw_csv, csv_since),
+                    ),
+                    ctx=ctx,
+                    workers=transform_workers,
+                    transform_stats=transform_stats,
+                )
+            else:
+                for row in load_raw_coinpaprika(conn,coinpaprika_since):
+                    ok = transform_coinpaprika(conn, row=row, run_id=run_id, ctx=ctx)
+                    if ok:
+                        transform_stats["coinpaprika"]["success"] += 1
+                    else:
+                        transform_stats["coinpaprika"]["failed"] += 1
+
+                for row in load_raw_coingecko(conn,coingecko_since):
+                    ok = transform_coingecko(conn, row=row, run_id=run_id, ctx=ctx)
+                    if ok:
+                        transform_stats["coingecko"]["success"] += 1
+                    else:
+                        transform_stats["coingecko"]["failed"] += 1
+
+                for row in load_raw_csv(conn,csv_since):
+                    ok = transform_csv(conn, row=row, run_id=run_id, ctx=ctx)
+                    if ok:
+                        transform_stats["csv"]["success"] += 1
+                    else:
+                        transform_stats["csv"]["failed"] += 1
+
+            ctx.flush(conn)
+            for name in ("coinpaprika", "coingecko", "csv"):
+                transform_stats[name]["suppressed"] = ctx.suppressed.get(name, 0)
+            transform_stats["failures"] = ctx.failures.summary()
+            bump_data_generation(conn)
+            notify_prices_changed(conn, run_id=run_id)
+
+        logger.info('[ETL] Transformation Completed: %s', transform_stats)
         logger.info("[ETL] Completed successfully")
 
     except Exception:
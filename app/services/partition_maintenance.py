@@ -0,0 +1,193 @@
+from app.core.logging import setup_logging
+import os
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+from sqlalchemy import text
+
+# asset_market_data is range-partitioned by month on last_updated.
+# Partitions are named asset_market_data_pYYYYMM; rows outside every
+# monthly partition land in asset_market_data_default.
+
+PARENT_TABLE = "asset_market_data"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+
+def month_start(ts):
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(ts, months):
+    index = ts.year * 12 + ts.month - 1 + months
+    return ts.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(start):
+    return f"{PARENT_TABLE}_p{start:%Y%m}"
+
+
+def _partition_exists(conn, name):
+    return conn.execute(
+        text(
+            """
+            SELECT 1
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :parent AND c.relname = :name
+            """
+        ),
+        {"parent": PARENT_TABLE, "name": name},
+    ).first() is not None
+
+
+def ensure_default_partition(conn):
+    conn.execute(
+        text(
+            f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" '
+            f'PARTITION OF "{PARENT_TABLE}" DEFAULT'
+        )
+    )
+
+
+def create_month_partition(conn, start):
+    """
+    Create and attach the partition for the month starting at `start`.
+    Rows that already landed in the default partition for that month are
+    moved into it first, otherwise ATTACH would fail.
+    """
+    name = partition_name(start)
+    if _partition_exists(conn, name):
+        return False
+
+    end = add_months(start, 1)
+    bounds = {"start": start, "end": end}
+
+    conn.execute(
+        text(
+            f'CREATE TABLE "{name}" '
+            f'(LIKE "{PARENT_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+    )
+    conn.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM "{DEFAULT_PARTITION}"
+                WHERE last_updated >= :start AND last_updated < :end
+                RETURNING *
+            )
+            INSERT INTO "{name}" SELECT * FROM moved
+            """
+        ),
+        bounds,
+    )
+    conn.execute(
+        text(
+            f'ALTER TABLE "{PARENT_TABLE}" ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    )
+
+    logger.info("[PARTITIONS] Created %s [%s, %s)", name, start, end)
+    return True
+
+
+def ensure_partitions(engine, *, months_ahead=PARTITION_MONTHS_AHEAD, now=None):
+    """Make sure the current month and `months_ahead` future months exist."""
+    now = now or datetime.now(timezone.utc)
+    first = month_start(now)
+    created = []
+
+    with engine.begin() as conn:
+        ensure_default_partition(conn)
+
+        for i in range(months_ahead + 1):
+            start = add_months(first, i)
+            if create_month_partition(conn, start):
+                created.append(partition_name(start))
+
+    return created
+
+
+def _scanned_relations(plan):
+    relations = set()
+    stack = [plan]
+
+    while stack:
+        node = stack.pop()
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        stack.extend(node.get("Plans", []))
+
+    return relations
+
+
+def scanned_partitions(engine, *, from_ts, to_ts):
+    """Partitions the planner keeps for a /data-style time range query."""
+    with engine.connect() as conn:
+        raw = conn.execute(
+            text(
+                f"""
+                EXPLAIN (FORMAT JSON)
+                SELECT asset_id, source, price_usd, last_updated
+                FROM "{PARENT_TABLE}"
+                WHERE last_updated >= :from_ts AND last_updated <= :to_ts
+                """
+            ),
+            {"from_ts": from_ts, "to_ts": to_ts},
+        ).scalar()
+
+    plan = raw if isinstance(raw, list) else json.loads(raw)
+    return _scanned_relations(plan[0]["Plan"])
+
+
+def verify_partition_pruning(engine, *, now=None):
+    """
+    EXPLAIN a one-month range query and check that only that month's
+    partition is scanned. Returns True when pruning works.
+    """
+    now = now or datetime.now(timezone.utc)
+    start = month_start(now)
+    end = add_months(start, 1)
+
+    scanned = scanned_partitions(
+        engine,
+        from_ts=start,
+        to_ts=end - timedelta(microseconds=1),
+    )
+    expected = {partition_name(start)}
+
+    if scanned - expected:
+        logger.warning(
+            "[PARTITIONS] Pruning check failed: expected %s, scanned %s",
+            sorted(expected),
+            sorted(scanned),
+        )
+        return False
+
+    logger.info("[PARTITIONS] Pruning OK: range scan touches %s", sorted(scanned))
+    return True
+
+
+def run_maintenance(engine, *, months_ahead=PARTITION_MONTHS_AHEAD):
+    created = ensure_partitions(engine, months_ahead=months_ahead)
+    logger.info("[PARTITIONS] %d partitions created", len(created))
+    verify_partition_pruning(engine)
+    return created
+
+
+# ---------------- ENTRYPOINT ----------------
+
+if __name__ == "__main__":
+    from app.core.db import get_engine
+    from app.core.db_waiter import wait_for_db
+
+    engine = get_engine()
+    wait_for_db(engine)
+    run_maintenance(engine)
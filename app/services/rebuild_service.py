@@ -0,0 +1,399 @@
+from app.core.logging import setup_logging
+import os
+import time
+import uuid
+import logging
+import argparse
+from datetime import datetime, timedelta
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sqlalchemy import create_engine, select, func, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.db import build_db_url
+from app.core.checkpoints import bump_data_generation
+from app.core.events import notify_prices_changed
+from app.core.bronze_archive import (
+    archived_bounds,
+    count_archived_rows,
+    as_utc,
+)
+from app.schemas.tables import raw_coingecko, raw_coinpaprika, raw_csv
+from app.transform.context import TransformContext
+from app.transform.loader import load_raw_range
+from app.transform.transformer import (
+    transform_coingecko,
+    transform_coinpaprika,
+    transform_csv,
+)
+
+# Re-derives Silver (asset_market_data) from Bronze after a transform logic
+# change: re-derived observations overwrite the stored ones. Does not touch
+# ETL checkpoints or etl_runs.
+
+REBUILD_SOURCES = {
+    "coinpaprika": (raw_coinpaprika, transform_coinpaprika),
+    "coingecko": (raw_coingecko, transform_coingecko),
+    "csv": (raw_csv, transform_csv),
+}
+
+REBUILD_WORKERS = int(os.getenv("REBUILD_WORKERS", "4"))
+REBUILD_BATCH_SIZE = int(os.getenv("REBUILD_BATCH_SIZE", "1000"))
+REBUILD_MAX_RETRIES = 3
+
+SECONDARY_INDEX_TABLES = ("asset_market_data",)
+
+
+# ---------------- PLANNING ----------------
+
+def _with_archive_bounds(table_name, lo, hi, since, until):
+    """Widen the live table's ingested_at bounds to cover archived rows."""
+    arch_lo, arch_hi = archived_bounds(table_name)
+    if arch_lo is None:
+        return lo, hi
+
+    if since:
+        arch_lo = max(arch_lo, as_utc(since))
+    if until:
+        arch_hi = min(arch_hi, as_utc(until) - timedelta(microseconds=1))
+    if arch_lo > arch_hi:
+        return lo, hi
+
+    if lo is None:
+        return arch_lo, arch_hi
+
+    return min(as_utc(lo), arch_lo), max(as_utc(hi), arch_hi)
+
+
+def plan_partitions(engine, *, sources, partitions, since=None, until=None):
+    """
+    Split each raw table into `partitions` equal ingested_at windows.
+    Windows are half-open [start, end); empty windows are dropped.
+    """
+    plan = []
+
+    with engine.connect() as conn:
+        for source in sources:
+            table, _ = REBUILD_SOURCES[source]
+
+            stmt = select(
+                func.min(table.c.ingested_at),
+                func.max(table.c.ingested_at),
+            )
+            if since:
+                stmt = stmt.where(table.c.ingested_at >= since)
+            if until:
+                stmt = stmt.where(table.c.ingested_at < until)
+
+            lo, hi = conn.execute(stmt).one()
+            lo, hi = _with_archive_bounds(table.name, lo, hi, since, until)
+            if lo is None:
+                continue
+
+            hi = hi + timedelta(microseconds=1)
+            step = (hi - lo) / partitions
+
+            bounds = [lo + step * i for i in range(partitions)] + [hi]
+
+            for start, end in zip(bounds, bounds[1:]):
+                rows = conn.execute(
+                    select(func.count()).select_from(table).where(
+                        table.c.ingested_at >= start,
+                        table.c.ingested_at < end,
+                    )
+                ).scalar()
+                rows += count_archived_rows(table.name, start, end)
+
+                if rows:
+                    plan.append(
+                        {
+                            "source": source,
+                            "start": start,
+                            "end": end,
+                            "rows": rows,
+                        }
+                    )
+
+    return plan
+
+
+# ---------------- WORK ----------------
+
+def rebuild_range(engine, *, source, start, end, run_id, batch_size):
+    """
+    Transform one ingested_at window, committing every `batch_size` rows so
+    concurrent workers never hold asset locks for long. A deadlocked batch
+    is retried from its first row.
+    """
+    table, transform = REBUILD_SOURCES[source]
+    ctx = TransformContext(run_id, overwrite=True)
+    stats = {"success": 0, "failed": 0}
+    after = None
+
+    while True:
+        for attempt in range(1, REBUILD_MAX_RETRIES + 1):
+            batch_stats = {"success": 0, "failed": 0}
+            last = None
+
+            try:
+                with engine.begin() as conn:
+                    for row in load_raw_range(
+                        conn,
+                        table,
+                        start,
+                        end,
+                        after=after,
+                        limit=batch_size,
+                        with_payload=ctx.overwrite,
+                    ):
+                        ok = transform(conn, row=row, run_id=run_id, ctx=ctx)
+                        batch_stats["success" if ok else "failed"] += 1
+                        last = (row["ingested_at"], row["id"])
+                    ctx.flush(conn)
+                break
+            except OperationalError:
+                ctx.discard()
+                if attempt == REBUILD_MAX_RETRIES:
+                    raise
+                logger.warning(
+                    "[REBUILD] %s batch after %s failed (attempt %d/%d), retrying",
+                    source,
+                    after,
+                    attempt,
+                    REBUILD_MAX_RETRIES,
+                )
+
+        if last is None:
+            return stats
+
+        stats["success"] += batch_stats["success"]
+        stats["failed"] += batch_stats["failed"]
+        after = last
+
+
+_worker_engine = None
+
+
+def _init_worker():
+    global _worker_engine
+    _worker_engine = create_engine(
+        build_db_url(),
+        future=True,
+        pool_pre_ping=True,
+        pool_size=1,
+    )
+
+
+def _rebuild_range_worker(part, run_id, batch_size):
+    stats = rebuild_range(
+        _worker_engine,
+        source=part["source"],
+        start=part["start"],
+        end=part["end"],
+        run_id=run_id,
+        batch_size=batch_size,
+    )
+    return part, stats
+
+
+# ---------------- SECONDARY INDEXES ----------------
+
+def drop_secondary_indexes(engine, tables=SECONDARY_INDEX_TABLES):
+    """
+    Drop indexes that do not back a constraint (PK/unique stay, the
+    transform relies on them for ON CONFLICT). Dropping a partitioned
+    index drops its partition indexes too. Returns their definitions.
+    """
+    with engine.begin() as conn:
+        indexes = conn.execute(
+            text(
+                """
+                SELECT i.indexname, i.indexdef
+                FROM pg_indexes i
+                WHERE i.schemaname = current_schema()
+                  AND i.tablename = ANY(:tables)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM pg_constraint c
+                      WHERE c.conname = i.indexname
+                  )
+                """
+            ),
+            {"tables": list(tables)},
+        ).all()
+
+        for name, _ in indexes:
+            logger.info("[REBUILD] Dropping index %s", name)
+            conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+    return [definition for _, definition in indexes]
+
+
+def recreate_indexes(engine, definitions):
+    """
+    Replay dropped index definitions. pg_indexes shows an index of a
+    partitioned table as `ON ONLY <parent>`; replayed as is, it would stay
+    invalid with no partition indexes attached. Without ONLY, Postgres
+    builds one per partition and attaches them.
+    """
+    with engine.begin() as conn:
+        for definition in definitions:
+            definition = definition.replace(" ON ONLY ", " ON ", 1)
+            logger.info("[REBUILD] Recreating: %s", definition)
+            conn.execute(text(definition))
+
+
+# ---------------- DRIVER ----------------
+
+def _format_eta(seconds):
+    return str(timedelta(seconds=int(seconds)))
+
+
+def run_rebuild(
+    engine,
+    *,
+    sources=tuple(REBUILD_SOURCES),
+    workers=REBUILD_WORKERS,
+    partitions=None,
+    since=None,
+    until=None,
+    batch_size=REBUILD_BATCH_SIZE,
+    drop_indexes=False,
+):
+    partitions = partitions or workers * 4
+    run_id = uuid.uuid4()
+
+    plan = plan_partitions(
+        engine,
+        sources=sources,
+        partitions=partitions,
+        since=since,
+        until=until,
+    )
+    total_rows = sum(p["rows"] for p in plan)
+
+    logger.info(
+        "[REBUILD] run_id=%s: %d partitions, %d raw rows, %d workers",
+        run_id,
+        len(plan),
+        total_rows,
+        workers,
+    )
+
+    totals = {"success": 0, "failed": 0}
+    if not plan:
+        return totals
+
+    dropped = drop_secondary_indexes(engine) if drop_indexes else []
+
+    # Forked workers must not share the parent's pooled connections.
+    engine.dispose()
+
+    start_ts = time.time()
+    done_rows = 0
+    completed = 0
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+        ) as pool:
+            futures = [
+                pool.submit(_rebuild_range_worker, part, run_id, batch_size)
+                for part in plan
+            ]
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                part, stats = future.result()
+                completed = done
+                totals["success"] += stats["success"]
+                totals["failed"] += stats["failed"]
+                done_rows += part["rows"]
+
+                elapsed = time.time() - start_ts
+                rate = done_rows / elapsed if elapsed else 0.0
+                eta = (total_rows - done_rows) / rate if rate else 0.0
+
+                logger.info(
+                    "[REBUILD] %d/%d partitions, %d/%d rows (%.1f%%), "
+                    "%.0f rows/s, ETA %s",
+                    done,
+                    len(plan),
+                    done_rows,
+                    total_rows,
+                    100.0 * done_rows / total_rows,
+                    rate,
+                    _format_eta(eta),
+                )
+    finally:
+        if dropped:
+            recreate_indexes(engine, dropped)
+
+        # Nothing committed, nothing to invalidate or announce. Batches of
+        # a failed window that did commit already bumped the generation
+        # through the latest-snapshot upsert.
+        if completed:
+            with engine.begin() as conn:
+                bump_data_generation(conn)
+                notify_prices_changed(conn, run_id=run_id)
+
+    logger.info(
+        "[REBUILD] Completed in %s: %s",
+        _format_eta(time.time() - start_ts),
+        totals,
+    )
+
+    return totals
+
+
+# ---------------- ENTRYPOINT ----------------
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.rebuild_service",
+        description="Re-derive asset_market_data from the raw_* tables.",
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        choices=sorted(REBUILD_SOURCES),
+        help="Limit to one source (repeatable). Default: all.",
+    )
+    parser.add_argument("--workers", type=int, default=REBUILD_WORKERS)
+    parser.add_argument(
+        "--partitions",
+        type=int,
+        default=None,
+        help="ingested_at windows per source. Default: 4 x workers.",
+    )
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+    parser.add_argument(
+        "--drop-indexes",
+        action="store_true",
+        help="Drop secondary indexes on asset_market_data during the load.",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    from app.core.db import get_engine
+    from app.core.db_waiter import wait_for_db
+
+    args = _parse_args()
+    engine = get_engine()
+    wait_for_db(engine)
+    run_rebuild(
+        engine,
+        sources=tuple(args.source or REBUILD_SOURCES),
+        workers=args.workers,
+        partitions=args.partitions,
+        since=args.since,
+        until=args.until,
+        batch_size=args.batch_size,
+        drop_indexes=args.drop_indexes,
+    )
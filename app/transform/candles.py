@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.schemas.tables import asset_market_data, CANDLE_TABLES
+
+# (asset_id, source) keys per point query; keeps the OR list bounded.
+_KEYS_PER_QUERY = 200
+
+
+def _utc(ts):
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def bucket_start(ts, interval):
+    ts = _utc(ts)
+    if interval == "1h":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if interval == "1d":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"unknown candle interval: {interval}")
+
+
+def touch(touched, record):
+    """
+    Add the buckets a written record falls into to `touched`, a
+    {(asset_id, source): {interval: {bucket_start, ...}}} mapping.
+    """
+    per_key = touched.setdefault(
+        (record["asset_id"], record["source"]),
+        {interval: set() for interval in CANDLE_TABLES},
+    )
+    for interval, buckets in per_key.items():
+        buckets.add(bucket_start(record["last_updated"], interval))
+
+
+def touched_buckets(records):
+    touched = {}
+    for r in records:
+        touch(touched, r)
+    return touched
+
+
+def build_candles(points, interval):
+    """OHLC rows from market data points, one per bucket."""
+    candles = {}
+
+    for p in sorted(points, key=lambda p: _utc(p["last_updated"])):
+        if p["price_usd"] is None:
+            continue
+
+        ts = _utc(p["last_updated"])
+        start = bucket_start(ts, interval)
+        c = candles.get(start)
+
+        if c is None:
+            candles[start] = {
+                "bucket_start": start,
+                "open_usd": p["price_usd"],
+                "high_usd": p["price_usd"],
+                "low_usd": p["price_usd"],
+                "close_usd": p["price_usd"],
+                "volume_24h_usd": p["volume_24h_usd"],
+                "points": 1,
+                "first_at": ts,
+                "last_at": ts,
+            }
+            continue
+
+        c["high_usd"] = max(c["high_usd"], p["price_usd"])
+        c["low_usd"] = min(c["low_usd"], p["price_usd"])
+        c["close_usd"] = p["price_usd"]
+        c["volume_24h_usd"] = p["volume_24h_usd"]
+        c["points"] += 1
+        c["last_at"] = ts
+
+    return list(candles.values())
+
+
+def _load_points(conn, touched):
+    """Points of every touched day, grouped by (asset_id, source)."""
+    ranges = []
+    for (asset_id, source), per_interval in touched.items():
+        days = per_interval["1d"]
+        ranges.append(
+            and_(
+                asset_market_data.c.asset_id == asset_id,
+                asset_market_data.c.source == source,
+                asset_market_data.c.last_updated >= min(days),
+                asset_market_data.c.last_updated < max(days) + timedelta(days=1),
+            )
+        )
+
+    points = {}
+    for i in range(0, len(ranges), _KEYS_PER_QUERY):
+        rows = conn.execute(
+            select(
+                asset_market_data.c.asset_id,
+                asset_market_data.c.source,
+                asset_market_data.c.price_usd,
+                asset_market_data.c.volume_24h_usd,
+                asset_market_data.c.last_updated,
+            ).where(or_(*ranges[i:i + _KEYS_PER_QUERY]))
+        ).mappings()
+
+        for row in rows:
+            points.setdefault((row["asset_id"], row["source"]), []).append(row)
+
+    return points
+
+
+def refresh_candles(conn, touched):
+    """
+    Recompute the 1h and 1d candles of the touched buckets from
+    asset_market_data. Recomputing whole buckets keeps candles exact when
+    points arrive out of order or a run is replayed.
+    """
+    if not touched:
+        return
+
+    points = _load_points(conn, touched)
+    now = datetime.now(timezone.utc)
+
+    for interval, table in CANDLE_TABLES.items():
+        rows = []
+
+        for key, per_interval in touched.items():
+            asset_id, source = key
+            wanted = per_interval[interval]
+
+            for candle in build_candles(points.get(key, []), interval):
+                if candle["bucket_start"] in wanted:
+                    rows.append(
+                        {
+                            **candle,
+                            "asset_id": asset_id,
+                            "source": source,
+                            "updated_at": now,
+                        }
+                    )
+
+        if not rows:
+            continue
+
+        stmt = pg_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["asset_id", "source", "bucket_start"],
+            set_={
+                col: stmt.excluded[col]
+                for col in (
+                    "open_usd",
+                    "high_usd",
+                    "low_usd",
+                    "close_usd",
+                    "volume_24h_usd",
+                    "points",
+                    "first_at",
+                    "last_at",
+                    "updated_at",
+                )
+            },
+        )
+        conn.execute(stmt, rows)
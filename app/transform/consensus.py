@@ -0,0 +1,107 @@
+import os
+import statistics
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.schemas.tables import asset_latest_market_data, asset_consensus_prices
+
+# Sources whose latest price is this much older than the asset's freshest
+# source are left out of the consensus (e.g. a static CSV snapshot).
+CONSENSUS_MAX_AGE_HOURS = float(os.getenv("CONSENSUS_MAX_AGE_HOURS", "24"))
+
+# asset_ids per query; keeps the IN list bounded.
+_ASSETS_PER_QUERY = 1000
+
+
+def _utc(ts):
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def build_consensus(latest, *, max_age=None):
+    """
+    Consensus row from the latest-per-source rows of one asset, or None if
+    no source has a price.
+    """
+    if max_age is None:
+        max_age = timedelta(hours=CONSENSUS_MAX_AGE_HOURS)
+
+    priced = [r for r in latest if r["price_usd"] is not None]
+    if not priced:
+        return None
+
+    freshest = max(_utc(r["last_updated"]) for r in priced)
+    used = sorted(
+        (r for r in priced if freshest - _utc(r["last_updated"]) <= max_age),
+        key=lambda r: r["source"],
+    )
+    prices = [r["price_usd"] for r in used]
+
+    median = statistics.median(prices)
+    low, high = min(prices), max(prices)
+
+    return {
+        "median_price_usd": median,
+        "mean_price_usd": sum(prices) / len(prices),
+        "min_price_usd": low,
+        "max_price_usd": high,
+        "spread_pct": (high - low) / median * 100 if median else 0,
+        "source_count": len(used),
+        "sources": [r["source"] for r in used],
+        "freshest_at": freshest,
+    }
+
+
+def refresh_consensus(conn, asset_ids):
+    """
+    Recompute asset_consensus_prices for the given assets from
+    asset_latest_market_data. Call after the latest snapshot was updated.
+    """
+    asset_ids = list(set(asset_ids))
+    if not asset_ids:
+        return
+
+    now = datetime.now(timezone.utc)
+    rows, empty = [], []
+
+    for i in range(0, len(asset_ids), _ASSETS_PER_QUERY):
+        chunk = asset_ids[i:i + _ASSETS_PER_QUERY]
+        latest = {a: [] for a in chunk}
+
+        for r in conn.execute(
+            select(
+                asset_latest_market_data.c.asset_id,
+                asset_latest_market_data.c.source,
+                asset_latest_market_data.c.price_usd,
+                asset_latest_market_data.c.last_updated,
+            ).where(asset_latest_market_data.c.asset_id.in_(chunk))
+        ).mappings():
+            latest[r["asset_id"]].append(r)
+
+        for asset_id, per_source in latest.items():
+            consensus = build_consensus(per_source)
+            if consensus is None:
+                empty.append(asset_id)
+            else:
+                rows.append({**consensus, "asset_id": asset_id, "updated_at": now})
+
+    if empty:
+        conn.execute(
+            delete(asset_consensus_prices)
+            .where(asset_consensus_prices.c.asset_id.in_(empty))
+        )
+
+    if not rows:
+        return
+
+    stmt = pg_insert(asset_consensus_prices)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["asset_id"],
+        set_={
+            col: stmt.excluded[col]
+            for col in rows[0]
+            if col != "asset_id"
+        },
+    )
+    conn.execute(stmt, rows)
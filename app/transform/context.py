@@ -0,0 +1,65 @@
+from app.transform.delta import LatestValueCache
+from app.transform.failures import FailureRecorder
+from app.transform.candles import refresh_candles, touch
+from app.transform.consensus import refresh_consensus
+from app.transform.transformer import upsert_latest_market_data
+
+
+class TransformContext:
+    """Per-run state shared by the transform functions of one ETL run."""
+
+    def __init__(self, run_id, *, failures=None, delta=False, overwrite=False):
+        self.run_id = run_id
+        # Rebuild mode: re-derived observations replace stored ones instead
+        # of being skipped as duplicates.
+        self.overwrite = overwrite
+        self.failures = failures or FailureRecorder(run_id)
+        # Delta mode: skip writes that repeat the latest known values.
+        self.latest = LatestValueCache() if delta else None
+        self.suppressed = {}
+        # Newest written observation per (asset_id, source), applied to
+        # asset_latest_market_data in one batch on flush().
+        self._latest_written = {}
+        # Candle buckets written into since the last flush, recomputed on
+        # flush().
+        self._touched = {}
+
+    def should_write(self, conn, record):
+        if self.latest is None or self.latest.observe(conn, record):
+            return True
+
+        source = record["source"]
+        self.suppressed[source] = self.suppressed.get(source, 0) + 1
+        # No history row, but the latest snapshot still moves forward, or
+        # /data and consensus would see an unchanged price as stale.
+        self._track_latest(record)
+        return False
+
+    def track_written(self, record):
+        touch(self._touched, record)
+        self._track_latest(record)
+
+    def _track_latest(self, record):
+        key = (record["asset_id"], record["source"])
+        prev = self._latest_written.get(key)
+        if prev is None or record["last_updated"] > prev["last_updated"]:
+            self._latest_written[key] = record
+
+    def flush(self, conn):
+        """Write buffered per-run state. Call before the transaction commits."""
+        self.failures.flush(conn)
+        upsert_latest_market_data(
+            conn,
+            list(self._latest_written.values()),
+            overwrite=self.overwrite,
+        )
+        refresh_candles(conn, self._touched)
+        refresh_consensus(conn, {asset_id for asset_id, _ in self._latest_written})
+        self._latest_written = {}
+        self._touched = {}
+
+    def discard(self):
+        """Drop buffered state after the surrounding transaction rolled back."""
+        self.failures.discard()
+        self._latest_written = {}
+        self._touched = {}
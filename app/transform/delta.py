@@ -0,0 +1,70 @@
+from sqlalchemy import select
+from app.schemas.tables import asset_latest_market_data
+
+_VALUE_FIELDS = ("price_usd", "market_cap_usd", "volume_24h_usd")
+
+
+class LatestValueCache:
+    """
+    Latest known values per (asset_id, source), used by delta mode to skip
+    observations that only move last_updated forward.
+
+    Loaded lazily from asset_latest_market_data, one query per source, on
+    first use in a run. Assumes observations for a key arrive with
+    increasing last_updated; an older observation is never suppressed.
+    """
+
+    def __init__(self):
+        self._latest = {}
+        self._loaded_sources = set()
+
+    def _load(self, conn, source):
+        rows = conn.execute(
+            select(
+                asset_latest_market_data.c.asset_id,
+                asset_latest_market_data.c.price_usd,
+                asset_latest_market_data.c.market_cap_usd,
+                asset_latest_market_data.c.volume_24h_usd,
+                asset_latest_market_data.c.last_updated,
+            ).where(asset_latest_market_data.c.source == source)
+        ).mappings()
+
+        for row in rows:
+            self._latest[(row["asset_id"], source)] = dict(row)
+
+        self._loaded_sources.add(source)
+
+    def observe(self, conn, record):
+        """
+        Record an observation. Returns False when it carries the same values
+        as the latest known one for its key and a newer last_updated, i.e.
+        when the write can be suppressed.
+        """
+        source = record["source"]
+        if source not in self._loaded_sources:
+            self._load(conn, source)
+
+        key = (record["asset_id"], source)
+        prev = self._latest.get(key)
+        last_updated = record["last_updated"]
+
+        if prev is not None:
+            prev_ts = prev["last_updated"]
+            if prev_ts.tzinfo is None:
+                prev_ts = prev_ts.replace(tzinfo=last_updated.tzinfo)
+
+            if last_updated <= prev_ts:
+                return True
+
+            if all(prev[f] == record[f] for f in _VALUE_FIELDS):
+                prev["last_updated"] = last_updated
+                return False
+
+        self._latest[key] = {
+            "asset_id": record["asset_id"],
+            "price_usd": record["price_usd"],
+            "market_cap_usd": record["market_cap_usd"],
+            "volume_24h_usd": record["volume_24h_usd"],
+            "last_updated": last_updated,
+        }
+        return True
@@ -0,0 +1,223 @@
+import os
+import re
+import hashlib
+from datetime import datetime, timezone
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.schemas.tables import (
+    RAW_TABLES,
+    transform_failures,
+    transform_failure_summaries,
+)
+
+FAILURE_SAMPLES_PER_FINGERPRINT = int(
+    os.getenv("FAILURE_SAMPLES_PER_FINGERPRINT", "5")
+)
+FAILURE_BATCH_SIZE = int(os.getenv("FAILURE_BATCH_SIZE", "500"))
+
+_NORMALIZED_MAX_LEN = 1000
+
+# Row-specific parts of an error message, replaced so that the same failure
+# on different rows maps to the same fingerprint.
+_VOLATILE_PATTERNS = (
+    (re.compile(r"input_value=.*?, input_type="), "input_value=?, input_type="),
+    (re.compile(r"https://errors\.pydantic\.dev/\S+"), "<url>"),
+    (
+        re.compile(
+            r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-"
+            r"[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+        ),
+        "<uuid>",
+    ),
+    (
+        re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?Z?"),
+        "<ts>",
+    ),
+    (re.compile(r"'[^']*'"), "'?'"),
+    (re.compile(r'"[^"]*"'), '"?"'),
+    (re.compile(r"-?\d+(\.\d+)?([eE][-+]?\d+)?"), "<n>"),
+)
+
+
+def normalize_error(message):
+    for pattern, repl in _VOLATILE_PATTERNS:
+        message = pattern.sub(repl, message)
+    return " ".join(message.split())[:_NORMALIZED_MAX_LEN]
+
+
+def failure_fingerprint(source, error_type, normalized_error):
+    return hashlib.sha256(
+        "\x1f".join((source, error_type, normalized_error)).encode()
+    ).hexdigest()
+
+
+def _fill_missing_payloads(conn, samples):
+    """Load payloads the loader skipped (rows read from hot columns)."""
+    missing = {}
+    for sample in samples:
+        if sample["payload"] is None:
+            missing.setdefault(sample["raw_table"], []).append(sample)
+
+    for raw_table, rows in missing.items():
+        table = RAW_TABLES[raw_table]
+        payloads = dict(
+            conn.execute(
+                select(table.c.id, table.c.payload).where(
+                    table.c.id.in_([r["raw_id"] for r in rows])
+                )
+            ).all()
+        )
+        for r in rows:
+            r["payload"] = payloads.get(r["raw_id"])
+
+
+class FailureRecorder:
+    """
+    Buffers row-level transform failures for one run.
+
+    Failures are grouped by fingerprint (source, error type, normalized
+    message). Only the first `sample_limit` rows of each group are written
+    to transform_failures with their payload; every failure is counted in
+    transform_failure_summaries. Writes happen in batches on flush().
+    """
+
+    def __init__(
+        self,
+        run_id,
+        *,
+        sample_limit=FAILURE_SAMPLES_PER_FINGERPRINT,
+        batch_size=FAILURE_BATCH_SIZE,
+    ):
+        self.run_id = run_id
+        self.sample_limit = sample_limit
+        self.batch_size = batch_size
+        self._groups = {}
+        self._samples = []
+
+    def record(
+        self,
+        conn,
+        *,
+        source,
+        raw_table,
+        raw_id,
+        payload,
+        error_type,
+        error_message,
+    ):
+        now = datetime.now(timezone.utc)
+        normalized = normalize_error(error_message)
+        fingerprint = failure_fingerprint(source, error_type, normalized)
+
+        group = self._groups.get(fingerprint)
+        if group is None:
+            group = self._groups[fingerprint] = {
+                "source": source,
+                "raw_table": raw_table,
+                "error_type": error_type,
+                "normalized_error": normalized,
+                "failure_count": 0,
+                "sampled_count": 0,
+                "first_failed_at": now,
+                "last_failed_at": now,
+                "unflushed_count": 0,
+                "unflushed_sampled": 0,
+            }
+
+        group["failure_count"] += 1
+        group["unflushed_count"] += 1
+        group["last_failed_at"] = now
+
+        if group["sampled_count"] < self.sample_limit:
+            group["sampled_count"] += 1
+            group["unflushed_sampled"] += 1
+            self._samples.append(
+                {
+                    "source": source,
+                    "raw_table": raw_table,
+                    "raw_id": raw_id,
+                    "run_id": self.run_id,
+                    "failed_at": now,
+                    "error_type": error_type,
+                    "error_message": error_message,
+                    "payload": payload,
+                    "fingerprint": fingerprint,
+                }
+            )
+
+        if len(self._samples) >= self.batch_size:
+            self._flush_samples(conn)
+
+    def _flush_samples(self, conn):
+        if self._samples:
+            _fill_missing_payloads(conn, self._samples)
+            conn.execute(insert(transform_failures), self._samples)
+            self._samples = []
+
+    def flush(self, conn):
+        self._flush_samples(conn)
+
+        dirty = [
+            (fp, g) for fp, g in self._groups.items() if g["unflushed_count"]
+        ]
+        if not dirty:
+            return
+
+        stmt = pg_insert(transform_failure_summaries)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["run_id", "fingerprint"],
+            set_={
+                "failure_count": transform_failure_summaries.c.failure_count
+                + stmt.excluded.failure_count,
+                "sampled_count": transform_failure_summaries.c.sampled_count
+                + stmt.excluded.sampled_count,
+                "last_failed_at": stmt.excluded.last_failed_at,
+            },
+        )
+
+        conn.execute(
+            stmt,
+            [
+                {
+                    "run_id": self.run_id,
+                    "fingerprint": fp,
+                    "source": g["source"],
+                    "raw_table": g["raw_table"],
+                    "error_type": g["error_type"],
+                    "normalized_error": g["normalized_error"],
+                    "failure_count": g["unflushed_count"],
+                    "sampled_count": g["unflushed_sampled"],
+                    "first_failed_at": g["first_failed_at"],
+                    "last_failed_at": g["last_failed_at"],
+                }
+                for fp, g in dirty
+            ],
+        )
+
+        for _, g in dirty:
+            g["unflushed_count"] = 0
+            g["unflushed_sampled"] = 0
+
+    def discard(self):
+        """Forget everything recorded since the last flush (after a rollback)."""
+        self._samples = []
+
+        for fp in list(self._groups):
+            g = self._groups[fp]
+            g["failure_count"] -= g["unflushed_count"]
+            g["sampled_count"] -= g["unflushed_sampled"]
+            g["unflushed_count"] = 0
+            g["unflushed_sampled"] = 0
+            if not g["failure_count"]:
+                del self._groups[fp]
+
+    def summary(self):
+        """Per-source failure totals and distinct fingerprints for this run."""
+        result = {}
+        for g in self._groups.values():
+            src = result.setdefault(
+                g["source"], {"failures": 0, "fingerprints": 0}
+            )
+            src["failures"] += g["failure_count"]
+            src["fingerprints"] += 1
+        return result
@@ -1,13 +1,38 @@
-from sqlalchemy import select
+import heapq
+from sqlalchemy import select, tuple_, case
 from app.schemas.tables import raw_coingecko, raw_coinpaprika, raw_csv
+from app.core.bronze_archive import as_utc, read_archived_range
+
+
+def _raw_columns(table, with_payload=False):
+    # The JSON payload is only shipped for rows without extracted hot
+    # fields; failure recording loads it by id when it needs a sample.
+    # `with_payload` always ships it, so the parsers re-derive every field
+    # instead of trusting hot columns filled by an older parser.
+    if with_payload:
+        payload = table.c.payload
+    else:
+        payload = case(
+            (table.c.source_updated_at.is_(None), table.c.payload),
+        ).label("payload")
+
+    return (
+        table.c.id,
+        table.c.source_id,
+        payload,
+        table.c.ingested_at,
+        table.c.symbol,
+        table.c.name,
+        table.c.price_usd,
+        table.c.market_cap_usd,
+        table.c.volume_24h_usd,
+        table.c.source_updated_at,
+    )
 
 
 def load_raw_coingecko(conn, since):
     stmt = select(
-        raw_coingecko.c.id,
-        raw_coingecko.c.source_id,
-        raw_coingecko.c.payload,
-        raw_coingecko.c.ingested_at,
+        *_raw_columns(raw_coingecko),
     ).order_by(raw_coingecko.c.ingested_at.asc())
 
     if since:
@@ -19,10 +44,7 @@ def load_raw_coingecko(conn, since):
 
 def load_raw_coinpaprika(conn, since):
     stmt = select(
-        raw_coinpaprika.c.id,
-        raw_coinpaprika.c.source_id,
-        raw_coinpaprika.c.payload,
-        raw_coinpaprika.c.ingested_at,
+        *_raw_columns(raw_coinpaprika),
     ).order_by(raw_coinpaprika.c.ingested_at.asc())
 
     if since:
@@ -34,10 +56,7 @@ def load_raw_coinpaprika(conn, since):
 
 def load_raw_csv(conn, since):
     stmt = select(
-        raw_csv.c.id,
-        raw_csv.c.source_id,
-        raw_csv.c.payload,
-        raw_csv.c.ingested_at,
+        *_raw_columns(raw_csv),
     ).order_by(raw_csv.c.ingested_at.asc())
 
     if since:
@@ -45,3 +64,53 @@ def load_raw_csv(conn, since):
 
     for row in conn.execute(stmt).mappings():
         yield row
+
+
+def _order_key(row):
+    return as_utc(row["ingested_at"]), str(row["id"])
+
+
+def load_raw_range(
+    conn, table, start, end, *, after=None, limit=None, with_payload=False
+):
+    """
+    Rows of a raw table with start <= ingested_at < end, in (ingested_at, id)
+    order. `after` is the (ingested_at, id) of the last row already seen, so
+    callers can page through a range in short transactions. `with_payload`
+    ships the payload of every row (see _raw_columns).
+
+    Rows moved to the Bronze archive are merged in transparently.
+    """
+    stmt = (
+        select(*_raw_columns(table, with_payload))
+        .where(
+            table.c.ingested_at >= start,
+            table.c.ingested_at < end,
+        )
+        .order_by(table.c.ingested_at.asc(), table.c.id.asc())
+    )
+
+    if after:
+        stmt = stmt.where(tuple_(table.c.ingested_at, table.c.id) > after)
+
+    if limit:
+        stmt = stmt.limit(limit)
+
+    live = conn.execute(stmt).mappings()
+    archived = read_archived_range(table.name, start, end, after=after, limit=limit)
+
+    if not archived:
+        for row in live:
+            yield row
+        return
+
+    # A row can be in both while an archive batch is being committed.
+    seen = set()
+    for row in heapq.merge(archived, live, key=_order_key):
+        if row["id"] in seen:
+            continue
+        seen.add(row["id"])
+        yield row
+
+        if limit and len(seen) == limit:
+            return
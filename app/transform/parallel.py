@@ -0,0 +1,163 @@
+import uuid
+import logging
+from collections import deque
+from functools import partial
+from itertools import islice
+from pydantic import ValidationError
+from app.transform.transformer import (
+    PARSERS,
+    build_market_data,
+    resolve_asset_id,
+    record_transform_failure_message,
+    upsert_market_data_batch,
+)
+
+logger = logging.getLogger(__name__)
+
+# Workers validate before the asset is resolved, so they use a fixed
+# placeholder; the writer swaps in the real asset_id.
+_PLACEHOLDER_ASSET_ID = uuid.UUID(int=0)
+
+
+# ---------- WORKER SIDE (no DB access) ----------
+
+def parse_batch(source, rows):
+    parse = PARSERS[source]
+    results = []
+
+    for row in rows:
+        parsed = parse(row)
+
+        try:
+            model = build_market_data(parsed, asset_id=_PLACEHOLDER_ASSET_ID)
+        except ValidationError as e:
+            # ValidationError does not survive pickling; ship the message.
+            parsed["raw_id"] = row["id"]
+            parsed["payload"] = row["payload"]
+            parsed["error_type"] = type(e).__name__
+            parsed["error_message"] = str(e)
+            results.append(parsed)
+            continue
+
+        results.append(
+            {
+                "source": parsed["source"],
+                "raw_table": parsed["raw_table"],
+                "source_asset_id": parsed["source_asset_id"],
+                "symbol": parsed["symbol"],
+                "name": parsed["name"],
+                "price_usd": model.price_usd,
+                "market_cap_usd": model.market_cap_usd,
+                "volume_24h_usd": model.volume_24h_usd,
+                "last_updated": model.last_updated,
+                "error_type": None,
+            }
+        )
+
+    return results
+
+
+# ---------- WRITER SIDE ----------
+
+def _batched(rows, size):
+    it = iter(rows)
+    while True:
+        # Mappings from the loader are not picklable across processes.
+        batch = [dict(r) for r in islice(it, size)]
+        if not batch:
+            return
+        yield batch
+
+
+def _imap_bounded(pool, fn, batches, max_in_flight):
+    """Ordered map over the pool with at most max_in_flight pending batches."""
+    in_flight = deque()
+
+    for batch in batches:
+        in_flight.append(pool.submit(fn, batch))
+        if len(in_flight) >= max_in_flight:
+            yield in_flight.popleft().result()
+
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def transform_parallel(
+    conn,
+    *,
+    source,
+    rows,
+    run_id,
+    pool,
+    batch_size=500,
+    max_in_flight=8,
+    ctx=None,
+):
+    """
+    Parse/validate raw rows in a process pool and write the results from
+    this process only. Results come back in load order, so asset resolution
+    and failure recording match the inline transform.
+    """
+    stats = {"success": 0, "failed": 0}
+    asset_ids = {}
+    pending = []
+
+    results = _imap_bounded(
+        pool,
+        partial(parse_batch, source),
+        _batched(rows, batch_size),
+        max_in_flight,
+    )
+
+    for batch in results:
+        for item in batch:
+            key = item["source_asset_id"]
+            asset_id = asset_ids.get(key)
+            if asset_id is None:
+                asset_id = resolve_asset_id(
+                    conn,
+                    source=item["source"],
+                    source_asset_id=key,
+                    symbol=item["symbol"],
+                    name=item["name"],
+                )
+                asset_ids[key] = asset_id
+
+            if item["error_type"]:
+                failure = dict(
+                    source=item["source"],
+                    raw_table=item["raw_table"],
+                    raw_id=item["raw_id"],
+                    payload=item["payload"],
+                    error_type=item["error_type"],
+                    error_message=item["error_message"],
+                )
+                if ctx is not None:
+                    ctx.failures.record(conn, **failure)
+                else:
+                    record_transform_failure_message(
+                        conn, run_id=run_id, **failure
+                    )
+                stats["failed"] += 1
+                continue
+
+            item["asset_id"] = asset_id
+            stats["success"] += 1
+            if ctx is not None and not ctx.should_write(conn, item):
+                continue
+            pending.append(item)
+
+        if len(pending) >= batch_size:
+            upsert_market_data_batch(conn, pending, ctx=ctx)
+            pending = []
+
+    upsert_market_data_batch(conn, pending, ctx=ctx)
+
+    logger.info(
+        "[TRANSFORM] %s parallel transform: %d ok, %d failed",
+        source,
+        stats["success"],
+        stats["failed"],
+    )
+
+    return stats
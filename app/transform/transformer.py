@@ -4,11 +4,16 @@ from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy import insert, select
 from pydantic import ValidationError
 from app.schemas.models import AssetMarketData
+from app.transform.candles import refresh_candles, touched_buckets
+from app.transform.consensus import refresh_consensus
+from app.core.checkpoints import bump_data_generation
 from app.schemas.tables import (
     assets,
     asset_sources,
     asset_market_data,
+    asset_latest_market_data,
     transform_failures,
+    RAW_TABLES,
 )
 import uuid
 
@@ -38,26 +43,38 @@ def resolve_asset_id(conn, *, source, source_asset_id, symbol, name):
         select(assets.c.asset_id).where(assets.c.symbol == symbol)
     ).scalar()
 
+    # ON CONFLICT + re-select keeps this safe when several rebuild workers
+    # resolve the same new asset concurrently.
     if not asset_id:
-        asset_id = uuid.uuid4()
         conn.execute(
-            insert(assets).values(
-                asset_id=asset_id,
+            pg_insert(assets).values(
+                asset_id=uuid.uuid4(),
                 symbol=symbol,
                 name=name,
-            )
+            ).on_conflict_do_nothing()
         )
+        asset_id = conn.execute(
+            select(assets.c.asset_id).where(
+                assets.c.symbol == symbol,
+                assets.c.name == name,
+            )
+        ).scalar_one()
 
     conn.execute(
-        insert(asset_sources).values(
+        pg_insert(asset_sources).values(
             asset_id=asset_id,
             source=source,
             source_asset_id=source_asset_id,
             created_at=datetime.now(timezone.utc),
-        )
+        ).on_conflict_do_nothing()
     )
 
-    return asset_id
+    return conn.execute(
+        select(asset_sources.c.asset_id).where(
+            asset_sources.c.source == source,
+            asset_sources.c.source_asset_id == source_asset_id,
+        )
+    ).scalar_one()
 
 
 
@@ -71,20 +88,124 @@ def record_transform_failure(
     payload,
     exc,
 ):
+    record_transform_failure_message(
+        conn,
+        source=source,
+        raw_table=raw_table,
+        raw_id=raw_id,
+        run_id=run_id,
+        payload=payload,
+        error_type=type(exc).__name__,
+        error_message=str(exc),
+    )
+
+
+def record_transform_failure_message(
+    conn,
+    *,
+    source,
+    raw_table,
+    raw_id,
+    run_id,
+    payload,
+    error_type,
+    error_message,
+):
+    if payload is None:
+        # Rows read from hot columns are loaded without their payload.
+        table = RAW_TABLES[raw_table]
+        payload = conn.execute(
+            select(table.c.payload).where(table.c.id == raw_id)
+        ).scalar()
+
     conn.execute(
         insert(transform_failures).values(
             source=source,
             raw_table=raw_table,
             raw_id=raw_id,
             run_id=run_id,
-            error_type=type(exc).__name__,
-            error_message=str(exc),
+            error_type=error_type,
+            error_message=error_message,
             payload=payload,
             failed_at=datetime.now(timezone.utc),
         )
     )
 
 
+def upsert_latest_market_data(conn, rows, *, overwrite=False):
+    """
+    Move asset_latest_market_data forward for the given observations. Only
+    the newest observation per (asset_id, source) is applied, and only if
+    it is newer than the stored one (or, with `overwrite`, as new: a
+    rebuild re-derives the stored observation itself). Written rows carry
+    a freshly bumped data_generation, which /stream/prices follows.
+    """
+    newest = {}
+    for r in rows:
+        key = (r["asset_id"], r["source"])
+        if key not in newest or r["last_updated"] > newest[key]["last_updated"]:
+            newest[key] = r
+
+    if not newest:
+        return
+
+    now = datetime.now(timezone.utc)
+    generation = bump_data_generation(conn)
+    stmt = pg_insert(asset_latest_market_data)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["asset_id", "source"],
+        set_={
+            "price_usd": stmt.excluded.price_usd,
+            "market_cap_usd": stmt.excluded.market_cap_usd,
+            "volume_24h_usd": stmt.excluded.volume_24h_usd,
+            "last_updated": stmt.excluded.last_updated,
+            "updated_at": stmt.excluded.updated_at,
+            "generation": stmt.excluded.generation,
+        },
+        where=(
+            asset_latest_market_data.c.last_updated <= stmt.excluded.last_updated
+            if overwrite
+            else asset_latest_market_data.c.last_updated < stmt.excluded.last_updated
+        ),
+    )
+
+    conn.execute(
+        stmt,
+        [
+            {
+                "asset_id": r["asset_id"],
+                "source": r["source"],
+                "price_usd": r["price_usd"],
+                "market_cap_usd": r["market_cap_usd"],
+                "volume_24h_usd": r["volume_24h_usd"],
+                "last_updated": r["last_updated"],
+                "updated_at": now,
+                "generation": generation,
+            }
+            for r in newest.values()
+        ],
+    )
+
+
+def _market_data_insert(ctx):
+    """
+    INSERT into asset_market_data. Existing observations are kept, unless
+    the context overwrites them (rebuilds after a transform logic change).
+    """
+    stmt = pg_insert(asset_market_data)
+    if ctx is None or not ctx.overwrite:
+        return stmt.on_conflict_do_nothing()
+
+    return stmt.on_conflict_do_update(
+        index_elements=["asset_id", "source", "last_updated"],
+        set_={
+            "price_usd": stmt.excluded.price_usd,
+            "market_cap_usd": stmt.excluded.market_cap_usd,
+            "volume_24h_usd": stmt.excluded.volume_24h_usd,
+        },
+    )
+
+
 def upsert_market_data(
     conn,
     *,
@@ -94,48 +215,104 @@ def upsert_market_data(
     market_cap_usd,
     volume_24h_usd,
     last_updated,
+    ctx=None,
 ):
-    stmt = pg_insert(asset_market_data).values(
-        asset_id=asset_id,
-        source=source,
-        price_usd=price_usd,
-        market_cap_usd=market_cap_usd,
-        volume_24h_usd=volume_24h_usd,
-        last_updated=last_updated,
+    record = {
+        "asset_id": asset_id,
+        "source": source,
+        "price_usd": price_usd,
+        "market_cap_usd": market_cap_usd,
+        "volume_24h_usd": volume_24h_usd,
+        "last_updated": last_updated,
+    }
+
+    stmt = _market_data_insert(ctx).values(
+        **record,
         created_at=datetime.now(timezone.utc),
-    ).on_conflict_do_nothing()
+    )
 
     conn.execute(stmt)
 
+    if ctx is not None:
+        ctx.track_written(record)
+    else:
+        upsert_latest_market_data(conn, [record])
+        refresh_candles(conn, touched_buckets([record]))
+        refresh_consensus(conn, [record["asset_id"]])
+
+
+def upsert_market_data_batch(conn, rows, ctx=None):
+    if not rows:
+        return
+
+    now = datetime.now(timezone.utc)
+    stmt = _market_data_insert(ctx)
+
+    conn.execute(
+        stmt,
+        [
+            {
+                "asset_id": r["asset_id"],
+                "source": r["source"],
+                "price_usd": r["price_usd"],
+                "market_cap_usd": r["market_cap_usd"],
+                "volume_24h_usd": r["volume_24h_usd"],
+                "last_updated": r["last_updated"],
+                "created_at": now,
+            }
+            for r in rows
+        ],
+    )
+
+    if ctx is not None:
+        for r in rows:
+            ctx.track_written(r)
+    else:
+        upsert_latest_market_data(conn, rows)
+        refresh_candles(conn, touched_buckets(rows))
+        refresh_consensus(conn, [r["asset_id"] for r in rows])
+
+
+def build_market_data(parsed, *, asset_id):
+    return AssetMarketData(
+        asset_id=asset_id,
+        source=parsed["source"],
+        price_usd=Decimal(parsed["price_usd"]),
+        market_cap_usd=Decimal(parsed["market_cap_usd"]),
+        volume_24h_usd=Decimal(parsed["volume_24h_usd"]),
+        last_updated=parsed["last_updated"],
+        created_at=datetime.now(timezone.utc),
+    )
+
 
 def validate_and_upsert_market_data(
     conn,
     *,
     run_id,
-    source,
-    raw_table,
     raw_row,
     asset_id,
-    price_usd,
-    market_cap_usd,
-    volume_24h_usd,
-    last_updated,
+    parsed,
+    ctx=None,
 ):
     try:
-        model = AssetMarketData(
-            asset_id=asset_id,
-            source=source,
-            price_usd=Decimal(price_usd),
-            market_cap_usd=Decimal(market_cap_usd),
-            volume_24h_usd=Decimal(volume_24h_usd),
-            last_updated=last_updated,
-            created_at=datetime.now(timezone.utc),
-        )
+        model = build_market_data(parsed, asset_id=asset_id)
     except ValidationError as e:
+        if ctx is not None:
+            ctx.failures.record(
+                conn,
+                source=parsed["source"],
+                raw_table=parsed["raw_table"],
+                raw_id=raw_row["id"],
+                payload=raw_row["payload"],
+                error_type=type(e).__name__,
+                error_message=str(e),
+            )
+            return False
+
         record_transform_failure(
             conn,
-            source=source,
-            raw_table=raw_table,
+            source=parsed["source"],
+            raw_table=parsed["raw_table"],
             raw_id=raw_row["id"],
             run_id=run_id,
             payload=raw_row["payload"],
@@ -143,6 +320,13 @@ def validate_and_upsert_market_data(
         )
         return False
 
+    if (
+        ctx is not None
+        and ctx.latest is not None
+        and not ctx.should_write(conn, model.model_dump())
+    ):
+        return True
+
     upsert_market_data(
         conn,
         asset_id=model.asset_id,
@@ -151,88 +335,153 @@ def validate_and_upsert_market_data(
         market_cap_usd=model.market_cap_usd,
         volume_24h_usd=model.volume_24h_usd,
         last_updated=model.last_updated,
+        ctx=ctx,
     )
 
     return True
 
 
-def transform_coingecko(conn, *, row, run_id):
+# ---------- PARSERS ----------
+# Pure payload -> field extraction, no DB access. Shared by the inline
+# transform below, the process-pool stage in app.transform.parallel and
+# ingest-time hot field extraction in app.ingestion.hot_fields.
+
+def _parse_utc(value):
+    return datetime.fromisoformat(
+        value.replace("Z", "")
+    ).replace(tzinfo=timezone.utc)
+
+
+def _parse_hot_fields(row, *, source, raw_table):
+    """
+    Parsed fields from the typed raw columns, or None if not extracted.
+    A row that carries its payload is always parsed from the payload, so a
+    rebuild re-derives fields the hot columns stored at ingest time.
+    """
+    last_updated = row.get("source_updated_at")
+    if last_updated is None or row.get("payload") is not None:
+        return None
+
+    if last_updated.tzinfo is None:
+        last_updated = last_updated.replace(tzinfo=timezone.utc)
+
+    return {
+        "source": source,
+        "raw_table": raw_table,
+        "source_asset_id": row["source_id"],
+        "symbol": row["symbol"],
+        "name": row["name"],
+        "price_usd": row["price_usd"],
+        "market_cap_usd": row["market_cap_usd"],
+        "volume_24h_usd": row["volume_24h_usd"],
+        "last_updated": last_updated,
+    }
+
+
+def parse_coingecko(row):
+    hot = _parse_hot_fields(row, source="coingecko", raw_table="raw_coingecko")
+    if hot:
+        return hot
+
     payload = row["payload"]
 
-    asset_id = resolve_asset_id(
-        conn,
-        source="coingecko",
-        source_asset_id=payload["id"],
-        symbol=payload["symbol"].upper(),
-        name=payload["name"],
-    )
+    return {
+        "source": "coingecko",
+        "raw_table": "raw_coingecko",
+        "source_asset_id": payload["id"],
+        "symbol": payload["symbol"].upper(),
+        "name": payload["name"],
+        "price_usd": payload["current_price"],
+        "market_cap_usd": payload["market_cap"],
+        "volume_24h_usd": payload["total_volume"],
+        "last_updated": _parse_utc(payload["last_updated"]),
+    }
 
-    return validate_and_upsert_market_data(
-        conn,
-        run_id=run_id,
-        source="coingecko",
-        raw_table="raw_coingecko",
-        raw_row=row,
-        asset_id=asset_id,
-        price_usd=payload["current_price"],
-        market_cap_usd=payload["market_cap"],
-        volume_24h_usd=payload["total_volume"],
-        last_updated=datetime.fromisoformat(
-            payload["last_updated"].replace("Z", "")
-        ).replace(tzinfo=timezone.utc),
-    )
 
+def parse_coinpaprika(row):
+    hot = _parse_hot_fields(row, source="coinpaprika", raw_table="raw_coinpaprika")
+    if hot:
+        return hot
 
-def transform_coinpaprika(conn, *, row, run_id):
     payload = row["payload"]
     quotes = payload["quotes"]["USD"]
 
+    return {
+        "source": "coinpaprika",
+        "raw_table": "raw_coinpaprika",
+        "source_asset_id": payload["id"],
+        "symbol": payload["symbol"].upper(),
+        "name": payload["name"],
+        "price_usd": quotes["price"],
+        "market_cap_usd": quotes["market_cap"],
+        "volume_24h_usd": quotes["volume_24h"],
+        "last_updated": _parse_utc(payload["last_updated"]),
+    }
+
+
+def parse_csv(row):
+    hot = _parse_hot_fields(row, source="csv", raw_table="raw_csv")
+    if hot:
+        return hot
+
+    payload = row["payload"]
+
+    return {
+        "source": "csv",
+        "raw_table": "raw_csv",
+        "source_asset_id": payload["Symbol"],
+        "symbol": payload["Symbol"].upper(),
+        "name": payload["Name"],
+        "price_usd": payload["Close"],
+        "market_cap_usd": payload["Marketcap"],
+        "volume_24h_usd": payload["Volume"],
+        "last_updated": datetime.fromisoformat(
+            payload["Date"]
+        ).replace(tzinfo=timezone.utc),
+    }
+
+
+PARSERS = {
+    "coingecko": parse_coingecko,
+    "coinpaprika": parse_coinpaprika,
+    "csv": parse_csv,
+}
+
+
+# ---------- TRANSFORMS ----------
+
+def _transform_row(conn, *, row, run_id, parsed, ctx=None):
     asset_id = resolve_asset_id(
         conn,
-        source="coinpaprika",
-        source_asset_id=payload["id"],
-        symbol=payload["symbol"].upper(),
-        name=payload["name"],
+        source=parsed["source"],
+        source_asset_id=parsed["source_asset_id"],
+        symbol=parsed["symbol"],
+        name=parsed["name"],
     )
 
     return validate_and_upsert_market_data(
         conn,
         run_id=run_id,
-        source="coinpaprika",
-        raw_table="raw_coinpaprika",
         raw_row=row,
         asset_id=asset_id,
-        price_usd=quotes["price"],
-        market_cap_usd=quotes["market_cap"],
-        volume_24h_usd=quotes["volume_24h"],
-        last_updated=datetime.fromisoformat(
-            payload["last_updated"].replace("Z", "")
-        ).replace(tzinfo=timezone.utc),
+        parsed=parsed,
+        ctx=ctx,
     )
 
 
-def transform_csv(conn, *, row, run_id):
-    payload = row["payload"]
+def transform_coingecko(conn, *, row, run_id, ctx=None):
+    return _transform_row(
+        conn, row=row, run_id=run_id, parsed=parse_coingecko(row), ctx=ctx
+    )
 
-    asset_id = resolve_asset_id(
-        conn,
-        source="csv",
-        source_asset_id=payload["Symbol"],
-        symbol=payload["Symbol"].upper(),
-        name=payload["Name"],
+
+def transform_coinpaprika(conn, *, row, run_id, ctx=None):
+    return _transform_row(
+        conn, row=row, run_id=run_id, parsed=parse_coinpaprika(row), ctx=ctx
     )
 
-    return validate_and_upsert_market_data(
-        conn,
-        run_id=run_id,
-        source="csv",
-        raw_table="raw_csv",
-        raw_row=row,
-        asset_id=asset_id,
-        price_usd=payload["Close"],
-        market_cap_usd=payload["Marketcap"],
-        volume_24h_usd=payload["Volume"],
-        last_updated=datetime.fromisoformat(
-            payload["Date"]
-        ).replace(tzinfo=timezone.utc),
+
+def transform_csv(conn, *, row, run_id, ctx=None):
+    return _transform_row(
+        conn, row=row, run_id=run_id, parsed=parse_csv(row), ctx=ctx
     )
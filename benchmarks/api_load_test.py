@@ -0,0 +1,152 @@
+"""
+Closed-loop HTTP load test for the API read endpoints.
+
+Each of --concurrency workers sends requests back to back for --duration
+seconds, cycling through --paths. Reports throughput and latency
+percentiles per target, so two deployments can be compared side by side,
+e.g. the async API against the previous sync build:
+
+    uvicorn app.api.main:app --port 8000               # this build
+    git worktree add /tmp/sync <sync-commit> && \\
+        (cd /tmp/sync && uvicorn app.api.main:app --port 8001)
+
+    python -m benchmarks.api_load_test \\
+        --target async=http://localhost:8000 \\
+        --target sync=http://localhost:8001 \\
+        --concurrency 256 --duration 30
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = ["/data", "/stats", "/runs", "/health", "/compare-runs"]
+
+
+async def _worker(client, paths, deadline, latencies, errors, offset):
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        elapsed = time.perf_counter() - start
+
+        if ok:
+            latencies.append(elapsed)
+        else:
+            errors.append(path)
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+async def run_target(name, base_url, *, paths, concurrency, duration, warmup):
+    limits = httpx.Limits(
+        max_connections=concurrency,
+        max_keepalive_connections=concurrency,
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        limits=limits,
+        timeout=60,
+    ) as client:
+        # Fill connection pools on both sides before measuring.
+        await asyncio.gather(
+            *(
+                _worker(client, paths, time.perf_counter() + warmup, [], [], i)
+                for i in range(concurrency)
+            )
+        )
+
+        latencies, errors = [], []
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _worker(
+                    client,
+                    paths,
+                    start + duration,
+                    latencies,
+                    errors,
+                    i,
+                )
+                for i in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    return {
+        "target": name,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "mean_ms": (statistics.mean(latencies) if latencies else float("nan")) * 1000,
+    }
+
+
+def _parse_target(value):
+    name, sep, url = value.partition("=")
+    if not sep:
+        return url or name, name
+    return name, url
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--target",
+        action="append",
+        type=_parse_target,
+        required=True,
+        help="name=base_url (repeatable)",
+    )
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(
+        f"concurrency={args.concurrency} duration={args.duration}s "
+        f"paths={' '.join(args.paths)}"
+    )
+    print(
+        f"{'target':>10} {'requests':>9} {'errors':>7} {'req/s':>9} "
+        f"{'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}"
+    )
+
+    for name, url in args.target:
+        r = asyncio.run(
+            run_target(
+                name,
+                url,
+                paths=args.paths,
+                concurrency=args.concurrency,
+                duration=args.duration,
+                warmup=args.warmup,
+            )
+        )
+        print(
+            f"{r['target']:>10} {r['requests']:>9} {r['errors']:>7} "
+            f"{r['rps']:>9.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+            f"{r['mean_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
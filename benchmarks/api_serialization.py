@@ -0,0 +1,126 @@
+"""
+Serialization cost of a 500-row /data response: FastAPI's default path
+(RowMappings through jsonable_encoder, then json.dumps) against the fast
+path /data uses now (row_dicts + FastJSONResponse).
+
+Rows have the /data columns and Decimal NUMERIC values, read from an
+in-memory SQLite table. The Result is buffered up front, so no HTTP or
+database time is measured; row conversion is, since it is part of what
+each path costs.
+
+    python -m benchmarks.api_serialization --rows 500 --repeat 200
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, select
+
+from app.api.responses import FastJSONResponse, row_dicts
+from app.schemas.tables import metadata, assets, asset_market_data
+
+
+def make_rows(n):
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine, tables=[assets, asset_market_data])
+    now = datetime.now(timezone.utc)
+
+    with engine.begin() as conn:
+        ids = [uuid.uuid4() for _ in range(n)]
+        conn.execute(
+            assets.insert(),
+            [
+                {"asset_id": a, "symbol": f"C{i}", "name": f"Coin {i}"}
+                for i, a in enumerate(ids)
+            ],
+        )
+        conn.execute(
+            asset_market_data.insert(),
+            [
+                {
+                    "asset_id": a,
+                    "source": "coingecko",
+                    "price_usd": Decimal(f"{1 + i / 7:.8f}"),
+                    "market_cap_usd": Decimal(1_000_000_000 + i * 12345),
+                    "volume_24h_usd": Decimal(f"{10_000 + i / 3:.4f}"),
+                    "last_updated": now - timedelta(minutes=i),
+                    "created_at": now,
+                }
+                for i, a in enumerate(ids)
+            ],
+        )
+
+        return conn.execute(
+            select(
+                assets.c.symbol,
+                assets.c.name,
+                asset_market_data.c.source,
+                asset_market_data.c.price_usd,
+                asset_market_data.c.market_cap_usd,
+                asset_market_data.c.volume_24h_usd,
+                asset_market_data.c.last_updated,
+            ).select_from(
+                asset_market_data.join(
+                    assets,
+                    assets.c.asset_id == asset_market_data.c.asset_id,
+                )
+            )
+        ).freeze()
+
+
+def _payload(data, rows):
+    return {
+        "data": data,
+        "pagination": {"limit": rows, "offset": 0, "count": rows},
+        "request_id": str(uuid.uuid4()),
+        "api_latency_ms": 0,
+    }
+
+
+def default_path(frozen, rows):
+    data = frozen().mappings().all()
+    return JSONResponse(jsonable_encoder(_payload(list(data), rows))).body
+
+
+def fast_path(frozen, rows):
+    data = row_dicts(frozen())
+    return FastJSONResponse(_payload(data, rows)).body
+
+
+def timed(fn, frozen, rows, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(frozen, rows)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    frozen = make_rows(args.rows)
+    assert json.loads(default_path(frozen, args.rows))["data"] == json.loads(
+        fast_path(frozen, args.rows)
+    )["data"]
+
+    default_ms = timed(default_path, frozen, args.rows, args.repeat)
+    fast_ms = timed(fast_path, frozen, args.rows, args.repeat)
+
+    print(f"rows={args.rows} repeat={args.repeat} (median per response)")
+    print(f"{'jsonable_encoder':>18} {default_ms:8.2f} ms")
+    print(f"{'FastJSONResponse':>18} {fast_ms:8.2f} ms")
+    print(f"{'saved':>18} {default_ms - fast_ms:8.2f} ms ({default_ms / fast_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
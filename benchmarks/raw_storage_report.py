@@ -0,0 +1,161 @@
+"""
+Size and ingest/dedupe latency of the raw_* tables.
+
+Run once before and once after migrating to jsonb payloads / bytea hashes
+and compare the two reports:
+
+    DATABASE_URL=... python -m benchmarks.raw_storage_report --rows 5000
+
+Sizes come from pg_total_relation_size / pg_relation_size. Latency is
+measured with the same dedupe-lookup + insert statements the ingesters run,
+on synthetic rows inside a transaction that is rolled back. The hash and
+payload are encoded to match whichever column types the table currently has.
+"""
+import argparse
+import hashlib
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.core.db import get_engine
+
+RAW_TABLES = ("raw_coinpaprika", "raw_coingecko", "raw_csv")
+
+
+def _mb(n):
+    return f"{n / 1024 / 1024:9.2f} MB"
+
+
+def report_sizes(conn):
+    print(f"{'relation':<45} {'size':>12}")
+
+    for table in RAW_TABLES:
+        rows = conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+        heap, total = conn.execute(
+            text(
+                "SELECT pg_relation_size(:t), pg_total_relation_size(:t)"
+            ),
+            {"t": table},
+        ).one()
+        print(f"{table + f' ({rows} rows)':<45}")
+        print(f"{'  heap':<45} {_mb(heap):>12}")
+        print(f"{'  total (heap + toast + indexes)':<45} {_mb(total):>12}")
+
+        indexes = conn.execute(
+            text(
+                """
+                SELECT indexrelid::regclass::text, pg_relation_size(indexrelid)
+                FROM pg_index
+                WHERE indrelid = CAST(:t AS regclass)
+                ORDER BY 1
+                """
+            ),
+            {"t": table},
+        ).all()
+        for name, size in indexes:
+            print(f"{'  ' + name:<45} {_mb(size):>12}")
+
+
+def _column_types(conn, table):
+    return dict(
+        conn.execute(
+            text(
+                """
+                SELECT column_name, data_type
+                FROM information_schema.columns
+                WHERE table_name = :t
+                  AND column_name IN ('payload', 'payload_hash')
+                """
+            ),
+            {"t": table},
+        ).all()
+    )
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return (
+        statistics.median(samples),
+        samples[int(len(samples) * 0.95) - 1],
+    )
+
+
+def report_latency(engine, table, n):
+    lookups, inserts = [], []
+
+    with engine.connect() as conn:
+        types = _column_types(conn, table)
+    binary = types.get("payload_hash") == "bytea"
+    payload_cast = "jsonb" if types.get("payload") == "jsonb" else "json"
+
+    with engine.connect() as conn:
+        tx = conn.begin()
+        try:
+            for i in range(n):
+                payload = {
+                    "id": f"bench-{uuid.uuid4()}",
+                    "symbol": "bench",
+                    "price_usd": i,
+                    "last_updated": datetime.now(timezone.utc).isoformat(),
+                }
+                raw = json.dumps(payload, sort_keys=True)
+                digest = hashlib.sha256(raw.encode())
+                payload_hash = digest.digest() if binary else digest.hexdigest()
+
+                start = time.perf_counter()
+                conn.execute(
+                    text(
+                        f"SELECT id FROM {table} "
+                        f"WHERE source_id = :sid AND payload_hash = :h"
+                    ),
+                    {"sid": payload["id"], "h": payload_hash},
+                ).first()
+                lookups.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                conn.execute(
+                    text(
+                        f"INSERT INTO {table} "
+                        f"(id, source_id, payload, payload_hash, ingested_at) "
+                        f"VALUES (:id, :sid, CAST(:p AS {payload_cast}), :h, now())"
+                    ),
+                    {
+                        "id": uuid.uuid4(),
+                        "sid": payload["id"],
+                        "p": raw,
+                        "h": payload_hash,
+                    },
+                )
+                inserts.append(time.perf_counter() - start)
+        finally:
+            tx.rollback()
+
+    for label, samples in (("dedupe lookup", lookups), ("insert", inserts)):
+        p50, p95 = _percentiles(samples)
+        print(
+            f"{table:<18} {label:<14} "
+            f"p50={p50 * 1000:7.3f} ms  p95={p95 * 1000:7.3f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = get_engine()
+
+    with engine.connect() as conn:
+        report_sizes(conn)
+
+    print()
+    for table in RAW_TABLES:
+        report_latency(engine, table, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Throughput of the parse/validate stage vs. process-pool worker count.
+
+Runs the same stage the ETL uses in TRANSFORM_WORKERS mode
+(app.transform.parallel.parse_batch) over synthetic coingecko payloads.
+No database is involved, so the numbers isolate the CPU-bound part that the
+single writer no longer has to do.
+
+    python -m benchmarks.transform_parse_scaling --rows 200000 --workers 0 1 2 4 8
+"""
+import argparse
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from app.transform.parallel import parse_batch, _batched, _imap_bounded
+
+
+def make_rows(n):
+    return [
+        {
+            "id": uuid.uuid4(),
+            "payload": {
+                "id": f"coin-{i % 5000}",
+                "symbol": f"c{i % 5000}",
+                "name": f"Coin {i % 5000}",
+                "current_price": 1 + (i % 997) / 7,
+                "market_cap": 1_000_000 + i,
+                "total_volume": 10_000 + i,
+                "last_updated": f"2024-01-{1 + i % 28:02d}T{i % 24:02d}:00:00.000Z",
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def run(rows, workers, batch_size):
+    start = time.perf_counter()
+    parsed = 0
+
+    if workers == 0:
+        for batch in _batched(rows, batch_size):
+            parsed += len(parse_batch("coingecko", batch))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for batch in _imap_bounded(
+                pool,
+                partial(parse_batch, "coingecko"),
+                _batched(rows, batch_size),
+                2 * workers,
+            ):
+                parsed += len(batch)
+
+    elapsed = time.perf_counter() - start
+    assert parsed == len(rows)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[0, 1, 2, 4, os.cpu_count() or 1],
+    )
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    baseline = None
+
+    print(f"rows={args.rows} batch_size={args.batch_size} cpus={os.cpu_count()}")
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>10} {'speedup':>8}")
+
+    for workers in args.workers:
+        elapsed = run(rows, workers, args.batch_size)
+        if baseline is None:
+            baseline = elapsed
+        label = "inline" if workers == 0 else str(workers)
+        print(
+            f"{label:>8} {elapsed:9.2f} {args.rows / elapsed:10.0f} "
+            f"{baseline / elapsed:7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""add failure fingerprints and per-run transform failure summaries
+
+Revision ID: 4b7e1c2a9d10
+Revises: dd2aab32ebbf
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "4b7e1c2a9d10"
+down_revision: Union[str, Sequence[str], None] = "dd2aab32ebbf"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transform_failures",
+        sa.Column("fingerprint", sa.Text(), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_transform_failures_fingerprint"),
+        "transform_failures",
+        ["fingerprint"],
+        unique=False,
+    )
+
+    op.create_table(
+        "transform_failure_summaries",
+        sa.Column("run_id", postgresql.UUID(), nullable=False),
+        sa.Column("fingerprint", sa.Text(), nullable=False),
+        sa.Column("source", sa.Text(), nullable=False),
+        sa.Column("raw_table", sa.Text(), nullable=False),
+        sa.Column("error_type", sa.Text(), nullable=False),
+        sa.Column("normalized_error", sa.Text(), nullable=False),
+        sa.Column("failure_count", sa.Integer(), nullable=False),
+        sa.Column("sampled_count", sa.Integer(), nullable=False),
+        sa.Column("first_failed_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("last_failed_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("run_id", "fingerprint"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("transform_failure_summaries")
+    op.drop_index(
+        op.f("ix_transform_failures_fingerprint"),
+        table_name="transform_failures",
+    )
+    op.drop_column("transform_failures", "fingerprint")
@@ -0,0 +1,190 @@
+"""add typed hot field columns to raw tables and backfill them
+
+Revision ID: 5c2d8e4f1a37
+Revises: 4b7e1c2a9d10
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "5c2d8e4f1a37"
+down_revision: Union[str, Sequence[str], None] = "4b7e1c2a9d10"
+branch_labels = None
+depends_on = None
+
+RAW_TABLES = {
+    "raw_coinpaprika": "coinpaprika",
+    "raw_coingecko": "coingecko",
+    "raw_csv": "csv",
+}
+
+BACKFILL_BATCH_SIZE = 5000
+
+HOT_FIELDS = (
+    "symbol",
+    "name",
+    "price_usd",
+    "market_cap_usd",
+    "volume_24h_usd",
+    "source_updated_at",
+)
+
+
+# Frozen copy of app.ingestion.hot_fields.extract_hot_fields and the
+# transform parsers as of this revision, so the backfill does not change
+# with later app code.
+
+def _parse_utc(value):
+    return datetime.fromisoformat(value.replace("Z", "")).replace(tzinfo=timezone.utc)
+
+
+def _parse_coingecko(payload):
+    return (
+        payload["symbol"].upper(),
+        payload["name"],
+        payload["current_price"],
+        payload["market_cap"],
+        payload["total_volume"],
+        _parse_utc(payload["last_updated"]),
+    )
+
+
+def _parse_coinpaprika(payload):
+    quotes = payload["quotes"]["USD"]
+    return (
+        payload["symbol"].upper(),
+        payload["name"],
+        quotes["price"],
+        quotes["market_cap"],
+        quotes["volume_24h"],
+        _parse_utc(payload["last_updated"]),
+    )
+
+
+def _parse_csv(payload):
+    return (
+        payload["Symbol"].upper(),
+        payload["Name"],
+        payload["Close"],
+        payload["Marketcap"],
+        payload["Volume"],
+        datetime.fromisoformat(payload["Date"]).replace(tzinfo=timezone.utc),
+    )
+
+
+_PARSERS = {
+    "coingecko": _parse_coingecko,
+    "coinpaprika": _parse_coinpaprika,
+    "csv": _parse_csv,
+}
+
+
+def _extract_hot_fields(source, payload):
+    """All hot fields, or all None if any is missing or malformed."""
+    try:
+        symbol, name, price, market_cap, volume, updated_at = _PARSERS[source](payload)
+        return {
+            "symbol": symbol,
+            "name": name,
+            "price_usd": Decimal(price),
+            "market_cap_usd": Decimal(market_cap),
+            "volume_24h_usd": Decimal(volume),
+            "source_updated_at": updated_at,
+        }
+    except (KeyError, TypeError, ValueError, AttributeError, InvalidOperation):
+        return dict.fromkeys(HOT_FIELDS)
+
+
+def _backfill(conn, table_name, source):
+    # Same extraction as ingest time (frozen above), so backfilled rows
+    # match new ones. Keyset over id; rows that fail extraction stay NULL.
+    table = sa.table(
+        table_name,
+        sa.column("id", sa.UUID()),
+        sa.column("payload", sa.JSON()),
+        sa.column("symbol", sa.Text()),
+        sa.column("name", sa.Text()),
+        sa.column("price_usd", sa.NUMERIC()),
+        sa.column("market_cap_usd", sa.NUMERIC()),
+        sa.column("volume_24h_usd", sa.NUMERIC()),
+        sa.column("source_updated_at", sa.TIMESTAMP(timezone=True)),
+    )
+
+    update = (
+        sa.update(table)
+        .where(table.c.id == sa.bindparam("_id"))
+        .values({name: sa.bindparam(f"_{name}") for name in HOT_FIELDS})
+    )
+
+    last_id = None
+    while True:
+        stmt = (
+            sa.select(table.c.id, table.c.payload)
+            .order_by(table.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        )
+        if last_id is not None:
+            stmt = stmt.where(table.c.id > last_id)
+
+        rows = conn.execute(stmt).all()
+        if not rows:
+            return
+
+        params = []
+        for row in rows:
+            fields = _extract_hot_fields(source, row.payload)
+            if fields["source_updated_at"] is not None:
+                params.append(
+                    {"_id": row.id, **{f"_{k}": v for k, v in fields.items()}}
+                )
+
+        if params:
+            conn.execute(update, params)
+
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    for table_name, source in RAW_TABLES.items():
+        op.add_column(table_name, sa.Column("symbol", sa.Text(), nullable=True))
+        op.add_column(table_name, sa.Column("name", sa.Text(), nullable=True))
+        op.add_column(table_name, sa.Column("price_usd", sa.NUMERIC(), nullable=True))
+        op.add_column(table_name, sa.Column("market_cap_usd", sa.NUMERIC(), nullable=True))
+        op.add_column(table_name, sa.Column("volume_24h_usd", sa.NUMERIC(), nullable=True))
+        op.add_column(
+            table_name,
+            sa.Column("source_updated_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        )
+
+        _backfill(op.get_bind(), table_name, source)
+
+        op.create_index(
+            op.f(f"ix_{table_name}_symbol"),
+            table_name,
+            ["symbol"],
+            unique=False,
+        )
+        op.create_index(
+            op.f(f"ix_{table_name}_source_updated_at"),
+            table_name,
+            ["source_updated_at"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    for table_name in RAW_TABLES:
+        op.drop_index(op.f(f"ix_{table_name}_source_updated_at"), table_name=table_name)
+        op.drop_index(op.f(f"ix_{table_name}_symbol"), table_name=table_name)
+        for column in (
+            "source_updated_at",
+            "volume_24h_usd",
+            "market_cap_usd",
+            "price_usd",
+            "name",
+            "symbol",
+        ):
+            op.drop_column(table_name, column)
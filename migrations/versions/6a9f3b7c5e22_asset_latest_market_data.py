@@ -0,0 +1,63 @@
+"""add asset_latest_market_data snapshot table
+
+Revision ID: 6a9f3b7c5e22
+Revises: 5c2d8e4f1a37
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "6a9f3b7c5e22"
+down_revision: Union[str, Sequence[str], None] = "5c2d8e4f1a37"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "asset_latest_market_data",
+        sa.Column("asset_id", postgresql.UUID(), nullable=False),
+        sa.Column("source", sa.Text(), nullable=False),
+        sa.Column("price_usd", sa.NUMERIC(), nullable=True),
+        sa.Column("market_cap_usd", sa.NUMERIC(), nullable=True),
+        sa.Column("volume_24h_usd", sa.NUMERIC(), nullable=True),
+        sa.Column("last_updated", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["asset_id"],
+            ["assets.asset_id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("asset_id", "source"),
+    )
+
+    op.execute(
+        """
+        INSERT INTO asset_latest_market_data (
+            asset_id, source, price_usd, market_cap_usd,
+            volume_24h_usd, last_updated, updated_at
+        )
+        SELECT DISTINCT ON (asset_id, source)
+            asset_id, source, price_usd, market_cap_usd,
+            volume_24h_usd, last_updated, now()
+        FROM asset_market_data
+        ORDER BY asset_id, source, last_updated DESC
+        """
+    )
+
+    op.create_index(
+        op.f("ix_asset_latest_market_data_last_updated"),
+        "asset_latest_market_data",
+        ["last_updated"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_asset_latest_market_data_last_updated"),
+        table_name="asset_latest_market_data",
+    )
+    op.drop_table("asset_latest_market_data")
@@ -0,0 +1,159 @@
+"""partition asset_market_data by month on last_updated
+
+Revision ID: 7d3a1e9b4c68
+Revises: 6a9f3b7c5e22
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "7d3a1e9b4c68"
+down_revision: Union[str, Sequence[str], None] = "6a9f3b7c5e22"
+branch_labels = None
+depends_on = None
+
+# Future months created up front; the partition maintenance job keeps this
+# window rolling afterwards.
+MONTHS_AHEAD = 3
+
+
+def _month_start(ts):
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(ts, months):
+    index = ts.year * 12 + ts.month - 1 + months
+    return ts.replace(year=index // 12, month=index % 12 + 1)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    op.execute("ALTER TABLE asset_market_data RENAME TO asset_market_data_old")
+    op.execute(
+        "ALTER TABLE asset_market_data_old "
+        "RENAME CONSTRAINT asset_market_data_pkey TO asset_market_data_old_pkey"
+    )
+    op.execute(
+        "ALTER TABLE asset_market_data_old "
+        "RENAME CONSTRAINT uq_asset_market_source_time "
+        "TO uq_asset_market_source_time_old"
+    )
+    op.execute(
+        "ALTER TABLE asset_market_data_old "
+        "RENAME CONSTRAINT asset_market_data_asset_id_fkey "
+        "TO asset_market_data_old_asset_id_fkey"
+    )
+
+    # The partition key has to be part of every unique constraint.
+    op.execute(
+        """
+        CREATE TABLE asset_market_data (
+            id UUID NOT NULL,
+            asset_id UUID NOT NULL,
+            source TEXT NOT NULL,
+            price_usd NUMERIC,
+            market_cap_usd NUMERIC,
+            volume_24h_usd NUMERIC,
+            last_updated TIMESTAMP WITH TIME ZONE NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT asset_market_data_pkey PRIMARY KEY (id, last_updated),
+            CONSTRAINT uq_asset_market_source_time
+                UNIQUE (asset_id, source, last_updated),
+            CONSTRAINT asset_market_data_asset_id_fkey
+                FOREIGN KEY (asset_id) REFERENCES assets (asset_id)
+                ON DELETE CASCADE
+        ) PARTITION BY RANGE (last_updated)
+        """
+    )
+
+    oldest = conn.execute(
+        sa.text("SELECT min(last_updated) FROM asset_market_data_old")
+    ).scalar()
+
+    now = datetime.now(timezone.utc)
+    start = _month_start(oldest or now)
+    stop = _add_months(_month_start(now), MONTHS_AHEAD + 1)
+
+    while start < stop:
+        end = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE asset_market_data_p{start:%Y%m} "
+            f"PARTITION OF asset_market_data "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+    op.execute(
+        "CREATE TABLE asset_market_data_default "
+        "PARTITION OF asset_market_data DEFAULT"
+    )
+
+    op.execute(
+        """
+        INSERT INTO asset_market_data (
+            id, asset_id, source, price_usd, market_cap_usd,
+            volume_24h_usd, last_updated, created_at
+        )
+        SELECT
+            id, asset_id, source, price_usd, market_cap_usd,
+            volume_24h_usd, last_updated, created_at
+        FROM asset_market_data_old
+        """
+    )
+
+    op.drop_table("asset_market_data_old")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE asset_market_data RENAME TO asset_market_data_part")
+    op.execute(
+        "ALTER TABLE asset_market_data_part "
+        "RENAME CONSTRAINT asset_market_data_pkey TO asset_market_data_part_pkey"
+    )
+    op.execute(
+        "ALTER TABLE asset_market_data_part "
+        "RENAME CONSTRAINT uq_asset_market_source_time "
+        "TO uq_asset_market_source_time_part"
+    )
+    op.execute(
+        "ALTER TABLE asset_market_data_part "
+        "RENAME CONSTRAINT asset_market_data_asset_id_fkey "
+        "TO asset_market_data_part_asset_id_fkey"
+    )
+
+    op.execute(
+        """
+        CREATE TABLE asset_market_data (
+            id UUID NOT NULL,
+            asset_id UUID NOT NULL,
+            source TEXT NOT NULL,
+            price_usd NUMERIC,
+            market_cap_usd NUMERIC,
+            volume_24h_usd NUMERIC,
+            last_updated TIMESTAMP WITH TIME ZONE NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT asset_market_data_pkey PRIMARY KEY (id),
+            CONSTRAINT uq_asset_market_source_time
+                UNIQUE (asset_id, source, last_updated),
+            CONSTRAINT asset_market_data_asset_id_fkey
+                FOREIGN KEY (asset_id) REFERENCES assets (asset_id)
+                ON DELETE CASCADE
+        )
+        """
+    )
+
+    op.execute(
+        """
+        INSERT INTO asset_market_data
+        SELECT
+            id, asset_id, source, price_usd, market_cap_usd,
+            volume_24h_usd, last_updated, created_at
+        FROM asset_market_data_part
+        """
+    )
+
+    # Dropping the parent drops every partition with it.
+    op.drop_table("asset_market_data_part")
@@ -0,0 +1,41 @@
+"""indexes for hot ETL and API queries
+
+Revision ID: 8e4b2f6a1d93
+Revises: 7d3a1e9b4c68
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "8e4b2f6a1d93"
+down_revision: Union[str, Sequence[str], None] = "7d3a1e9b4c68"
+branch_labels = None
+depends_on = None
+
+RAW_TABLES = ("raw_coinpaprika", "raw_coingecko", "raw_csv")
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_etl_runs_source_started_at",
+        "etl_runs",
+        ["source", sa.text("started_at DESC")],
+        unique=False,
+    )
+
+    for table in RAW_TABLES:
+        op.create_index(
+            f"ix_{table}_ingested_at_brin",
+            table,
+            ["ingested_at"],
+            unique=False,
+            postgresql_using="brin",
+        )
+
+
+def downgrade() -> None:
+    for table in RAW_TABLES:
+        op.drop_index(f"ix_{table}_ingested_at_brin", table_name=table)
+
+    op.drop_index("ix_etl_runs_source_started_at", table_name="etl_runs")
@@ -0,0 +1,158 @@
+"""raw payloads as jsonb, payload hashes as 32-byte bytea
+
+Revision ID: 9f5c3a7b2e14
+Revises: 8e4b2f6a1d93
+
+Online, expand/contract style, per raw table:
+
+1. add payload_jsonb / payload_hash_bin next to the old columns, with a
+   trigger that fills them for rows written while the backfill runs
+2. backfill in small autocommitted batches, build the new unique index
+   CONCURRENTLY and validate a NOT NULL check without blocking writes
+3. swap the columns in one short transaction
+
+Deploy the ingestion code that writes binary hashes after the upgrade.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "9f5c3a7b2e14"
+down_revision: Union[str, Sequence[str], None] = "8e4b2f6a1d93"
+branch_labels = None
+depends_on = None
+
+RAW_TABLES = ("raw_coinpaprika", "raw_coingecko", "raw_csv")
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _backfill(conn, table):
+    # Keyset over the primary key: each batch starts where the previous one
+    # ended instead of rescanning already converted rows (and their dead
+    # tuples) for `payload_hash_bin IS NULL`. Rows inserted behind the
+    # cursor meanwhile are filled by the trigger.
+    last_id = None
+    while True:
+        after = "WHERE id > :last_id" if last_id is not None else ""
+        ids = conn.execute(
+            sa.text(
+                f"""
+                UPDATE {table}
+                SET payload_jsonb = payload::jsonb,
+                    payload_hash_bin = decode(payload_hash, 'hex')
+                WHERE id IN (
+                    SELECT id FROM {table}
+                    {after}
+                    ORDER BY id
+                    LIMIT :batch
+                )
+                RETURNING id
+                """
+            ),
+            {"batch": BACKFILL_BATCH_SIZE, "last_id": last_id},
+        ).scalars().all()
+        if not ids:
+            return
+
+        last_id = max(ids)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION raw_payload_sync() RETURNS trigger AS $$
+        BEGIN
+            NEW.payload_jsonb := NEW.payload::jsonb;
+            NEW.payload_hash_bin := decode(NEW.payload_hash, 'hex');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+    for table in RAW_TABLES:
+        op.add_column(table, sa.Column("payload_jsonb", postgresql.JSONB()))
+        op.add_column(table, sa.Column("payload_hash_bin", sa.LargeBinary()))
+        op.execute(
+            f"CREATE TRIGGER {table}_payload_sync "
+            f"BEFORE INSERT OR UPDATE OF payload, payload_hash ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION raw_payload_sync()"
+        )
+
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+
+        for table in RAW_TABLES:
+            _backfill(conn, table)
+
+            conn.execute(
+                sa.text(
+                    f"CREATE UNIQUE INDEX CONCURRENTLY uq_{table}_source_payload_bin "
+                    f"ON {table} (source_id, payload_hash_bin)"
+                )
+            )
+            conn.execute(
+                sa.text(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {table}_payload_bin_not_null "
+                    f"CHECK (payload_jsonb IS NOT NULL AND payload_hash_bin IS NOT NULL) "
+                    f"NOT VALID"
+                )
+            )
+            conn.execute(
+                sa.text(
+                    f"ALTER TABLE {table} "
+                    f"VALIDATE CONSTRAINT {table}_payload_bin_not_null"
+                )
+            )
+
+    for table in RAW_TABLES:
+        op.execute(f"DROP TRIGGER {table}_payload_sync ON {table}")
+
+        # SET NOT NULL reuses the validated check instead of scanning.
+        op.alter_column(table, "payload_jsonb", nullable=False)
+        op.alter_column(table, "payload_hash_bin", nullable=False)
+        op.drop_constraint(f"{table}_payload_bin_not_null", table, type_="check")
+
+        op.drop_constraint(f"uq_{table}_source_payload", table, type_="unique")
+        op.drop_index(f"ix_{table}_payload_hash", table_name=table)
+        op.drop_column(table, "payload")
+        op.drop_column(table, "payload_hash")
+
+        op.alter_column(table, "payload_jsonb", new_column_name="payload")
+        op.alter_column(table, "payload_hash_bin", new_column_name="payload_hash")
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT uq_{table}_source_payload "
+            f"UNIQUE USING INDEX uq_{table}_source_payload_bin"
+        )
+
+    op.execute("DROP FUNCTION raw_payload_sync()")
+
+
+def downgrade() -> None:
+    for table in RAW_TABLES:
+        op.alter_column(
+            table,
+            "payload",
+            type_=sa.JSON(),
+            postgresql_using="payload::json",
+        )
+        op.drop_constraint(f"uq_{table}_source_payload", table, type_="unique")
+        op.alter_column(
+            table,
+            "payload_hash",
+            type_=sa.Text(),
+            postgresql_using="encode(payload_hash, 'hex')",
+        )
+        op.create_unique_constraint(
+            f"uq_{table}_source_payload",
+            table,
+            ["source_id", "payload_hash"],
+        )
+        op.create_index(
+            f"ix_{table}_payload_hash",
+            table,
+            ["payload_hash"],
+            unique=False,
+        )
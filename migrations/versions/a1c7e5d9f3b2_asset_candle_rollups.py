@@ -0,0 +1,74 @@
+"""add hourly and daily candle rollup tables
+
+Revision ID: a1c7e5d9f3b2
+Revises: 9f5c3a7b2e14
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "a1c7e5d9f3b2"
+down_revision: Union[str, Sequence[str], None] = "9f5c3a7b2e14"
+branch_labels = None
+depends_on = None
+
+CANDLE_TABLES = {"asset_candles_1h": "hour", "asset_candles_1d": "day"}
+
+
+def upgrade() -> None:
+    for table, unit in CANDLE_TABLES.items():
+        op.create_table(
+            table,
+            sa.Column("asset_id", postgresql.UUID(), nullable=False),
+            sa.Column("source", sa.Text(), nullable=False),
+            sa.Column("bucket_start", sa.TIMESTAMP(timezone=True), nullable=False),
+            sa.Column("open_usd", sa.NUMERIC(), nullable=False),
+            sa.Column("high_usd", sa.NUMERIC(), nullable=False),
+            sa.Column("low_usd", sa.NUMERIC(), nullable=False),
+            sa.Column("close_usd", sa.NUMERIC(), nullable=False),
+            sa.Column("volume_24h_usd", sa.NUMERIC(), nullable=True),
+            sa.Column("points", sa.Integer(), nullable=False),
+            sa.Column("first_at", sa.TIMESTAMP(timezone=True), nullable=False),
+            sa.Column("last_at", sa.TIMESTAMP(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False),
+            sa.ForeignKeyConstraint(
+                ["asset_id"],
+                ["assets.asset_id"],
+                ondelete="CASCADE",
+            ),
+            sa.PrimaryKeyConstraint("asset_id", "source", "bucket_start"),
+        )
+
+        # Buckets are UTC, matching app.transform.candles.bucket_start.
+        op.execute(
+            f"""
+            INSERT INTO {table} (
+                asset_id, source, bucket_start,
+                open_usd, high_usd, low_usd, close_usd, volume_24h_usd,
+                points, first_at, last_at, updated_at
+            )
+            SELECT
+                asset_id,
+                source,
+                date_trunc('{unit}', last_updated AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                (array_agg(price_usd ORDER BY last_updated))[1],
+                max(price_usd),
+                min(price_usd),
+                (array_agg(price_usd ORDER BY last_updated DESC))[1],
+                (array_agg(volume_24h_usd ORDER BY last_updated DESC))[1],
+                count(*),
+                min(last_updated),
+                max(last_updated),
+                now()
+            FROM asset_market_data
+            WHERE price_usd IS NOT NULL
+            GROUP BY 1, 2, 3
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in CANDLE_TABLES:
+        op.drop_table(table)
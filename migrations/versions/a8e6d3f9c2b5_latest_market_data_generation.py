@@ -0,0 +1,43 @@
+"""add generation to asset_latest_market_data for the price stream
+
+Revision ID: a8e6d3f9c2b5
+Revises: f6c4a8e2b7d1
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "a8e6d3f9c2b5"
+down_revision: Union[str, Sequence[str], None] = "f6c4a8e2b7d1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "asset_latest_market_data",
+        sa.Column("generation", sa.BigInteger(), nullable=True),
+    )
+
+    # Existing rows count as already streamed.
+    op.execute(
+        """
+        UPDATE asset_latest_market_data
+        SET generation = (SELECT generation FROM data_generation WHERE id = 1)
+        """
+    )
+
+    op.create_index(
+        "ix_asset_latest_market_data_generation",
+        "asset_latest_market_data",
+        ["generation"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_asset_latest_market_data_generation",
+        table_name="asset_latest_market_data",
+    )
+    op.drop_column("asset_latest_market_data", "generation")
@@ -0,0 +1,32 @@
+"""add data_generation counter for API cache invalidation
+
+Revision ID: b2d8f6e1a4c7
+Revises: a1c7e5d9f3b2
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "b2d8f6e1a4c7"
+down_revision: Union[str, Sequence[str], None] = "a1c7e5d9f3b2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "data_generation",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("generation", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.execute(
+        "INSERT INTO data_generation (id, generation, updated_at) VALUES (1, 0, now())"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("data_generation")
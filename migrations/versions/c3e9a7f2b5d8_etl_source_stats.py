@@ -0,0 +1,48 @@
+"""add etl_source_stats per-source run counters
+
+Revision ID: c3e9a7f2b5d8
+Revises: b2d8f6e1a4c7
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "c3e9a7f2b5d8"
+down_revision: Union[str, Sequence[str], None] = "b2d8f6e1a4c7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "etl_source_stats",
+        sa.Column("source", sa.Text(), nullable=False),
+        sa.Column("last_run_id", postgresql.UUID(), nullable=True),
+        sa.Column("success_count", sa.Integer(), nullable=False),
+        sa.Column("failure_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["last_run_id"], ["etl_runs.run_id"]),
+        sa.PrimaryKeyConstraint("source"),
+    )
+
+    op.execute(
+        """
+        INSERT INTO etl_source_stats (
+            source, last_run_id, success_count, failure_count, updated_at
+        )
+        SELECT
+            source,
+            (array_agg(run_id ORDER BY started_at DESC))[1],
+            count(*) FILTER (WHERE status = 'success'),
+            count(*) FILTER (WHERE status = 'failed'),
+            now()
+        FROM etl_runs
+        GROUP BY source
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("etl_source_stats")
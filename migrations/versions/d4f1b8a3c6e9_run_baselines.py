@@ -0,0 +1,100 @@
+"""add rolling run baselines to etl_source_stats
+
+Revision ID: d4f1b8a3c6e9
+Revises: c3e9a7f2b5d8
+"""
+
+import json
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "d4f1b8a3c6e9"
+down_revision: Union[str, Sequence[str], None] = "c3e9a7f2b5d8"
+branch_labels = None
+depends_on = None
+
+# Defaults of RUN_BASELINE_ALPHA / RUN_BASELINE_WINDOW at the time of writing.
+ALPHA = 0.2
+WINDOW = 20
+
+FLOAT_COLUMNS = (
+    "duration_ewma",
+    "duration_ewvar",
+    "records_ewma",
+    "records_ewvar",
+    "window_duration_avg",
+    "window_records_avg",
+)
+
+
+def _ewma(mean, var, x):
+    if mean is None:
+        return float(x), 0.0
+    diff = x - mean
+    incr = ALPHA * diff
+    return mean + incr, (1 - ALPHA) * (var + diff * incr)
+
+
+def upgrade() -> None:
+    for name in FLOAT_COLUMNS:
+        op.add_column("etl_source_stats", sa.Column(name, sa.Float(), nullable=True))
+    op.add_column("etl_source_stats", sa.Column("recent_runs", sa.JSON(), nullable=True))
+
+    # Replay successful runs in order; the history is one row per run, small
+    # enough to walk here.
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.text(
+            """
+            SELECT source, duration_ms, coalesce(records_processed, 0)
+            FROM etl_runs
+            WHERE status = 'success' AND duration_ms IS NOT NULL
+            ORDER BY source, started_at
+            """
+        )
+    )
+
+    baselines = {}
+    for source, duration, records in rows:
+        b = baselines.setdefault(
+            source,
+            {"d": (None, 0.0), "r": (None, 0.0), "recent": []},
+        )
+        b["d"] = _ewma(*b["d"], duration)
+        b["r"] = _ewma(*b["r"], records)
+        b["recent"] = (b["recent"] + [[duration, records]])[-WINDOW:]
+
+    for source, b in baselines.items():
+        recent = b["recent"]
+        conn.execute(
+            sa.text(
+                """
+                UPDATE etl_source_stats SET
+                    duration_ewma = :duration_ewma,
+                    duration_ewvar = :duration_ewvar,
+                    records_ewma = :records_ewma,
+                    records_ewvar = :records_ewvar,
+                    window_duration_avg = :window_duration_avg,
+                    window_records_avg = :window_records_avg,
+                    recent_runs = CAST(:recent_runs AS json)
+                WHERE source = :source
+                """
+            ),
+            {
+                "source": source,
+                "duration_ewma": b["d"][0],
+                "duration_ewvar": b["d"][1],
+                "records_ewma": b["r"][0],
+                "records_ewvar": b["r"][1],
+                "window_duration_avg": sum(d for d, _ in recent) / len(recent),
+                "window_records_avg": sum(r for _, r in recent) / len(recent),
+                "recent_runs": json.dumps(recent),
+            },
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("etl_source_stats", "recent_runs")
+    for name in reversed(FLOAT_COLUMNS):
+        op.drop_column("etl_source_stats", name)
@@ -0,0 +1,82 @@
+"""add asset_consensus_prices cross-source consensus table
+
+Revision ID: e5a2c9d7f1b4
+Revises: d4f1b8a3c6e9
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "e5a2c9d7f1b4"
+down_revision: Union[str, Sequence[str], None] = "d4f1b8a3c6e9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "asset_consensus_prices",
+        sa.Column("asset_id", postgresql.UUID(), nullable=False),
+        sa.Column("median_price_usd", sa.NUMERIC(), nullable=False),
+        sa.Column("mean_price_usd", sa.NUMERIC(), nullable=False),
+        sa.Column("min_price_usd", sa.NUMERIC(), nullable=False),
+        sa.Column("max_price_usd", sa.NUMERIC(), nullable=False),
+        sa.Column("spread_pct", sa.NUMERIC(), nullable=False),
+        sa.Column("source_count", sa.Integer(), nullable=False),
+        sa.Column("sources", sa.JSON(), nullable=False),
+        sa.Column("freshest_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["asset_id"],
+            ["assets.asset_id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("asset_id"),
+    )
+
+    # Same rules as app.transform.consensus.build_consensus with the default
+    # CONSENSUS_MAX_AGE_HOURS of 24.
+    op.execute(
+        """
+        WITH priced AS (
+            SELECT
+                asset_id,
+                source,
+                price_usd,
+                last_updated,
+                max(last_updated) OVER (PARTITION BY asset_id) AS freshest
+            FROM asset_latest_market_data
+            WHERE price_usd IS NOT NULL
+        ),
+        agg AS (
+            SELECT
+                asset_id,
+                percentile_cont(0.5) WITHIN GROUP (ORDER BY price_usd)::numeric AS median,
+                avg(price_usd) AS mean,
+                min(price_usd) AS low,
+                max(price_usd) AS high,
+                count(*) AS n,
+                json_agg(source ORDER BY source) AS sources,
+                max(last_updated) AS freshest_at
+            FROM priced
+            WHERE last_updated >= freshest - interval '24 hours'
+            GROUP BY asset_id
+        )
+        INSERT INTO asset_consensus_prices (
+            asset_id, median_price_usd, mean_price_usd, min_price_usd,
+            max_price_usd, spread_pct, source_count, sources, freshest_at,
+            updated_at
+        )
+        SELECT
+            asset_id, median, mean, low, high,
+            CASE WHEN median = 0 THEN 0 ELSE (high - low) / median * 100 END,
+            n, sources, freshest_at, now()
+        FROM agg
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("asset_consensus_prices")
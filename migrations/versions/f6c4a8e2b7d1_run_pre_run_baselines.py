@@ -0,0 +1,104 @@
+"""store each run's deviation from its pre-run baseline on etl_runs
+
+Revision ID: f6c4a8e2b7d1
+Revises: e5a2c9d7f1b4
+"""
+
+import math
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "f6c4a8e2b7d1"
+down_revision: Union[str, Sequence[str], None] = "e5a2c9d7f1b4"
+branch_labels = None
+depends_on = None
+
+# Defaults of RUN_BASELINE_ALPHA / RUN_BASELINE_WINDOW at the time of writing.
+ALPHA = 0.2
+WINDOW = 20
+
+COLUMNS = (
+    ("duration_zscore", sa.Float()),
+    ("records_zscore", sa.Float()),
+    ("baseline_duration_ms", sa.Float()),
+    ("baseline_records", sa.Float()),
+    ("baseline_runs", sa.Integer()),
+)
+
+
+def _ewma(mean, var, x):
+    if mean is None:
+        return float(x), 0.0
+    diff = x - mean
+    incr = ALPHA * diff
+    return mean + incr, (1 - ALPHA) * (var + diff * incr)
+
+
+def _z(x, mean, var):
+    if mean is None or not var:
+        return None
+    return (x - mean) / math.sqrt(var)
+
+
+def upgrade() -> None:
+    for name, type_ in COLUMNS:
+        op.add_column("etl_runs", sa.Column(name, type_, nullable=True))
+
+    # Replay successful runs in order, recording the baseline each one was
+    # compared against before it was folded in.
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.text(
+            """
+            SELECT run_id, source, duration_ms, coalesce(records_processed, 0)
+            FROM etl_runs
+            WHERE status = 'success' AND duration_ms IS NOT NULL
+            ORDER BY source, started_at
+            """
+        )
+    ).fetchall()
+
+    baselines = {}
+    for run_id, source, duration, records in rows:
+        b = baselines.setdefault(
+            source,
+            {"d": (None, 0.0), "r": (None, 0.0), "recent": [], "count": 0},
+        )
+        recent = b["recent"]
+
+        conn.execute(
+            sa.text(
+                """
+                UPDATE etl_runs SET
+                    duration_zscore = :duration_zscore,
+                    records_zscore = :records_zscore,
+                    baseline_duration_ms = :baseline_duration_ms,
+                    baseline_records = :baseline_records,
+                    baseline_runs = :baseline_runs
+                WHERE run_id = :run_id
+                """
+            ),
+            {
+                "run_id": run_id,
+                "duration_zscore": _z(duration, *b["d"]),
+                "records_zscore": _z(records, *b["r"]),
+                "baseline_duration_ms": (
+                    sum(d for d, _ in recent) / len(recent) if recent else None
+                ),
+                "baseline_records": (
+                    sum(r for _, r in recent) / len(recent) if recent else None
+                ),
+                "baseline_runs": b["count"],
+            },
+        )
+
+        b["count"] += 1
+        b["d"] = _ewma(*b["d"], duration)
+        b["r"] = _ewma(*b["r"], records)
+        b["recent"] = (recent + [[duration, records]])[-WINDOW:]
+
+
+def downgrade() -> None:
+    for name, _ in reversed(COLUMNS):
+        op.drop_column("etl_runs", name)
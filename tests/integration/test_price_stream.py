@@ -0,0 +1,87 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.stream import PriceBroadcaster, _UNSET
+from app.core.db import _ASYNC_DRIVERS
+from app.core.events import notify_prices_changed
+from app.schemas.tables import assets
+from app.transform.transformer import upsert_latest_market_data
+
+
+def _async_engine(pg_engine):
+    url = pg_engine.url.set(drivername=_ASYNC_DRIVERS["postgresql"])
+    schema = pg_engine.dialect.default_schema_name
+    # LISTEN connection + one for reads; both stay pooled afterwards.
+    return create_async_engine(
+        url,
+        pool_size=2,
+        max_overflow=0,
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+
+
+def _write_price(pg_engine, symbol):
+    with pg_engine.begin() as conn:
+        asset_id = uuid.uuid4()
+        conn.execute(
+            assets.insert(),
+            {"asset_id": asset_id, "symbol": symbol, "name": symbol},
+        )
+        upsert_latest_market_data(
+            conn,
+            [
+                {
+                    "asset_id": asset_id,
+                    "source": "coingecko",
+                    "price_usd": 1,
+                    "market_cap_usd": 1,
+                    "volume_24h_usd": 1,
+                    "last_updated": datetime.now(timezone.utc),
+                }
+            ],
+        )
+        notify_prices_changed(conn)
+
+
+def test_notification_wakes_broadcaster_and_listener_is_released(pg_engine):
+    symbol = f"IT{uuid.uuid4().hex[:8]}"
+
+    async def scenario():
+        engine = _async_engine(pg_engine)
+        broadcaster = PriceBroadcaster()
+        try:
+            queue = broadcaster.subscribe(engine)
+            # Let the broadcaster LISTEN and set its high-water mark.
+            while broadcaster.high_water is _UNSET:
+                await asyncio.sleep(0.01)
+
+            await asyncio.to_thread(_write_price, pg_engine, symbol)
+            # Well under STREAM_POLL_SECONDS: only the NOTIFY can deliver it.
+            batch = await asyncio.wait_for(queue.get(), timeout=5)
+
+            await broadcaster.stop()
+
+            # Check out every pooled connection, including the former
+            # LISTEN one.
+            async with engine.connect() as a, engine.connect() as b:
+                channels = [
+                    channel
+                    for conn in (a, b)
+                    for channel in (await conn.execute(
+                        text("SELECT pg_listening_channels()")
+                    )).scalars()
+                ]
+        finally:
+            await broadcaster.stop()
+            await engine.dispose()
+
+        return batch, channels
+
+    batch, channels = asyncio.run(scenario())
+
+    assert [r["symbol"] for r in batch["rows"]] == [symbol]
+    assert channels == []
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, text
+
+from app.schemas.tables import (
+    assets,
+    asset_market_data,
+    etl_runs,
+    raw_coingecko,
+)
+
+# Enough rows that a sequential scan is clearly the more expensive plan.
+N_RUNS = 50_000
+N_ASSETS = 2_000
+N_MARKET = 200_000
+N_RAW = 200_000
+
+
+@pytest.fixture(scope="module")
+def seeded(pg_engine):
+    with pg_engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO etl_runs (run_id, source, started_at, status)
+                SELECT gen_random_uuid(),
+                       (ARRAY['coinpaprika', 'coingecko', 'csv'])[1 + i % 3],
+                       now() - make_interval(mins => i),
+                       'success'
+                FROM generate_series(1, :n) AS i
+                """
+            ),
+            {"n": N_RUNS},
+        )
+        conn.execute(
+            text(
+                """
+                INSERT INTO assets (asset_id, symbol, name)
+                SELECT gen_random_uuid(), 'SYM' || i, 'Asset ' || i
+                FROM generate_series(1, :n) AS i
+                """
+            ),
+            {"n": N_ASSETS},
+        )
+        conn.execute(
+            text(
+                """
+                INSERT INTO asset_market_data (
+                    id, asset_id, source, price_usd, last_updated, created_at
+                )
+                SELECT gen_random_uuid(), a.asset_id, 'coingecko', i,
+                       now() - make_interval(mins => i), now()
+                FROM generate_series(1, :n) AS i
+                JOIN (
+                    SELECT asset_id, row_number() OVER () - 1 AS k FROM assets
+                ) a ON a.k = i % :assets
+                """
+            ),
+            {"n": N_MARKET, "assets": N_ASSETS},
+        )
+        conn.execute(
+            text(
+                """
+                INSERT INTO raw_coingecko (
+                    id, source_id, payload, payload_hash, ingested_at
+                )
+                SELECT gen_random_uuid(), 'coin' || i, '{}'::jsonb, sha256(i::text::bytea),
+                       now() - make_interval(secs => :n - i)
+                FROM generate_series(1, :n) AS i
+                """
+            ),
+            {"n": N_RAW},
+        )
+
+        for table in ("etl_runs", "assets", "asset_market_data", "raw_coingecko"):
+            conn.execute(text(f"ANALYZE {table}"))
+
+    return pg_engine
+
+
+def _index_names(nodes):
+    return {n["Index Name"] for n in nodes if "Index Name" in n}
+
+
+def _seq_scanned(nodes):
+    return {n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"}
+
+
+def test_latest_run_per_source_uses_index(seeded, explain):
+    stmt = (
+        select(etl_runs)
+        .where(etl_runs.c.source == "coingecko")
+        .order_by(etl_runs.c.started_at.desc())
+        .limit(1)
+    )
+
+    with seeded.connect() as conn:
+        nodes = explain(conn, stmt)
+
+    assert "ix_etl_runs_source_started_at" in _index_names(nodes)
+    assert not _seq_scanned(nodes)
+
+
+def test_latest_market_row_per_asset_uses_index(seeded, explain):
+    with seeded.connect() as conn:
+        asset_id = conn.execute(select(assets.c.asset_id).limit(1)).scalar()
+
+        stmt = (
+            select(asset_market_data)
+            .where(
+                asset_market_data.c.asset_id == asset_id,
+                asset_market_data.c.source == "coingecko",
+            )
+            .order_by(asset_market_data.c.last_updated.desc())
+            .limit(1)
+        )
+        nodes = explain(conn, stmt)
+
+    # Served by the per-partition uq_asset_market_source_time indexes,
+    # scanned backwards.
+    assert _index_names(nodes)
+    assert not _seq_scanned(nodes)
+
+
+def test_loader_since_filter_uses_brin(seeded, explain):
+    since = datetime.now(timezone.utc) - timedelta(minutes=5)
+    stmt = (
+        select(raw_coingecko.c.id, raw_coingecko.c.ingested_at)
+        .where(raw_coingecko.c.ingested_at > since)
+        .order_by(raw_coingecko.c.ingested_at.asc())
+    )
+
+    with seeded.connect() as conn:
+        nodes = explain(conn, stmt)
+
+    assert "ix_raw_coingecko_ingested_at_brin" in _index_names(nodes)
+    assert not _seq_scanned(nodes)
+
+
+def test_asset_symbol_lookup_uses_index(seeded, explain):
+    stmt = select(assets.c.asset_id).where(assets.c.symbol == "SYM42")
+
+    with seeded.connect() as conn:
+        nodes = explain(conn, stmt)
+
+    # The leading column of uq_asset_symbol_name covers symbol lookups.
+    assert "uq_asset_symbol_name" in _index_names(nodes)
+    assert not _seq_scanned(nodes)
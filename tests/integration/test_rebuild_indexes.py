@@ -0,0 +1,71 @@
+from sqlalchemy import text
+
+from app.services.rebuild_service import drop_secondary_indexes, recreate_indexes
+
+INDEX = "ix_it_asset_market_data_source"
+
+
+def _index_state(conn):
+    """(parent index valid, partitions with an attached index, partitions)."""
+    valid = conn.execute(
+        text(
+            """
+            SELECT i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = :name
+              AND c.relnamespace = current_schema()::regnamespace
+            """
+        ),
+        {"name": INDEX},
+    ).scalar()
+
+    attached = conn.execute(
+        text(
+            """
+            SELECT count(*)
+            FROM pg_inherits h
+            JOIN pg_class c ON c.oid = h.inhparent
+            WHERE c.relname = :name
+              AND c.relnamespace = current_schema()::regnamespace
+            """
+        ),
+        {"name": INDEX},
+    ).scalar()
+
+    partitions = conn.execute(
+        text(
+            """
+            SELECT count(*)
+            FROM pg_inherits h
+            WHERE h.inhparent = 'asset_market_data'::regclass
+            """
+        )
+    ).scalar()
+
+    return valid, attached, partitions
+
+
+def test_drop_and_recreate_partitioned_secondary_index(pg_engine):
+    with pg_engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX {INDEX} ON asset_market_data (source)"))
+
+    try:
+        definitions = drop_secondary_indexes(pg_engine)
+
+        assert len(definitions) == 1
+        assert " ON ONLY " in definitions[0]
+        with pg_engine.connect() as conn:
+            assert _index_state(conn)[0] is None
+
+        recreate_indexes(pg_engine, definitions)
+
+        with pg_engine.connect() as conn:
+            valid, attached, partitions = _index_state(conn)
+
+        assert valid is True
+        assert partitions > 0
+        assert attached == partitions
+    finally:
+        with pg_engine.begin() as conn:
+            conn.execute(text(f"DROP INDEX IF EXISTS {INDEX}"))
@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.api.main import app
+from app.core.db import get_async_engine
+
+
+@pytest.fixture
+def count_statements():
+    """
+    Context manager collecting every SQL statement the API's (overridden)
+    async engine sends while the block runs.
+    """
+
+    @contextmanager
+    def counting():
+        engine = app.dependency_overrides[get_async_engine]().sync_engine
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return counting
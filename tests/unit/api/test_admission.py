@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.admission import AdmissionLimiter
+
+
+def test_requests_within_limit_are_admitted_immediately():
+    limiter = AdmissionLimiter("t", limit=2, queue_size=0)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire()
+        return limiter.in_flight
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_full_queue_is_shed_with_retry_after():
+    limiter = AdmissionLimiter("t", limit=1, queue_size=0)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire()
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(scenario())
+
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+
+
+def test_queued_request_gets_released_slot_in_order():
+    limiter = AdmissionLimiter("t", limit=1, queue_size=2, timeout=1)
+    admitted = []
+
+    async def request(name):
+        await limiter.acquire()
+        admitted.append(name)
+
+    async def scenario():
+        await limiter.acquire()
+        waiters = [
+            asyncio.create_task(request("first")),
+            asyncio.create_task(request("second")),
+        ]
+        await asyncio.sleep(0)
+        assert len(limiter._waiters) == 2
+
+        limiter.release()
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*waiters)
+
+    asyncio.run(scenario())
+
+    assert admitted == ["first", "second"]
+    # Slots were handed over, never freed in between.
+    assert limiter.in_flight == 1
+
+
+def test_queued_request_times_out_and_leaves_queue():
+    limiter = AdmissionLimiter("t", limit=1, queue_size=1, timeout=0.01)
+
+    async def scenario():
+        await limiter.acquire()
+        with pytest.raises(HTTPException) as exc:
+            await limiter.acquire()
+        return exc.value
+
+    exc = asyncio.run(scenario())
+
+    assert exc.status_code == 503
+    assert not limiter._waiters
+    assert limiter.in_flight == 1
@@ -1,43 +1,79 @@
+import csv
+import io
+import json
 import uuid
 from datetime import datetime, timezone, timedelta
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, select, func
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import create_engine, select, update, func
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 
 from app.api.main import app
-from app.core.db import get_engine
+from app.core.db import get_async_engine
+from app.api.cache import (
+    response_cache,
+    generation_reader,
+    ResponseCache,
+    cache_key,
+)
+from app.api.health import health_snapshot
+from app.api.admission import data_limiter
+from app.core.checkpoints import CheckpointManager
+from app.transform.transformer import upsert_latest_market_data
+from app.transform.candles import refresh_candles, touched_buckets
+from app.transform.consensus import refresh_consensus
 from app.schemas.tables import (
     metadata,
     etl_checkpoints,
     etl_runs,
+    etl_source_stats,
     assets,
     asset_market_data,
+    transform_failure_summaries,
 )
 import uuid
 
 
 @pytest.fixture
-def engine():
-    engine = create_engine(
-        "sqlite://",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+def db_path(tmp_path):
+    return tmp_path / "api.db"
+
+
+@pytest.fixture
+def engine(db_path):
+    # Sync engine for seeding; the API reads the same file asynchronously.
+    engine = create_engine(f"sqlite:///{db_path}")
     metadata.create_all(engine)
     return engine
 
 
 @pytest.fixture
-def client(engine):
-    def _get_engine():
-        return engine
+def client(engine, db_path, monkeypatch):
+    # NullPool: TestClient may run requests on different event loops.
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        poolclass=NullPool,
+    )
 
-    app.dependency_overrides[get_engine] = _get_engine
+    app.dependency_overrides[get_async_engine] = lambda: async_engine
+    response_cache.clear()
+    generation_reader.clear()
+    # Tests write and read within milliseconds; always re-read the counter.
+    monkeypatch.setattr(generation_reader, "ttl", 0)
+    health_snapshot.clear()
     return TestClient(app)
 
 
+def _insert_market_data(conn, rows):
+    rows = rows if isinstance(rows, list) else [rows]
+    conn.execute(asset_market_data.insert(), rows)
+    upsert_latest_market_data(conn, rows)
+    refresh_candles(conn, touched_buckets(rows))
+    refresh_consensus(conn, [r["asset_id"] for r in rows])
+
+
 # ---------- /health ----------
 def test_health_ok(client, engine):
     with engine.begin() as conn:
@@ -77,34 +113,63 @@ def test_health_degraded_on_failed_source(client, engine):
     assert res.json()["status"] == "degraded"
 
 
-# ---------- /stats ----------
-def test_stats_aggregates_runs(client, engine):
-    now = datetime.now(timezone.utc)
+def test_livez_does_not_touch_db(client):
+    app.dependency_overrides[get_async_engine] = lambda: None
 
-    with engine.begin() as conn:
-        conn.execute(
-            etl_runs.insert(),
-            [
-                {
-                    "run_id": uuid.uuid4(),
-                    "source": "coingecko",
-                    "status": "success",
-                    "started_at": now - timedelta(minutes=5),
-                    "ended_at": now - timedelta(minutes=4),
-                    "duration_ms": 100,
-                    "records_processed": 10,
-                },
+    res = client.get("/livez")
+
+    assert res.status_code == 200
+    assert res.json() == {"status": "alive"}
+
+
+def test_readyz_and_health_share_snapshot(client, engine, count_statements):
+    with count_statements() as statements:
+        res = client.get("/readyz")
+        assert res.status_code == 200
+        assert res.json()["status"] == "ready"
+        assert len(statements) == 1
+
+        # Served from the snapshot until the next refresh.
+        with engine.begin() as conn:
+            conn.execute(
+                etl_checkpoints.insert(),
                 {
-                    "run_id": uuid.uuid4(),
-                    "source": "coingecko",
+                    "source": "csv",
                     "status": "failed",
-                    "started_at": now - timedelta(minutes=3),
-                    "ended_at": now - timedelta(minutes=2),
-                    "duration_ms": 50,
-                    "records_processed": 0,
+                    "updated_at": datetime.now(timezone.utc),
                 },
-            ],
-        )
+            )
+
+        for _ in range(5):
+            assert client.get("/health").json()["status"] == "ok"
+            client.get("/readyz")
+    assert len(statements) == 1
+
+
+def test_readyz_unavailable_when_db_unreachable(client, tmp_path):
+    broken = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/missing/dir/api.db",
+        poolclass=NullPool,
+    )
+    app.dependency_overrides[get_async_engine] = lambda: broken
+
+    res = client.get("/readyz")
+
+    assert res.status_code == 503
+    assert res.json()["db"]["connected"] is False
+    assert client.get("/health").json()["status"] == "degraded"
+
+
+# ---------- /stats ----------
+def test_stats_aggregates_runs(client, engine):
+    cp = CheckpointManager(engine)
+    cp.initialize_if_missing("coingecko")
+
+    ok_run, failed_run = uuid.uuid4(), uuid.uuid4()
+    cp.start_run("coingecko", ok_run, "manual")
+    cp.mark_success("coingecko", ok_run, datetime.now(timezone.utc), 10)
+    cp.start_run("coingecko", failed_run, "manual")
+    cp.mark_failure("coingecko", failed_run, "boom")
 
     res = client.get("/stats")
     src = res.json()["sources"][0]
@@ -112,7 +177,29 @@ def test_stats_aggregates_runs(client, engine):
     assert src["source"] == "coingecko"
     assert src["success_count"] == 1
     assert src["failure_count"] == 1
-    assert src["last_run"] is not None
+    assert src["last_run"]["run_id"] == str(failed_run)
+    assert src["last_run"]["status"] == "failed"
+
+
+def test_stats_single_query(client, engine, count_statements):
+    cp = CheckpointManager(engine)
+
+    for source in ("coingecko", "coinpaprika", "csv"):
+        cp.initialize_if_missing(source)
+        run_id = uuid.uuid4()
+        cp.start_run(source, run_id, "manual")
+        cp.mark_success(source, run_id, datetime.now(timezone.utc), 1)
+
+    with count_statements() as statements:
+        body = client.get("/stats").json()
+
+    assert [s["source"] for s in body["sources"]] == [
+        "coingecko",
+        "coinpaprika",
+        "csv",
+    ]
+    # One generation lookup for the cache, one for the stats themselves.
+    assert len(statements) == 2
 
 
 # ---------- /data ----------
@@ -129,8 +216,8 @@ def test_get_data_basic(client, engine):
                 "name": "Bitcoin",
             },
         )
-        conn.execute(
-            asset_market_data.insert(),
+        _insert_market_data(
+            conn,
             {
                 "asset_id": asset_id,
                 "source": "coingecko",
@@ -167,8 +254,8 @@ def test_get_data_returns_latest_per_asset_per_source(client, engine):
                 "name": "Bitcoin",
             },
         )
-        conn.execute(
-            asset_market_data.insert(),
+        _insert_market_data(
+            conn,
             [
                 {
                     "asset_id": asset_id,
@@ -212,8 +299,8 @@ def test_get_data_multiple_sources(client, engine):
                 "name": "Bitcoin",
             },
         )
-        conn.execute(
-            asset_market_data.insert(),
+        _insert_market_data(
+            conn,
             [
                 {
                     "asset_id": asset_id,
@@ -245,6 +332,364 @@ def test_get_data_multiple_sources(client, engine):
 
 
 
+def test_get_data_to_ts_reads_history(client, engine):
+    asset_id = uuid.uuid4()
+    t1 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    t2 = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+    with engine.begin() as conn:
+        conn.execute(
+            assets.insert(),
+            {"asset_id": asset_id, "symbol": "BTC", "name": "Bitcoin"},
+        )
+        _insert_market_data(
+            conn,
+            [
+                {
+                    "asset_id": asset_id,
+                    "source": "coingecko",
+                    "price_usd": price,
+                    "market_cap_usd": 1000,
+                    "volume_24h_usd": 10,
+                    "last_updated": ts,
+                    "created_at": ts,
+                }
+                for price, ts in ((90, t1), (100, t2))
+            ],
+        )
+
+    latest = client.get("/data").json()["data"]
+    windowed = client.get("/data", params={"to_ts": "2024-01-01T12:00:00"}).json()["data"]
+
+    assert [float(r["price_usd"]) for r in latest] == [100]
+    assert [float(r["price_usd"]) for r in windowed] == [90]
+
+
+def test_get_data_cursor_pages_match_offset_pages(client, engine):
+    t1 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    t2 = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+    with engine.begin() as conn:
+        for i, ts in enumerate((t1, t2, t2, t1, t2)):
+            asset_id = uuid.uuid4()
+            conn.execute(
+                assets.insert(),
+                {"asset_id": asset_id, "symbol": f"C{i}", "name": f"Coin {i}"},
+            )
+            _insert_market_data(
+                conn,
+                [
+                    {
+                        "asset_id": asset_id,
+                        "source": source,
+                        "price_usd": i,
+                        "market_cap_usd": 1000,
+                        "volume_24h_usd": 10,
+                        "last_updated": ts,
+                        "created_at": ts,
+                    }
+                    for source in ("coingecko", "coinpaprika")
+                ],
+            )
+
+    everything = client.get("/data", params={"limit": 100}).json()["data"]
+
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/data", params=params).json()
+        pages.extend(body["data"])
+        cursor = body["pagination"]["next_cursor"]
+        if not cursor:
+            break
+
+    key = lambda r: (r["symbol"], r["source"])
+    assert len(everything) == 10
+    assert [key(r) for r in pages] == [key(r) for r in everything]
+
+
+def test_get_data_rejects_bad_cursor(client):
+    assert client.get("/data", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/data", params={"cursor": "abc", "offset": 5}).status_code == 400
+
+
+# ---------- /data/batch ----------
+def _seed_latest(engine, symbol, sources, price, ts):
+    asset_id = uuid.uuid4()
+
+    with engine.begin() as conn:
+        conn.execute(
+            assets.insert(),
+            {"asset_id": asset_id, "symbol": symbol, "name": symbol.title()},
+        )
+        _insert_market_data(
+            conn,
+            [
+                {
+                    "asset_id": asset_id,
+                    "source": source,
+                    "price_usd": price,
+                    "market_cap_usd": 1000,
+                    "volume_24h_usd": 10,
+                    "last_updated": ts,
+                    "created_at": ts,
+                }
+                for source in sources
+            ],
+        )
+
+
+def test_data_batch_groups_per_symbol_in_one_query(
+    client, engine, count_statements
+):
+    now = datetime.now(timezone.utc)
+    _seed_latest(engine, "BTC", ["coingecko", "coinpaprika"], 100, now)
+    _seed_latest(engine, "ETH", ["coingecko"], 10, now)
+    _seed_latest(engine, "SOL", ["coingecko"], 1, now)
+
+    with count_statements() as statements:
+        res = client.post(
+            "/data/batch",
+            json={"symbols": ["ETH", "BTC", "DOGE", "BTC"]},
+        )
+    body = res.json()
+
+    assert res.status_code == 200
+    assert list(body["data"]) == ["ETH", "BTC", "DOGE"]
+    assert [r["source"] for r in body["data"]["BTC"]] == ["coingecko", "coinpaprika"]
+    assert body["data"]["ETH"][0]["price_usd"] == 10
+    assert body["missing"] == ["DOGE"]
+    assert body["count"] == 3
+    assert len(statements) == 1
+
+
+def test_data_batch_filters_sources(client, engine):
+    now = datetime.now(timezone.utc)
+    _seed_latest(engine, "BTC", ["coingecko", "coinpaprika"], 100, now)
+
+    body = client.post(
+        "/data/batch",
+        json={
+            "symbols": ["BTC"],
+            "sources": ["coinpaprika"],
+            "to_ts": (now + timedelta(minutes=1)).isoformat(),
+        },
+    ).json()
+
+    assert [r["source"] for r in body["data"]["BTC"]] == ["coinpaprika"]
+
+
+def test_data_batch_rejects_empty_symbols(client):
+    assert client.post("/data/batch", json={"symbols": []}).status_code == 422
+
+
+# ---------- /prices/consensus ----------
+def test_consensus_reads_precomputed_table(client, engine):
+    now = datetime.now(timezone.utc)
+    _seed_latest(engine, "BTC", ["coingecko"], 100, now)
+    _seed_latest(engine, "ETH", ["coingecko"], 10, now)
+
+    # Second BTC source, written through the same transform helpers.
+    with engine.begin() as conn:
+        btc = conn.execute(
+            select(assets.c.asset_id).where(assets.c.symbol == "BTC")
+        ).scalar_one()
+        _insert_market_data(
+            conn,
+            {
+                "asset_id": btc,
+                "source": "coinpaprika",
+                "price_usd": 110,
+                "market_cap_usd": None,
+                "volume_24h_usd": None,
+                "last_updated": now,
+                "created_at": now,
+            },
+        )
+
+    body = client.get("/prices/consensus").json()
+    assert [p["symbol"] for p in body["prices"]] == ["BTC", "ETH"]
+
+    btc_row = body["prices"][0]
+    assert btc_row["median_price_usd"] == 105
+    assert btc_row["spread_pct"] == pytest.approx(100 * 10 / 105)
+    assert btc_row["sources"] == ["coingecko", "coinpaprika"]
+
+    multi = client.get("/prices/consensus", params={"min_sources": 2}).json()
+    assert [p["symbol"] for p in multi["prices"]] == ["BTC"]
+
+
+# ---------- /data/candles ----------
+def test_get_candles_hourly_and_daily(client, engine):
+    asset_id = uuid.uuid4()
+    base = datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+    points = [
+        (base, 100),
+        (base + timedelta(minutes=20), 120),
+        (base + timedelta(minutes=40), 90),
+        (base + timedelta(hours=1, minutes=5), 110),
+    ]
+
+    with engine.begin() as conn:
+        conn.execute(
+            assets.insert(),
+            {"asset_id": asset_id, "symbol": "BTC", "name": "Bitcoin"},
+        )
+        _insert_market_data(
+            conn,
+            [
+                {
+                    "asset_id": asset_id,
+                    "source": "coingecko",
+                    "price_usd": price,
+                    "market_cap_usd": 1000,
+                    "volume_24h_usd": 10,
+                    "last_updated": ts,
+                    "created_at": ts,
+                }
+                for ts, price in points
+            ],
+        )
+
+    hourly = client.get("/data/candles", params={"symbol": "BTC"}).json()
+    daily = client.get(
+        "/data/candles", params={"symbol": "BTC", "interval": "1d"}
+    ).json()
+
+    ohlc = lambda c: [float(c[k]) for k in ("open_usd", "high_usd", "low_usd", "close_usd")]
+
+    assert hourly["count"] == 2
+    assert ohlc(hourly["data"][0]) == [100, 120, 90, 90]
+    assert hourly["data"][0]["points"] == 3
+    assert ohlc(hourly["data"][1]) == [110, 110, 110, 110]
+    assert daily["count"] == 1
+    assert ohlc(daily["data"][0]) == [100, 120, 90, 110]
+
+
+def test_get_candles_rejects_unknown_interval(client):
+    res = client.get("/data/candles", params={"symbol": "BTC", "interval": "5m"})
+
+    assert res.status_code == 422
+
+
+# ---------- /data/export ----------
+def _seed_history(engine, points):
+    asset_id = uuid.uuid4()
+
+    with engine.begin() as conn:
+        conn.execute(
+            assets.insert(),
+            {"asset_id": asset_id, "symbol": "BTC", "name": "Bitcoin"},
+        )
+        _insert_market_data(
+            conn,
+            [
+                {
+                    "asset_id": asset_id,
+                    "source": source,
+                    "price_usd": price,
+                    "market_cap_usd": None,
+                    "volume_24h_usd": 10,
+                    "last_updated": ts,
+                    "created_at": ts,
+                }
+                for ts, source, price in points
+            ],
+        )
+
+
+def test_export_streams_ndjson_in_chunks(client, engine, monkeypatch):
+    monkeypatch.setattr("app.api.main.EXPORT_CHUNK_ROWS", 2)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    _seed_history(
+        engine,
+        [
+            (base + timedelta(minutes=i), source, 100 + i)
+            for i in range(5)
+            for source in ("coingecko", "coinpaprika")
+        ],
+    )
+
+    res = client.get("/data/export", params={"source": "coingecko"})
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [l["price_usd"] for l in lines] == [100, 101, 102, 103, 104]
+    assert {l["source"] for l in lines} == {"coingecko"}
+    assert lines[0]["market_cap_usd"] is None
+
+
+def test_export_csv(client, engine):
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    _seed_history(engine, [(base, "coingecko", 100), (base, "coinpaprika", 101)])
+
+    res = client.get("/data/export", params={"format": "csv"})
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert [r["source"] for r in rows] == ["coingecko", "coinpaprika"]
+    assert rows[0]["symbol"] == "BTC"
+    assert rows[0]["market_cap_usd"] == ""
+
+
+# ---------- /data/history ----------
+def test_history_downsamples_raw_points(client, engine):
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    points = [
+        (end - timedelta(minutes=200 - i), "coingecko", 100 + (500 if i == 77 else 0))
+        for i in range(200)
+    ]
+    _seed_history(engine, points)
+
+    body = client.get(
+        "/data/history",
+        params={
+            "symbol": "BTC",
+            "from_ts": (end - timedelta(days=1)).isoformat(),
+            "to_ts": end.isoformat(),
+            "points": 20,
+        },
+    ).json()
+
+    assert body["resolution"] == "raw"
+    (series,) = body["series"]
+    assert series["source"] == "coingecko"
+    assert series["raw_points"] == 200
+    assert len(series["points"]) == 20
+    assert max(p["price_usd"] for p in series["points"]) == 600
+
+
+def test_history_long_range_reads_candles(client, engine):
+    end = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    _seed_history(
+        engine,
+        [
+            (end - timedelta(hours=h, minutes=m), "coingecko", 100 + h)
+            for h in range(48)
+            for m in (10, 40)
+        ],
+    )
+
+    body = client.get(
+        "/data/history",
+        params={
+            "symbol": "BTC",
+            "from_ts": (end - timedelta(days=30)).isoformat(),
+            "to_ts": end.isoformat(),
+        },
+    ).json()
+
+    assert body["resolution"] == "1h"
+    assert body["series"][0]["raw_points"] == 48
+
+
 # ---------- /runs ----------
 def test_list_runs_ordered(client, engine):
     now = datetime.now(timezone.utc)
@@ -281,40 +726,245 @@ def test_list_runs_ordered(client, engine):
     assert len(body["runs"]) == 1
 
 
-# ---------- /compare-runs ----------
-def test_compare_runs_detects_failure(client, engine):
+# ---------- /transform-failures ----------
+def test_transform_failures_per_run(client, engine):
+    run_id = uuid.uuid4()
     now = datetime.now(timezone.utc)
 
     with engine.begin() as conn:
         conn.execute(
-            etl_runs.insert(),
+            transform_failure_summaries.insert(),
             [
                 {
-                    "run_id": uuid.uuid4(),
+                    "run_id": run_id,
+                    "fingerprint": fp,
                     "source": "coingecko",
-                    "status": "success",
-                    "started_at": now - timedelta(days=1),
-                    "ended_at": now - timedelta(days=1, minutes=-1),
-                    "duration_ms": 100,
-                    "records_processed": 100,
-                },
-                {
-                    "run_id": uuid.uuid4(),
-                    "source": "coingecko",
-                    "status": "failed",
-                    "started_at": now,
-                    "ended_at": now + timedelta(minutes=1),
-                    "duration_ms": 300,
-                    "records_processed": 10,
-                },
+                    "raw_table": "raw_coingecko",
+                    "error_type": "ValidationError",
+                    "normalized_error": fp,
+                    "failure_count": count,
+                    "sampled_count": 1,
+                    "first_failed_at": now,
+                    "last_failed_at": now,
+                }
+                for fp, count in (("a", 40), ("b", 2))
             ],
         )
 
+    runs = client.get("/transform-failures").json()["runs"]
+    assert runs[0]["failure_count"] == 42
+    assert runs[0]["fingerprint_count"] == 2
+
+    res = client.get(f"/transform-failures?run_id={run_id}")
+    body = res.json()
+    assert res.headers["content-type"] == "application/json"
+    assert body["run_id"] == str(run_id)
+    assert [f["fingerprint"] for f in body["fingerprints"]] == ["a", "b"]
+
+
+# ---------- /compare-runs ----------
+def test_compare_runs_detects_failure(client, engine):
+    cp = CheckpointManager(engine)
+    cp.initialize_if_missing("coingecko")
+
+    ok_run, failed_run = uuid.uuid4(), uuid.uuid4()
+    cp.start_run("coingecko", ok_run, "manual")
+    cp.mark_success("coingecko", ok_run, datetime.now(timezone.utc), 100)
+    cp.start_run("coingecko", failed_run, "manual")
+    cp.mark_failure("coingecko", failed_run, "boom")
+
     res = client.get("/compare-runs")
     anomalies = res.json()["anomalies"]
 
     assert anomalies
     assert anomalies[0]["type"] == "run_failed"
+    assert anomalies[0]["run_id"] == str(failed_run)
+
+
+def _complete_run(cp, engine, *, duration_ms, records, source="coingecko"):
+    """A run through the real checkpoint path, lasting ~duration_ms."""
+    run_id = uuid.uuid4()
+    cp.start_run(source, run_id, "manual")
+
+    with engine.begin() as conn:
+        conn.execute(
+            update(etl_runs)
+            .where(etl_runs.c.run_id == run_id)
+            .values(
+                started_at=datetime.now(timezone.utc)
+                - timedelta(milliseconds=duration_ms)
+            )
+        )
+
+    cp.mark_success(source, run_id, datetime.now(timezone.utc), records)
+    return run_id
+
+
+def _seed_baseline(engine, runs=10):
+    # Durations around 1000 ms and records around 100, spread ~5%.
+    cp = CheckpointManager(engine)
+    cp.initialize_if_missing("coingecko")
+
+    for i in range(runs):
+        sign = 1 if i % 2 else -1
+        _complete_run(
+            cp,
+            engine,
+            duration_ms=1000 + sign * 50,
+            records=100 + sign * 5,
+        )
+    return cp
+
+
+def test_compare_runs_against_recent_window(client, engine):
+    cp = _seed_baseline(engine)
+    _complete_run(cp, engine, duration_ms=3000, records=40)
+
+    types = {a["type"] for a in client.get("/compare-runs").json()["anomalies"]}
+    assert types == {"duration_spike", "record_drop"}
+
+    relaxed = client.get(
+        "/compare-runs?duration_factor=4&records_factor=0.25&zscore=1000"
+    ).json()
+    assert relaxed["anomalies"] == []
+
+
+def test_compare_runs_flags_ewma_outliers(client, engine):
+    cp = _seed_baseline(engine)
+    # Within 2x of the window average, but far outside the EWMA spread.
+    run_id = _complete_run(cp, engine, duration_ms=1500, records=100)
+
+    anomalies = client.get("/compare-runs").json()["anomalies"]
+
+    assert [a["type"] for a in anomalies] == ["duration_spike"]
+    assert anomalies[0]["run_id"] == str(run_id)
+    assert "standard deviations" in anomalies[0]["message"]
+    # Measured against the baseline before this run; folding the run in
+    # first would cap it at sqrt((1 - alpha) / alpha) = 2.
+    assert anomalies[0]["zscore"] > 5
+
+
+def test_compare_runs_ignores_zscore_until_baseline_settles(client, engine):
+    cp = _seed_baseline(engine, runs=2)
+    _complete_run(cp, engine, duration_ms=1500, records=100)
+
+    assert client.get("/compare-runs").json()["anomalies"] == []
+
+
+# ---------- response cache ----------
+def _run(source, started_at):
+    return {
+        "run_id": uuid.uuid4(),
+        "source": source,
+        "status": "success",
+        "started_at": started_at,
+        "ended_at": started_at + timedelta(seconds=1),
+        "duration_ms": 1000,
+        "records_processed": 10,
+    }
+
+
+def test_runs_cached_until_checkpoint_bumps_generation(client, engine):
+    now = datetime.now(timezone.utc)
+
+    with engine.begin() as conn:
+        conn.execute(etl_runs.insert(), _run("csv", now - timedelta(hours=1)))
+
+    first = client.get("/runs").json()
+    assert len(first["runs"]) == 1
+
+    # Written behind the cache's back: still served from cache.
+    with engine.begin() as conn:
+        conn.execute(etl_runs.insert(), _run("csv", now - timedelta(minutes=30)))
+
+    second = client.get("/runs").json()
+    assert len(second["runs"]) == 1
+    assert second["request_id"] != first["request_id"]
+
+    cp = CheckpointManager(engine)
+    cp.initialize_if_missing("csv")
+    cp.start_run("csv", uuid.uuid4(), "manual")
+
+    third = client.get("/runs").json()
+    assert len(third["runs"]) == 3
+
+
+def test_cache_key_normalizes_params():
+    ts = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    assert cache_key("/data", limit=10, symbol=None, from_ts=ts) == cache_key(
+        "/data",
+        from_ts=ts.astimezone(timezone(timedelta(hours=2))),
+        limit=10,
+    )
+    assert cache_key("/data", limit=10) != cache_key("/data", limit=20)
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    a, b, c = (cache_key("/runs", limit=n) for n in (1, 2, 3))
+
+    assert cache.get(a, 1) is None
+    cache.put(a, 1, {"runs": "a"})
+    cache.put(b, 1, {"runs": "b"})
+    assert cache.get(a, 1) == {"runs": "a"}
+
+    cache.put(c, 1, {"runs": "c"})
+
+    assert cache.get(b, 1) is None
+    assert cache.get(a, 1) == {"runs": "a"}
+    assert cache.get(a, 2) is None
+
+
+# ---------- ETag / conditional GET ----------
+def test_etag_revalidation_returns_304(client, engine):
+    first = client.get("/stats")
+    etag = first.headers["etag"]
+
+    assert first.status_code == 200
+    assert "must-revalidate" in first.headers["cache-control"]
+
+    res = client.get("/stats", headers={"If-None-Match": etag})
+
+    assert res.status_code == 304
+    assert res.content == b""
+    assert res.headers["etag"] == etag
+    # Bodies carry per-request fields, so the validator must be weak.
+    assert etag.startswith('W/"')
+
+    # Different params, different representation.
+    other = client.get("/runs?limit=5").headers["etag"]
+    assert other != client.get("/runs?limit=6").headers["etag"]
+
+
+def test_etag_changes_with_generation(client, engine):
+    etag = client.get("/runs").headers["etag"]
+
+    cp = CheckpointManager(engine)
+    cp.initialize_if_missing("csv")
+    cp.start_run("csv", uuid.uuid4(), "manual")
+
+    res = client.get("/runs", headers={"If-None-Match": etag})
+
+    assert res.status_code == 200
+    assert res.headers["etag"] != etag
+    assert len(res.json()["runs"]) == 1
+
+
+def test_304_skips_database_within_generation_ttl(
+    client, engine, monkeypatch, count_statements
+):
+    monkeypatch.setattr(generation_reader, "ttl", 60)
+    etag = client.get("/data").headers["etag"]
+
+    with count_statements() as statements:
+        res = client.get(
+            "/data",
+            headers={"If-None-Match": f'"other", {etag.removeprefix("W/")}'},
+        )
+
+    assert res.status_code == 304
+    assert statements == []
 
 
 # ---------- /metrics ----------
@@ -323,3 +973,33 @@ def test_metrics_endpoint(client):
 
     assert res.status_code == 200
     assert res.headers["content-type"].startswith("text/plain")
+
+
+def test_metrics_expose_cache_hit_ratio(client):
+    client.get("/stats")
+    client.get("/stats")
+
+    body = client.get("/metrics").text
+
+    assert 'api_cache_lookups_total{result="hit",route="/stats"}' in body
+    assert 'api_cache_hit_ratio{route="/stats"} 0.5' in body
+
+
+# ---------- admission control ----------
+def test_saturated_route_returns_503(client, monkeypatch):
+    monkeypatch.setattr(data_limiter, "in_flight", data_limiter.limit)
+    monkeypatch.setattr(data_limiter, "queue_size", 0)
+
+    res = client.get("/data")
+
+    assert res.status_code == 503
+    assert res.headers["retry-after"] == "1"
+
+
+def test_slot_is_released_after_response(client):
+    before = data_limiter.in_flight
+
+    assert client.get("/data").status_code == 200
+    assert client.get("/data").status_code == 200
+
+    assert data_limiter.in_flight == before
@@ -0,0 +1,30 @@
+import numpy as np
+
+from app.api.downsample import lttb
+
+
+def test_lttb_returns_all_points_when_under_budget():
+    assert list(lttb([0, 1, 2], [5, 6, 7], 10)) == [0, 1, 2]
+
+
+def test_lttb_keeps_endpoints_and_budget():
+    x = np.arange(1000)
+    y = np.sin(x / 50)
+
+    idx = lttb(x, y, 50)
+
+    assert len(idx) == 50
+    assert idx[0] == 0 and idx[-1] == 999
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_spikes():
+    x = np.arange(500)
+    y = np.zeros(500)
+    y[123] = 100
+    y[321] = -100
+
+    idx = lttb(x, y, 10)
+
+    assert 123 in idx
+    assert 321 in idx
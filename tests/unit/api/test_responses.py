@@ -0,0 +1,51 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, text
+
+from app.api.responses import FastJSONResponse, row_dicts, _encoder
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        yield conn
+
+
+def test_row_dicts_have_plain_str_keys(conn):
+    rows = row_dicts(conn.execute(text("SELECT 'BTC' AS symbol, 1 AS n")))
+
+    assert rows == [{"symbol": "BTC", "n": 1}]
+    assert all(type(k) is str for k in rows[0])
+
+
+def test_matches_jsonable_encoder_output(conn):
+    rows = conn.execute(text("SELECT 'BTC' AS symbol, 1 AS n")).mappings().all()
+    payload = {
+        "data": list(rows),
+        "price": Decimal("123.45"),
+        "cap": Decimal("1000"),
+        "at": datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc),
+        "id": uuid.UUID(int=1),
+    }
+
+    fast = json.loads(FastJSONResponse(payload).body)
+
+    assert fast == jsonable_encoder(payload)
+    assert fast["at"] == "2024-01-01T12:30:00+00:00"
+
+
+def test_decimal_string_policy_keeps_exact_value():
+    default = _encoder("string")
+
+    assert default(Decimal("0.10000000000000000001")) == "0.10000000000000000001"
+
+
+def test_unknown_decimal_policy_rejected():
+    with pytest.raises(ValueError):
+        _encoder("bogus")
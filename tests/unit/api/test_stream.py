@@ -0,0 +1,204 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.api.stream import PriceBroadcaster, event_stream, format_event
+from app.core.events import notify_prices_changed
+from app.schemas.tables import metadata, assets, asset_latest_market_data
+from app.transform.transformer import upsert_latest_market_data
+
+
+def _seed(engine, symbol, price, *, generation, updated_at=None):
+    asset_id = uuid.uuid4()
+    updated_at = updated_at or datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(
+            assets.insert(),
+            {"asset_id": asset_id, "symbol": symbol, "name": symbol.title()},
+        )
+        conn.execute(
+            asset_latest_market_data.insert(),
+            {
+                "asset_id": asset_id,
+                "source": "coingecko",
+                "price_usd": price,
+                "last_updated": updated_at,
+                "updated_at": updated_at,
+                "generation": generation,
+            },
+        )
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    db_path = tmp_path / "stream.db"
+    metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+    return db_path
+
+
+def _refresh_batches(db_path, steps):
+    """Run `steps` (sync callables) each followed by a refresh; batches per step."""
+
+    async def scenario():
+        async_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{db_path}",
+            poolclass=NullPool,
+        )
+        broadcaster = PriceBroadcaster()
+        queue = asyncio.Queue()
+        broadcaster._subscribers.add(queue)
+
+        batches = []
+        for step in steps:
+            step()
+            await broadcaster.refresh(async_engine)
+            batches.append(
+                [queue.get_nowait() for _ in range(queue.qsize())]
+            )
+
+        await async_engine.dispose()
+        return batches
+
+    return asyncio.run(scenario())
+
+
+def test_broadcaster_publishes_only_rows_written_since_last_refresh(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    _seed(engine, "BTC", 100, generation=1)
+
+    batches = _refresh_batches(
+        db_path,
+        [
+            lambda: None,  # first refresh only sets the high-water mark
+            lambda: _seed(engine, "ETH", 10, generation=2),
+            lambda: None,
+        ],
+    )
+
+    assert batches[0] == [] and batches[2] == []
+    [batch] = batches[1]
+    assert batch["id"] == "2"
+    assert [r["symbol"] for r in batch["rows"]] == ["ETH"]
+    assert float(batch["rows"][0]["price_usd"]) == 10
+
+
+def test_broadcaster_follows_generation_not_updated_at(db_path):
+    # A writer that committed late: newer generation, older timestamp.
+    engine = create_engine(f"sqlite:///{db_path}")
+    now = datetime.now(timezone.utc)
+    _seed(engine, "BTC", 100, generation=1, updated_at=now)
+
+    batches = _refresh_batches(
+        db_path,
+        [
+            lambda: None,
+            lambda: _seed(
+                engine, "ETH", 10, generation=2,
+                updated_at=now - timedelta(minutes=5),
+            ),
+        ],
+    )
+
+    assert [r["symbol"] for r in batches[1][0]["rows"]] == ["ETH"]
+
+
+def test_first_writes_after_starting_on_empty_table_are_emitted(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    def write():
+        with engine.begin() as conn:
+            asset_id = uuid.uuid4()
+            conn.execute(
+                assets.insert(),
+                {"asset_id": asset_id, "symbol": "BTC", "name": "Bitcoin"},
+            )
+            upsert_latest_market_data(
+                conn,
+                [
+                    {
+                        "asset_id": asset_id,
+                        "source": "coingecko",
+                        "price_usd": 100,
+                        "market_cap_usd": 1,
+                        "volume_24h_usd": 1,
+                        "last_updated": datetime.now(timezone.utc),
+                    }
+                ],
+            )
+
+    batches = _refresh_batches(db_path, [lambda: None, write])
+
+    assert batches[0] == []
+    assert [r["symbol"] for r in batches[1][0]["rows"]] == ["BTC"]
+
+
+def test_slow_subscriber_drops_oldest_batch():
+    broadcaster = PriceBroadcaster()
+
+    async def scenario():
+        queue = asyncio.Queue(maxsize=2)
+        broadcaster._subscribers.add(queue)
+        for i in range(3):
+            broadcaster.publish({"id": str(i), "rows": []})
+        return [queue.get_nowait()["id"] for _ in range(queue.qsize())]
+
+    assert asyncio.run(scenario()) == ["1", "2"]
+
+
+def test_event_stream_formats_and_filters_symbols():
+    request = MagicMock()
+
+    async def connected():
+        return False
+
+    request.is_disconnected = connected
+
+    async def scenario():
+        queue = asyncio.Queue()
+        queue.put_nowait(
+            {
+                "id": "2024-01-01T00:00:00+00:00",
+                "rows": [
+                    {"symbol": "BTC", "price_usd": 1},
+                    {"symbol": "ETH", "price_usd": 2},
+                ],
+            }
+        )
+        stream = event_stream(request, queue, symbols={"ETH"})
+        chunks = [await stream.__anext__(), await stream.__anext__()]
+        await stream.aclose()
+        return chunks
+
+    hello, event = asyncio.run(scenario())
+
+    assert hello == b": connected\n\n"
+    lines = event.decode().split("\n")
+    assert lines[0] == "event: prices"
+    assert lines[1] == "id: 2024-01-01T00:00:00+00:00"
+    assert json.loads(lines[2].removeprefix("data: ")) == [
+        {"symbol": "ETH", "price_usd": 2}
+    ]
+    assert event.endswith(b"\n\n")
+
+
+def test_format_event_encodes_decimals():
+    from decimal import Decimal
+
+    event = format_event({"id": "x", "rows": [{"price_usd": Decimal("1.5")}]})
+    assert b'"price_usd":1.5' in event
+
+
+def test_notify_is_noop_outside_postgres():
+    conn = MagicMock()
+    conn.dialect.name = "sqlite"
+
+    notify_prices_changed(conn, run_id=uuid.uuid4())
+
+    conn.execute.assert_not_called()
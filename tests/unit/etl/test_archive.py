@@ -0,0 +1,134 @@
+import json
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, func
+
+import app.core.bronze_archive as bronze_archive
+from app.schemas.tables import metadata, raw_coingecko, asset_market_data
+from app.services.archive_service import archive_table
+from app.services.rebuild_service import plan_partitions, rebuild_range
+from app.transform.loader import load_raw_range
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(bronze_archive, "BRONZE_ARCHIVE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(
+            raw_coingecko.insert(),
+            [
+                {
+                    "source_id": "bitcoin",
+                    "payload": {
+                        "id": "bitcoin",
+                        "symbol": "btc",
+                        "name": "Bitcoin",
+                        "current_price": 100 + i,
+                        "market_cap": 1000,
+                        "total_volume": 10,
+                        "last_updated": (BASE + timedelta(days=i)).isoformat(),
+                    },
+                    "payload_hash": str(i).encode(),
+                    "ingested_at": BASE + timedelta(days=i),
+                    "symbol": None,
+                    "source_updated_at": None,
+                }
+                for i in range(60)
+            ],
+        )
+
+    return engine
+
+
+def _live_count(engine):
+    with engine.connect() as conn:
+        return conn.execute(
+            select(func.count()).select_from(raw_coingecko)
+        ).scalar()
+
+
+def test_archive_moves_old_rows_to_segments(engine, archive_dir):
+    archived = archive_table(
+        engine,
+        raw_coingecko,
+        cutoff=BASE + timedelta(days=45),
+        segment_rows=20,
+    )
+
+    manifest = json.loads((archive_dir / "manifest.json").read_text())
+
+    assert archived == 45
+    assert _live_count(engine) == 15
+    assert sum(s["rows"] for s in manifest["segments"]) == 45
+    # January (31 rows, two segments) and February up to the cutoff.
+    assert len(manifest["segments"]) == 3
+    assert all(
+        (archive_dir / s["path"]).exists() and s["path"].endswith(".parquet")
+        for s in manifest["segments"]
+    )
+
+
+def test_load_raw_range_reads_archived_rows_transparently(engine, archive_dir):
+    with engine.connect() as conn:
+        before = list(
+            load_raw_range(conn, raw_coingecko, BASE, BASE + timedelta(days=60))
+        )
+
+    archive_table(engine, raw_coingecko, cutoff=BASE + timedelta(days=45))
+
+    pages = []
+    after = None
+    with engine.connect() as conn:
+        while True:
+            page = list(
+                load_raw_range(
+                    conn,
+                    raw_coingecko,
+                    BASE,
+                    BASE + timedelta(days=60),
+                    after=after,
+                    limit=7,
+                )
+            )
+            if not page:
+                break
+            pages.extend(page)
+            after = (page[-1]["ingested_at"], page[-1]["id"])
+
+    assert [r["id"] for r in pages] == [r["id"] for r in before]
+    assert pages[0]["payload"]["current_price"] == 100
+
+
+def test_rebuild_covers_archived_rows(engine, archive_dir):
+    archive_table(engine, raw_coingecko, cutoff=BASE + timedelta(days=45))
+
+    plan = plan_partitions(engine, sources=["coingecko"], partitions=3)
+    assert sum(p["rows"] for p in plan) == 60
+
+    for part in plan:
+        rebuild_range(
+            engine,
+            source="coingecko",
+            start=part["start"],
+            end=part["end"],
+            run_id=None,
+            batch_size=10,
+        )
+
+    with engine.connect() as conn:
+        count = conn.execute(
+            select(func.count()).select_from(asset_market_data)
+        ).scalar()
+
+    assert count == 60
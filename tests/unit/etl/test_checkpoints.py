@@ -0,0 +1,77 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.core.checkpoints import (
+    CheckpointManager,
+    ewma_update,
+    update_baselines,
+    run_baseline,
+)
+from app.schemas.tables import metadata, etl_source_stats
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    return engine
+
+
+def test_ewma_update_matches_closed_form():
+    mean, var = ewma_update(None, None, 10, 0.5)
+    assert (mean, var) == (10.0, 0.0)
+
+    mean, var = ewma_update(mean, var, 20, 0.5)
+    assert mean == 15.0
+    assert var == pytest.approx(25.0)
+
+
+def test_update_baselines_keeps_fixed_window():
+    stats = None
+    for duration in (100, 200, 300, 400):
+        stats = update_baselines(stats, duration, duration // 10, window=3)
+
+    assert stats["recent_runs"] == [[200, 20], [300, 30], [400, 40]]
+    assert stats["window_duration_avg"] == 300
+    assert stats["window_records_avg"] == 30
+
+
+def test_run_baseline_uses_stats_before_the_run():
+    stats = None
+    for duration in (90, 110) * 10:
+        stats = update_baselines(stats, duration, 100)
+    stats["success_count"] = 20
+
+    run = run_baseline(stats, 200, 100)
+
+    # Folding 200 in first would bound |z| by sqrt(0.8 / 0.2) = 2.
+    assert run["duration_zscore"] > 5
+    assert run["records_zscore"] is None  # no spread yet
+    assert run["baseline_duration_ms"] == 100
+    assert run["baseline_runs"] == 20
+
+
+def test_run_lifecycle_maintains_source_stats(engine):
+    cp = CheckpointManager(engine)
+    cp.initialize_if_missing("csv")
+
+    for records in (10, 20):
+        run_id = uuid.uuid4()
+        cp.start_run("csv", run_id, "manual")
+        cp.mark_success("csv", run_id, datetime.now(timezone.utc), records)
+
+    failed = uuid.uuid4()
+    cp.start_run("csv", failed, "manual")
+    cp.mark_failure("csv", failed, "boom")
+
+    with engine.connect() as conn:
+        stats = conn.execute(select(etl_source_stats)).mappings().one()
+
+    assert stats["last_run_id"] == failed
+    assert stats["success_count"] == 2
+    assert stats["failure_count"] == 1
+    assert stats["window_records_avg"] == 15
+    assert [r for _, r in stats["recent_runs"]] == [10, 20]
@@ -0,0 +1,65 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.services.partition_maintenance import (
+    add_months,
+    ensure_partitions,
+    month_start,
+    partition_name,
+    scanned_partitions,
+    _scanned_relations,
+)
+
+
+def test_month_arithmetic_crosses_year_boundary():
+    ts = datetime(2024, 11, 17, 13, 5, tzinfo=timezone.utc)
+
+    start = month_start(ts)
+
+    assert start == datetime(2024, 11, 1, tzinfo=timezone.utc)
+    assert add_months(start, 2) == datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert partition_name(add_months(start, 2)) == "asset_market_data_p202501"
+
+
+def test_scanned_relations_walks_nested_plans():
+    plan = {
+        "Node Type": "Append",
+        "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "asset_market_data_p202401"},
+            {
+                "Node Type": "Bitmap Heap Scan",
+                "Relation Name": "asset_market_data_p202402",
+                "Plans": [{"Node Type": "Bitmap Index Scan"}],
+            },
+        ],
+    }
+
+    assert _scanned_relations(plan) == {
+        "asset_market_data_p202401",
+        "asset_market_data_p202402",
+    }
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_DATABASE_URL"),
+    reason="needs a migrated Postgres database in TEST_DATABASE_URL",
+)
+def test_range_query_prunes_to_one_partition():
+    engine = create_engine(os.environ["TEST_DATABASE_URL"])
+    now = datetime.now(timezone.utc)
+    ensure_partitions(engine, months_ahead=1, now=now)
+
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE asset_market_data"))
+
+    start = month_start(now)
+    scanned = scanned_partitions(
+        engine,
+        from_ts=start.replace(day=2),
+        to_ts=start.replace(day=20),
+    )
+
+    assert scanned == {partition_name(start)}
@@ -0,0 +1,204 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, func, update
+
+from app.schemas.tables import (
+    metadata,
+    raw_coingecko,
+    asset_market_data,
+    asset_latest_market_data,
+    data_generation,
+)
+from app.services import rebuild_service
+from app.services.rebuild_service import plan_partitions, rebuild_range
+from app.transform import transformer
+
+
+def _seed(engine, n):
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    with engine.begin() as conn:
+        conn.execute(
+            raw_coingecko.insert(),
+            [
+                {
+                    "source_id": "bitcoin",
+                    "payload": {
+                        "id": "bitcoin",
+                        "symbol": "btc",
+                        "name": "Bitcoin",
+                        "current_price": 100 + i,
+                        "market_cap": 1000,
+                        "total_volume": 10,
+                        "last_updated": (base + timedelta(hours=i)).isoformat(),
+                    },
+                    "payload_hash": str(i).encode(),
+                    "ingested_at": base + timedelta(hours=i),
+                }
+                for i in range(n)
+            ],
+        )
+
+
+def test_plan_partitions_covers_every_row_once():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    _seed(engine, 10)
+
+    plan = plan_partitions(engine, sources=["coingecko", "csv"], partitions=3)
+
+    assert {p["source"] for p in plan} == {"coingecko"}
+    assert sum(p["rows"] for p in plan) == 10
+    for a, b in zip(plan, plan[1:]):
+        assert a["end"] == b["start"]
+
+
+def test_rebuild_range_pages_through_window():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    _seed(engine, 7)
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    stats = rebuild_range(
+        engine,
+        source="coingecko",
+        start=start,
+        end=start + timedelta(hours=5),
+        run_id=uuid.uuid4(),
+        batch_size=2,
+    )
+
+    with engine.connect() as conn:
+        count = conn.execute(
+            select(func.count()).select_from(asset_market_data)
+        ).scalar()
+
+    assert stats == {"success": 5, "failed": 0}
+    assert count == 5
+
+
+def test_rebuild_overwrites_rows_after_parser_change(monkeypatch):
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    _seed(engine, 3)
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    window = dict(
+        source="coingecko",
+        start=start,
+        end=start + timedelta(hours=3),
+        batch_size=10,
+    )
+    rebuild_range(engine, run_id=uuid.uuid4(), **window)
+
+    # Transform logic change: prices now come out doubled.
+    parse = transformer.parse_coingecko
+
+    def parse_doubled(row):
+        parsed = parse(row)
+        return {**parsed, "price_usd": parsed["price_usd"] * 2}
+
+    monkeypatch.setattr(transformer, "parse_coingecko", parse_doubled)
+    rebuild_range(engine, run_id=uuid.uuid4(), **window)
+
+    with engine.connect() as conn:
+        prices = conn.execute(
+            select(asset_market_data.c.price_usd)
+            .order_by(asset_market_data.c.last_updated)
+        ).scalars().all()
+        latest = conn.execute(
+            select(asset_latest_market_data.c.price_usd)
+        ).scalar_one()
+
+    assert [float(p) for p in prices] == [200, 202, 204]
+    assert float(latest) == 204
+
+
+def test_rebuild_parses_payload_over_stale_hot_fields():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    _seed(engine, 1)
+
+    # Hot columns written by an older, buggy parser.
+    with engine.begin() as conn:
+        conn.execute(
+            update(raw_coingecko).values(
+                symbol="BTC",
+                name="Bitcoin",
+                price_usd=1,
+                market_cap_usd=1000,
+                volume_24h_usd=10,
+                source_updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            )
+        )
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rebuild_range(
+        engine,
+        source="coingecko",
+        start=start,
+        end=start + timedelta(hours=1),
+        run_id=uuid.uuid4(),
+        batch_size=10,
+    )
+
+    with engine.connect() as conn:
+        price = conn.execute(select(asset_market_data.c.price_usd)).scalar_one()
+
+    assert float(price) == 100
+
+
+@pytest.fixture
+def rebuild_in_threads(tmp_path, monkeypatch):
+    """run_rebuild against a file-backed SQLite database, workers as threads."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'rebuild.db'}")
+    metadata.create_all(engine)
+    _seed(engine, 3)
+
+    monkeypatch.setattr(rebuild_service, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(rebuild_service, "_init_worker", lambda: None)
+    monkeypatch.setattr(rebuild_service, "_worker_engine", engine)
+
+    notified = []
+    monkeypatch.setattr(
+        rebuild_service,
+        "notify_prices_changed",
+        lambda conn, run_id: notified.append(run_id),
+    )
+    return engine, notified
+
+
+def _generation(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(data_generation.c.generation)).scalar()
+
+
+def test_failed_rebuild_does_not_bump_generation_or_notify(
+    rebuild_in_threads, monkeypatch
+):
+    engine, notified = rebuild_in_threads
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("worker crashed")
+
+    monkeypatch.setattr(rebuild_service, "rebuild_range", fail)
+
+    with pytest.raises(RuntimeError):
+        rebuild_service.run_rebuild(engine, workers=1, partitions=1)
+
+    assert _generation(engine) is None
+    assert notified == []
+
+
+def test_successful_rebuild_bumps_generation_and_notifies(rebuild_in_threads):
+    engine, notified = rebuild_in_threads
+
+    totals = rebuild_service.run_rebuild(engine, workers=1, partitions=1)
+
+    assert totals == {"success": 3, "failed": 0}
+    # One bump per committed batch's snapshot write, one for the rebuild.
+    assert _generation(engine) == 2
+    assert len(notified) == 1
@@ -1,3 +1,5 @@
+import json
+import hashlib
 import pytest
 from sqlalchemy import create_engine, select, func
 from app.ingestion.coingecko import ingest_coingecko
@@ -9,8 +11,12 @@ def engine():
     metadata.create_all(engine)
     return engine
 
-def test_ingest_coingecko_inserts_data(mocker, engine):
-    fake_payload = [{
+@pytest.fixture
+def fake_payload(mocker, monkeypatch):
+    """One-coin /coins/markets response served by the patched client."""
+    monkeypatch.setenv("COINGECKO_API_KEY", "test-key")
+
+    payload = [{
         "id": "bitcoin",
         "symbol": "btc",
         "name": "Bitcoin",
@@ -24,10 +30,12 @@ def test_ingest_coingecko_inserts_data(mocker, engine):
         "app.ingestion.coingecko.cg_http.get",
         return_value=mocker.Mock(
             status_code=200,
-            json=lambda: fake_payload,
+            json=lambda: payload,
         ),
     )
+    return payload
 
+def test_ingest_coingecko_inserts_data(fake_payload, engine):
     inserted = ingest_coingecko(engine)
 
     with engine.connect() as conn:
@@ -36,29 +44,33 @@ def test_ingest_coingecko_inserts_data(mocker, engine):
     assert inserted == 1
     assert len(rows) == 1
 
-def test_ingest_coingecko_idempotent(mocker, engine):
-    fake_payload = [{
-        "id": "bitcoin",
-        "symbol": "btc",
-        "name": "Bitcoin",
-        "current_price": 100,
-        "market_cap": 1000,
-        "total_volume": 10,
-        "last_updated": "2024-01-01T00:00:00Z",
-    }]
+def test_ingest_coingecko_idempotent(fake_payload, engine):
+    ingest_coingecko(engine)
+    ingest_coingecko(engine)
 
-    mocker.patch(
-        "app.ingestion.coingecko.cg_http.get",
-        return_value=mocker.Mock(
-            status_code=200,
-            json=lambda: fake_payload,
-        ),
-    )
+    with engine.connect() as conn:
+        count = conn.execute(select(func.count()).select_from(raw_coingecko)).scalar()
 
+    assert count == 1
+
+def test_ingest_coingecko_extracts_hot_fields(fake_payload, engine):
     ingest_coingecko(engine)
+
+    with engine.connect() as conn:
+        row = conn.execute(select(raw_coingecko)).mappings().one()
+
+    assert row["symbol"] == "BTC"
+    assert row["name"] == "Bitcoin"
+    assert float(row["price_usd"]) == 100
+    assert row["source_updated_at"].year == 2024
+
+def test_ingest_coingecko_stores_binary_payload_hash(fake_payload, engine):
     ingest_coingecko(engine)
 
     with engine.connect() as conn:
-        count = conn.execute(select(func.count()).select_from(raw_coingecko)).scalar()
+        row = conn.execute(select(raw_coingecko)).mappings().one()
 
-    assert count == 1
\ No newline at end of file
+    assert row["payload_hash"] == hashlib.sha256(
+        json.dumps(fake_payload[0], sort_keys=True).encode()
+    ).digest()
+    assert len(row["payload_hash"]) == 32
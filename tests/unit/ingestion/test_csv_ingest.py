@@ -33,3 +33,26 @@ AAPL,2024-01-01,100
 
     assert inserted == 1
     assert count == 1
+
+
+def test_ingest_csv_leaves_hot_fields_null_for_partial_rows(mocker):
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+
+    mock_response = MagicMock()
+    mock_response.text = "Symbol,Date,Close\nAAPL,2024-01-01,100\n"
+    mock_response.raise_for_status.return_value = None
+
+    mocker.patch(
+        "app.ingestion.csv_source.csv_http.get",
+        return_value=mock_response,
+    )
+
+    ingest_csv(engine)
+
+    with engine.connect() as conn:
+        row = conn.execute(select(raw_csv)).mappings().one()
+
+    assert row["payload"]["Close"] == "100"
+    assert row["price_usd"] is None
+    assert row["source_updated_at"] is None
@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import create_engine, select
+
+from app.schemas.tables import metadata, assets, asset_consensus_prices
+from app.transform.consensus import build_consensus, refresh_consensus
+from app.transform.transformer import upsert_latest_market_data
+
+NOW = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def latest(source, price, age=timedelta(0)):
+    return {"source": source, "price_usd": price, "last_updated": NOW - age}
+
+
+def test_build_consensus_median_mean_spread():
+    c = build_consensus(
+        [
+            latest("coingecko", Decimal("100")),
+            latest("coinpaprika", Decimal("102"), timedelta(minutes=5)),
+            latest("csv", Decimal("98"), timedelta(hours=1)),
+        ]
+    )
+
+    assert c["median_price_usd"] == 100
+    assert c["mean_price_usd"] == 100
+    assert c["spread_pct"] == 4
+    assert c["sources"] == ["coingecko", "coinpaprika", "csv"]
+    assert c["freshest_at"] == NOW
+
+
+def test_build_consensus_drops_stale_and_unpriced_sources():
+    c = build_consensus(
+        [
+            latest("coingecko", Decimal("100")),
+            latest("coinpaprika", None),
+            latest("csv", Decimal("10"), timedelta(days=30)),
+        ]
+    )
+
+    assert c["source_count"] == 1
+    assert c["sources"] == ["coingecko"]
+    assert c["spread_pct"] == 0
+
+    assert build_consensus([latest("coinpaprika", None)]) is None
+
+
+def test_refresh_consensus_upserts_touched_assets():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    asset_id = uuid.uuid4()
+
+    def observe(conn, source, price, ts):
+        upsert_latest_market_data(
+            conn,
+            [
+                {
+                    "asset_id": asset_id,
+                    "source": source,
+                    "price_usd": Decimal(price),
+                    "market_cap_usd": None,
+                    "volume_24h_usd": None,
+                    "last_updated": ts,
+                }
+            ],
+        )
+
+    with engine.begin() as conn:
+        conn.execute(
+            assets.insert(),
+            {"asset_id": asset_id, "symbol": "BTC", "name": "Bitcoin"},
+        )
+        observe(conn, "coingecko", "100", NOW)
+        observe(conn, "coinpaprika", "104", NOW)
+        refresh_consensus(conn, [asset_id])
+
+        observe(conn, "coingecko", "110", NOW + timedelta(hours=1))
+        refresh_consensus(conn, [asset_id])
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(asset_consensus_prices)).mappings().all()
+
+    assert len(rows) == 1
+    assert float(rows[0]["median_price_usd"]) == 107
+    assert rows[0]["source_count"] == 2
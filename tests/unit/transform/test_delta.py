@@ -0,0 +1,106 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import create_engine, select
+from app.schemas.tables import (
+    metadata,
+    asset_market_data,
+    asset_latest_market_data,
+)
+from app.transform.context import TransformContext
+from app.transform.transformer import transform_coingecko
+
+
+def _row(price, ts):
+    return {
+        "id": uuid.uuid4(),
+        "payload": {
+            "id": "bitcoin",
+            "symbol": "btc",
+            "name": "Bitcoin",
+            "current_price": price,
+            "market_cap": 1000,
+            "total_volume": 10,
+            "last_updated": ts,
+        },
+    }
+
+
+def _prices(engine):
+    with engine.connect() as conn:
+        return [
+            float(p)
+            for p in conn.execute(
+                select(asset_market_data.c.price_usd)
+                .order_by(asset_market_data.c.last_updated)
+            ).scalars()
+        ]
+
+
+def test_delta_mode_suppresses_unchanged_rows():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    ctx = TransformContext(uuid.uuid4(), delta=True)
+
+    rows = [
+        _row(100, "2024-01-01T00:00:00Z"),
+        _row(100, "2024-01-01T01:00:00Z"),
+        _row(101, "2024-01-01T02:00:00Z"),
+        _row(101, "2024-01-01T03:00:00Z"),
+    ]
+
+    with engine.begin() as conn:
+        for row in rows:
+            assert transform_coingecko(conn, row=row, run_id=ctx.run_id, ctx=ctx)
+
+    assert _prices(engine) == [100, 101]
+    assert ctx.suppressed == {"coingecko": 2}
+
+
+def test_delta_mode_advances_latest_snapshot_timestamp():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    ctx = TransformContext(uuid.uuid4(), delta=True)
+
+    with engine.begin() as conn:
+        for ts in ("2024-01-01T00:00:00Z", "2024-01-05T00:00:00Z"):
+            transform_coingecko(conn, row=_row(100, ts), run_id=ctx.run_id, ctx=ctx)
+        ctx.flush(conn)
+
+    with engine.connect() as conn:
+        latest = conn.execute(select(asset_latest_market_data)).mappings().one()
+
+    assert _prices(engine) == [100]
+    assert ctx.suppressed == {"coingecko": 1}
+    assert latest["last_updated"].replace(tzinfo=timezone.utc) == datetime(
+        2024, 1, 5, tzinfo=timezone.utc
+    )
+    assert float(latest["price_usd"]) == 100
+
+
+def test_delta_mode_compares_against_previous_runs():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        transform_coingecko(conn, row=_row(100, "2024-01-01T00:00:00Z"), run_id=uuid.uuid4())
+
+    ctx = TransformContext(uuid.uuid4(), delta=True)
+    with engine.begin() as conn:
+        transform_coingecko(conn, row=_row(100, "2024-01-02T00:00:00Z"), run_id=ctx.run_id, ctx=ctx)
+        transform_coingecko(conn, row=_row(99, "2023-12-31T00:00:00Z"), run_id=ctx.run_id, ctx=ctx)
+
+    assert _prices(engine) == [99, 100]
+    assert ctx.suppressed == {"coingecko": 1}
+
+
+def test_delta_mode_off_writes_every_observation():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    ctx = TransformContext(uuid.uuid4())
+
+    with engine.begin() as conn:
+        for ts in ("2024-01-01T00:00:00Z", "2024-01-01T01:00:00Z"):
+            transform_coingecko(conn, row=_row(100, ts), run_id=ctx.run_id, ctx=ctx)
+
+    assert _prices(engine) == [100, 100]
+    assert ctx.suppressed == {}
@@ -0,0 +1,78 @@
+import uuid
+from decimal import Decimal
+from sqlalchemy import create_engine, select, func
+from app.schemas.tables import (
+    metadata,
+    transform_failures,
+    transform_failure_summaries,
+)
+from app.transform.failures import FailureRecorder, normalize_error
+
+
+def _fail(recorder, conn, price):
+    recorder.record(
+        conn,
+        source="coingecko",
+        raw_table="raw_coingecko",
+        raw_id=uuid.uuid4(),
+        payload={"current_price": price},
+        error_type="ValidationError",
+        error_message=(
+            "1 validation error for AssetMarketData\nprice_usd\n"
+            "  Input should be greater than 0 [type=greater_than, "
+            f"input_value=Decimal('{price}'), input_type=Decimal]"
+        ),
+    )
+
+
+def test_normalize_error_strips_row_specific_values():
+    a = normalize_error("bad value 12.5 at '2024-01-01' for 8f2c1d9e-0000-4000-8000-000000000000")
+    b = normalize_error("bad value -3 at '2025-06-30' for 11111111-2222-4333-8444-555555555555")
+
+    assert a == b
+
+
+def test_recorder_samples_and_counts_repeated_failures():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    run_id = uuid.uuid4()
+    recorder = FailureRecorder(run_id, sample_limit=2, batch_size=100)
+
+    with engine.begin() as conn:
+        for price in (0, -1, -2):
+            _fail(recorder, conn, price)
+        recorder.flush(conn)
+
+        for price in (-3, -4):
+            _fail(recorder, conn, price)
+        recorder.flush(conn)
+
+    with engine.connect() as conn:
+        samples = conn.execute(
+            select(func.count()).select_from(transform_failures)
+        ).scalar()
+        summary = conn.execute(select(transform_failure_summaries)).mappings().one()
+
+    assert samples == 2
+    assert summary["run_id"] == run_id
+    assert summary["failure_count"] == 5
+    assert summary["sampled_count"] == 2
+    assert recorder.summary() == {"coingecko": {"failures": 5, "fingerprints": 1}}
+
+
+def test_recorder_discard_reverts_unflushed_failures():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    recorder = FailureRecorder(uuid.uuid4(), sample_limit=1)
+
+    with engine.begin() as conn:
+        _fail(recorder, conn, 0)
+        recorder.discard()
+        _fail(recorder, conn, -1)
+        recorder.flush(conn)
+
+    with engine.connect() as conn:
+        summary = conn.execute(select(transform_failure_summaries)).mappings().one()
+
+    assert summary["failure_count"] == 1
+    assert summary["sampled_count"] == 1
@@ -29,13 +29,13 @@ def test_load_raw_coingecko_ordered():
                 {
                     "source_id": "a",
                     "payload": {},
-                    "payload_hash": "1",
+                    "payload_hash": b"1",
                     "ingested_at": datetime(2024, 1, 2, tzinfo=timezone.utc),
                 },
                 {
                     "source_id": "b",
                     "payload": {},
-                    "payload_hash": "2",
+                    "payload_hash": b"2",
                     "ingested_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
                 },
             ],
@@ -56,13 +56,13 @@ def test_load_raw_coinpaprika_ordered():
                 {
                     "source_id": "eth",
                     "payload": {},
-                    "payload_hash": "x",
+                    "payload_hash": b"x",
                     "ingested_at": datetime(2024, 1, 3, tzinfo=timezone.utc),
                 },
                 {
                     "source_id": "btc",
                     "payload": {},
-                    "payload_hash": "y",
+                    "payload_hash": b"y",
                     "ingested_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
                 },
             ],
@@ -83,13 +83,13 @@ def test_load_raw_csv_ordered():
                 {
                     "source_id": "AAPL",
                     "payload": {},
-                    "payload_hash": "p1",
+                    "payload_hash": b"p1",
                     "ingested_at": datetime(2024, 1, 5, tzinfo=timezone.utc),
                 },
                 {
                     "source_id": "MSFT",
                     "payload": {},
-                    "payload_hash": "p2",
+                    "payload_hash": b"p2",
                     "ingested_at": datetime(2024, 1, 2, tzinfo=timezone.utc),
                 },
             ],
@@ -111,19 +111,19 @@ def test_load_raw_coingecko_respects_since_and_order():
                 {
                     "source_id": "old",
                     "payload": {},
-                    "payload_hash": "1",
+                    "payload_hash": b"1",
                     "ingested_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
                 },
                 {
                     "source_id": "newer",
                     "payload": {},
-                    "payload_hash": "2",
+                    "payload_hash": b"2",
                     "ingested_at": datetime(2024, 1, 2, tzinfo=timezone.utc),
                 },
                 {
                     "source_id": "latest",
                     "payload": {},
-                    "payload_hash": "3",
+                    "payload_hash": b"3",
                     "ingested_at": datetime(2024, 1, 3, tzinfo=timezone.utc),
                 },
             ],
@@ -145,13 +145,13 @@ def test_load_raw_coinpaprika_respects_since_and_order():
                 {
                     "source_id": "btc",
                     "payload": {},
-                    "payload_hash": "x",
+                    "payload_hash": b"x",
                     "ingested_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
                 },
                 {
                     "source_id": "eth",
                     "payload": {},
-                    "payload_hash": "y",
+                    "payload_hash": b"y",
                     "ingested_at": datetime(2024, 1, 3, tzinfo=timezone.utc),
                 },
             ],
@@ -173,13 +173,13 @@ def test_load_raw_csv_respects_since_and_order():
                 {
                     "source_id": "MSFT",
                     "payload": {},
-                    "payload_hash": "p1",
+                    "payload_hash": b"p1",
                     "ingested_at": datetime(2024, 1, 2, tzinfo=timezone.utc),
                 },
                 {
                     "source_id": "AAPL",
                     "payload": {},
-                    "payload_hash": "p2",
+                    "payload_hash": b"p2",
                     "ingested_at": datetime(2024, 1, 5, tzinfo=timezone.utc),
                 },
             ],
@@ -188,3 +188,36 @@ def test_load_raw_csv_respects_since_and_order():
         rows = list(load_raw_csv(conn, since))
 
     assert [r["source_id"] for r in rows] == ["AAPL"]
+
+
+def test_load_raw_skips_payload_when_hot_fields_present():
+    engine = _setup_engine()
+
+    with engine.begin() as conn:
+        conn.execute(
+            raw_coingecko.insert(),
+            [
+                {
+                    "source_id": "hot",
+                    "payload": {"id": "hot"},
+                    "payload_hash": b"1",
+                    "ingested_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+                    "symbol": "HOT",
+                    "source_updated_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+                },
+                {
+                    "source_id": "cold",
+                    "payload": {"id": "cold"},
+                    "payload_hash": b"2",
+                    "ingested_at": datetime(2024, 1, 2, tzinfo=timezone.utc),
+                    "symbol": None,
+                    "source_updated_at": None,
+                },
+            ],
+        )
+
+        rows = list(load_raw_coingecko(conn, None))
+
+    assert rows[0]["payload"] is None
+    assert rows[0]["symbol"] == "HOT"
+    assert rows[1]["payload"] == {"id": "cold"}
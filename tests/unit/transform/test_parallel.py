@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import create_engine, select, func
+from app.schemas.tables import metadata, assets, asset_market_data, transform_failures
+from app.transform.parallel import transform_parallel
+import uuid
+
+
+def _row(coin_id, price, ts):
+    return {
+        "id": uuid.uuid4(),
+        "payload": {
+            "id": coin_id,
+            "symbol": coin_id[:3],
+            "name": coin_id.title(),
+            "current_price": price,
+            "market_cap": 1000,
+            "total_volume": 10,
+            "last_updated": ts,
+        },
+    }
+
+
+def test_transform_parallel_writes_valid_rows_and_records_failures():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+
+    rows = [
+        _row("bitcoin", 100, "2024-01-01T00:00:00Z"),
+        _row("bitcoin", 101, "2024-01-01T01:00:00Z"),
+        _row("ethereum", 10, "2024-01-01T00:00:00Z"),
+        _row("ethereum", 0, "2024-01-01T01:00:00Z"),  # price must be > 0
+    ]
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        with engine.begin() as conn:
+            stats = transform_parallel(
+                conn,
+                source="coingecko",
+                rows=rows,
+                run_id=uuid.uuid4(),
+                pool=pool,
+                batch_size=1,
+                max_in_flight=2,
+            )
+
+    with engine.connect() as conn:
+        asset_count = conn.execute(select(func.count()).select_from(assets)).scalar()
+        prices = conn.execute(
+            select(asset_market_data.c.price_usd).order_by(asset_market_data.c.price_usd)
+        ).scalars().all()
+        failure = conn.execute(select(transform_failures)).mappings().one()
+
+    assert stats == {"success": 3, "failed": 1}
+    assert asset_count == 2
+    assert [float(p) for p in prices] == [10, 100, 101]
+    assert failure["raw_id"] == rows[3]["id"]
+    assert failure["error_type"] == "ValidationError"
@@ -1,6 +1,14 @@
 from datetime import datetime, timezone
 from sqlalchemy import create_engine, select, func
-from app.schemas.tables import metadata, assets, asset_market_data
+from app.schemas.tables import (
+    metadata,
+    assets,
+    asset_market_data,
+    asset_latest_market_data,
+    asset_candles_1h,
+    asset_candles_1d,
+)
+from app.transform.context import TransformContext
 from app.transform.transformer import transform_coingecko
 import uuid
 
@@ -56,4 +64,111 @@ def test_transform_coingecko_idempotent():
         market_count = conn.execute(select(func.count()).select_from(asset_market_data)).scalar()
 
     assert asset_count == 1
-    assert market_count == 1
\ No newline at end of file
+    assert market_count == 1
+
+
+def test_transform_reads_hot_fields_without_payload():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+
+    row = {
+        "id": uuid.uuid4(),
+        "source_id": "bitcoin",
+        "payload": None,
+        "symbol": "BTC",
+        "name": "Bitcoin",
+        "price_usd": 100,
+        "market_cap_usd": 1000,
+        "volume_24h_usd": 10,
+        "source_updated_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    }
+
+    with engine.begin() as conn:
+        assert transform_coingecko(conn, row=row, run_id=uuid.uuid4())
+
+    with engine.connect() as conn:
+        market = conn.execute(select(asset_market_data)).fetchone()
+
+    assert float(market.price_usd) == 100
+
+
+
+def test_transform_maintains_latest_snapshot():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+
+    def row(price, ts):
+        return {
+            "payload": {
+                "id": "bitcoin",
+                "symbol": "btc",
+                "name": "Bitcoin",
+                "current_price": price,
+                "market_cap": 1000,
+                "total_volume": 10,
+                "last_updated": ts,
+            }
+        }
+
+    with engine.begin() as conn:
+        transform_coingecko(conn, row=row(100, "2024-01-02T00:00:00Z"), run_id=uuid.uuid4())
+
+    ctx = TransformContext(uuid.uuid4())
+    with engine.begin() as conn:
+        transform_coingecko(conn, row=row(90, "2024-01-01T00:00:00Z"), run_id=ctx.run_id, ctx=ctx)
+        transform_coingecko(conn, row=row(110, "2024-01-03T00:00:00Z"), run_id=ctx.run_id, ctx=ctx)
+        transform_coingecko(conn, row=row(105, "2024-01-02T12:00:00Z"), run_id=ctx.run_id, ctx=ctx)
+        ctx.flush(conn)
+
+    with engine.connect() as conn:
+        latest = conn.execute(select(asset_latest_market_data)).mappings().all()
+        history = conn.execute(select(func.count()).select_from(asset_market_data)).scalar()
+
+    assert history == 4
+    assert len(latest) == 1
+    assert float(latest[0]["price_usd"]) == 110
+
+
+def test_transform_refreshes_only_touched_candle_buckets():
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+
+    def row(price, ts):
+        return {
+            "payload": {
+                "id": "bitcoin",
+                "symbol": "btc",
+                "name": "Bitcoin",
+                "current_price": price,
+                "market_cap": 1000,
+                "total_volume": 10,
+                "last_updated": ts,
+            }
+        }
+
+    ctx = TransformContext(uuid.uuid4())
+    with engine.begin() as conn:
+        transform_coingecko(conn, row=row(100, "2024-01-01T10:00:00Z"), run_id=ctx.run_id, ctx=ctx)
+        transform_coingecko(conn, row=row(120, "2024-01-01T10:30:00Z"), run_id=ctx.run_id, ctx=ctx)
+        transform_coingecko(conn, row=row(50, "2024-01-02T08:00:00Z"), run_id=ctx.run_id, ctx=ctx)
+        ctx.flush(conn)
+
+    # A late point for the first hour arrives in a later run.
+    ctx = TransformContext(uuid.uuid4())
+    with engine.begin() as conn:
+        transform_coingecko(conn, row=row(80, "2024-01-01T10:10:00Z"), run_id=ctx.run_id, ctx=ctx)
+        ctx.flush(conn)
+
+    with engine.connect() as conn:
+        hourly = conn.execute(
+            select(asset_candles_1h).order_by(asset_candles_1h.c.bucket_start)
+        ).mappings().all()
+        daily = conn.execute(
+            select(asset_candles_1d).order_by(asset_candles_1d.c.bucket_start)
+        ).mappings().all()
+
+    assert len(hourly) == 2
+    assert [float(hourly[0][k]) for k in ("open_usd", "high_usd", "low_usd", "close_usd")] == [100, 120, 80, 120]
+    assert hourly[0]["points"] == 3
+    assert len(daily) == 2
+    assert float(daily[1]["close_usd"]) == 50